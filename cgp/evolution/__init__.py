@@ -0,0 +1,19 @@
+from .evolution import Evolution, EvolutionConfig, MeasuredGene
+from .islands import IslandModel, IslandProgress, Migrant
+from .islands import MigrationChannel, MigrationEndpoint
+from .islands import PipeChannel, RedisChannel
+from .problem_pool_executor import ProblemPoolExecutor
+from .serial_executor import SerialExecutor
+
+__all__ = ['Evolution',
+           'EvolutionConfig',
+           'IslandModel',
+           'IslandProgress',
+           'MeasuredGene',
+           'Migrant',
+           'MigrationChannel',
+           'MigrationEndpoint',
+           'PipeChannel',
+           'ProblemPoolExecutor',
+           'RedisChannel',
+           'SerialExecutor']
@@ -0,0 +1,200 @@
+from __future__ import annotations
+from concurrent.futures import Executor
+from dataclasses import dataclass
+import random
+from typing import Callable, Optional
+
+from cgp.gene import Gene, GeneBuilder, GeneMutatorBase, PopulationEvaluator
+from cgp.problems import ProblemBase, RowChunks
+from cgp.util import FitnessCache
+from .islands import Migrant
+from .problem_pool_executor import ProblemPoolExecutor, _workerProblem
+from .serial_executor import SerialExecutor
+
+
+@dataclass
+class MeasuredGene:
+    fitness: float
+    gene: Gene
+
+
+@dataclass
+class EvolutionConfig:
+    mu: int = 10
+    lamb: int = 100
+    max_generations: int = 5000
+    # Children are measured in this many chunks, eg: one per worker:
+    num_chunks: int = 1
+    cache_size: int = 10000
+    # Evaluate this many training rows at a time, so memory stays bounded
+    # for big (eg: memory-mapped) datasets. 0 evaluates every row at once.
+    chunk_rows: int = 0
+    # Evaluate genes in this dtype, eg: 'float32' halves the memory traffic.
+    # PrecisionUtil.compare tells how far that drifts from float64:
+    dtype: str = 'float64'
+
+
+# Called with (generation, population sorted best first).
+# Returning True stops the run.
+GenerationCallback = Callable[[int, list[MeasuredGene]], Optional[bool]]
+
+
+def _measureGenes(problem: Optional[ProblemBase],
+                  genes: list[Gene],
+                  chunk_rows: int = 0,
+                  dtype: str = 'float64') -> list[float]:
+    # Module level so process pools can pickle it. Without a problem, it's
+    # the one a ProblemPoolExecutor installed in this worker:
+    if problem is None:
+        problem = _workerProblem()
+    train_input, train_output = problem.trainingSet()
+    if chunk_rows <= 0:
+        outputs = PopulationEvaluator.evaluate(genes, train_input, dtype)
+        return [
+            float(problem.measureFitness(train_output, output))
+            for output in outputs]
+    accumulators = [problem.fitnessAccumulator() for _ in genes]
+    for chunk_input, chunk_output in RowChunks.iterate(
+            (train_input, train_output), chunk_rows):
+        outputs = PopulationEvaluator.evaluate(genes, chunk_input, dtype)
+        for accumulator, output in zip(accumulators, outputs):
+            accumulator.add(chunk_output, output)
+    return [float(accumulator.result()) for accumulator in accumulators]
+
+
+class Evolution:
+    """
+    (mu+lambda) evolution of CGP genes on a problem's training set.
+    Lower fitness is better.
+
+    Each generation makes lamb children from random parents, measures the
+    ones not seen before (by phenotype hash) on the executor, and keeps the
+    best mu of parents and children. The executor can be anything from
+    concurrent.futures: SerialExecutor, a ThreadPoolExecutor (NumPy
+    releases the GIL while evaluating) or, for processes, a
+    ProblemPoolExecutor of the same problem, whose workers already hold
+    it. Other process pools get the problem pickled with every task.
+    """
+
+    def __init__(self,
+                 problem: ProblemBase,
+                 builder: GeneBuilder,
+                 mutator: GeneMutatorBase,
+                 config: Optional[EvolutionConfig] = None,
+                 executor: Optional[Executor] = None) -> None:
+        self.problem = problem
+        self.builder = builder
+        self.mutator = mutator
+        if config is None:
+            config = EvolutionConfig()
+        self.config = config
+        if executor is None:
+            executor = SerialExecutor()
+        self.executor = executor
+        self.cache = FitnessCache(max_size=config.cache_size)
+        self.generation = 0
+        self.population: list[MeasuredGene] = []
+
+    def measure(self, genes: list[Gene]) -> list[float]:
+        """
+        Fitness of every gene, in order. Cached phenotypes aren't evaluated
+        again, and repeated ones only once.
+        """
+        fitnesses: dict[str, float] = {}
+        unmeasured: dict[str, Gene] = {}
+        for gene in genes:
+            key = gene.phenotypeHash
+            if key in fitnesses or key in unmeasured:
+                continue
+            fitness = self.cache.get(key)
+            if fitness is None:
+                unmeasured[key] = gene
+            else:
+                fitnesses[key] = fitness
+        if len(unmeasured) > 0:
+            problem: Optional[ProblemBase] = self.problem
+            if (isinstance(self.executor, ProblemPoolExecutor)
+                    and self.executor.problem is self.problem):
+                problem = None
+            keys = list(unmeasured.keys())
+            numChunks = max(1, min(self.config.num_chunks, len(keys)))
+            chunks = [keys[i::numChunks] for i in range(numChunks)]
+            futures = [
+                self.executor.submit(
+                    _measureGenes,
+                    problem,
+                    [unmeasured[key] for key in chunk],
+                    self.config.chunk_rows,
+                    self.config.dtype)
+                for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                for key, fitness in zip(chunk, future.result()):
+                    self.cache.put(key, fitness)
+                    fitnesses[key] = fitness
+        return [fitnesses[gene.phenotypeHash] for gene in genes]
+
+    def initialize(self) -> None:
+        genes = [self.builder.makeGene() for _ in range(self.config.mu)]
+        self.population = self.select(genes, self.measure(genes))
+        self.generation = 0
+
+    def select(self,
+               genes: list[Gene],
+               fitnesses: list[float]) -> list[MeasuredGene]:
+        measured = [MeasuredGene(f, g) for f, g in zip(fitnesses, genes)]
+        # Lower is better, ties keep their order (parents first):
+        measured.sort(key=lambda x: x.fitness)
+        return measured[:self.config.mu]
+
+    def step(self) -> list[MeasuredGene]:
+        """
+        Runs one generation, and returns the new population
+        """
+        if len(self.population) == 0:
+            self.initialize()
+        children = []
+        for _ in range(self.config.lamb):
+            parent = random.choice(self.population).gene
+            children.append(self.mutator.mutateGene(parent))
+        fitnesses = [m.fitness for m in self.population]
+        fitnesses += self.measure(children)
+        genes = [m.gene for m in self.population] + children
+        self.population = self.select(genes, fitnesses)
+        self.generation += 1
+        return self.population
+
+    def migrants(self, count: int) -> list[Migrant]:
+        """
+        The best count individuals, for IslandModel
+        """
+        if len(self.population) == 0:
+            self.initialize()
+        return [Migrant(m.fitness, m.gene) for m in self.population[:count]]
+
+    def receive(self, migrants: list[Migrant]) -> None:
+        """
+        Adds migrants from another island, keeping the best mu
+        """
+        if len(migrants) == 0:
+            return
+        genes = [m.gene for m in self.population]
+        genes += [m.individual for m in migrants]
+        fitnesses = [m.fitness for m in self.population]
+        fitnesses += [m.fitness for m in migrants]
+        self.population = self.select(genes, fitnesses)
+
+    def run(self,
+            callback: Optional[GenerationCallback] = None
+            ) -> list[MeasuredGene]:
+        """
+        Runs up to max_generations generations, calling callback after each
+        one. Returns the final population, best first.
+        """
+        if len(self.population) == 0:
+            self.initialize()
+        while self.generation < self.config.max_generations:
+            population = self.step()
+            if callback is not None:
+                if callback(self.generation - 1, population):
+                    break
+        return self.population
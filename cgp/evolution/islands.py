@@ -0,0 +1,280 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import json
+import multiprocessing
+import queue
+import random
+from typing import Any, Callable, Optional, Protocol
+
+
+@dataclass
+class Migrant:
+    fitness: float
+    individual: Any
+
+
+class Island(Protocol):
+    """
+    What IslandModel needs from a population: Evolution and BrainIsland
+    both fit. Lower fitness is better.
+    """
+
+    def step(self) -> Any:
+        ...
+
+    def migrants(self, count: int) -> list[Migrant]:
+        ...
+
+    def receive(self, migrants: list[Migrant]) -> None:
+        ...
+
+
+class MigrationEndpoint(ABC):
+    """
+    One island's end of a migration channel
+    """
+
+    @abstractmethod
+    def send(self, migrants: list[Migrant]) -> None:
+        pass
+
+    @abstractmethod
+    def receive(self) -> list[Migrant]:
+        """
+        Everything that arrived since the last call, without waiting
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MigrationChannel(ABC):
+    """
+    Connects islands in a ring: island i sends to island i + 1
+    """
+
+    @abstractmethod
+    def endpoint(self, island: int) -> MigrationEndpoint:
+        pass
+
+
+class PipeEndpoint(MigrationEndpoint):
+    def __init__(self, outbox: Any, inbox: Any) -> None:
+        self.outbox = outbox
+        self.inbox = inbox
+
+    def send(self, migrants: list[Migrant]) -> None:
+        self.outbox.put(migrants)
+
+    def receive(self) -> list[Migrant]:
+        migrants: list[Migrant] = []
+        while True:
+            try:
+                migrants += self.inbox.get_nowait()
+            except queue.Empty:
+                return migrants
+
+    def close(self) -> None:
+        # Don't wait at exit for a finished neighbour to read our last
+        # migrants:
+        self.outbox.cancel_join_thread()
+
+
+class PipeChannel(MigrationChannel):
+    """
+    multiprocessing queues (pipes with a feeder thread, so sending never
+    blocks), for islands on one host. Create it before starting the island
+    processes.
+    """
+
+    def __init__(self, num_islands: int) -> None:
+        # inboxes[i] carries migrants from island i - 1 to island i:
+        self.inboxes = [multiprocessing.Queue() for _ in range(num_islands)]
+
+    def endpoint(self, island: int) -> MigrationEndpoint:
+        nextIsland = (island + 1) % len(self.inboxes)
+        return PipeEndpoint(self.inboxes[nextIsland], self.inboxes[island])
+
+
+class RedisEndpoint(MigrationEndpoint):
+    def __init__(self,
+                 channel: RedisChannel,
+                 island: int) -> None:
+        self.channel = channel
+        self.island = island
+        self._redis: Any = None
+
+    def redis(self) -> Any:
+        # Connect lazily, so the endpoint can be sent to a new process:
+        if self._redis is None:
+            self._redis = self.channel.redisFactory()
+        return self._redis
+
+    def send(self, migrants: list[Migrant]) -> None:
+        nextIsland = (self.island + 1) % self.channel.num_islands
+        for migrant in migrants:
+            self.redis().rpush(
+                self.channel.key(nextIsland),
+                json.dumps({
+                    'fitness': migrant.fitness,
+                    'individual': migrant.individual.to_json()}))
+
+    def receive(self) -> list[Migrant]:
+        migrants = []
+        while True:
+            payload = self.redis().lpop(self.channel.key(self.island))
+            if payload is None:
+                return migrants
+            message = json.loads(payload)
+            migrants.append(Migrant(
+                message['fitness'],
+                self.channel.decode(message['individual'])))
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = dict(self.__dict__)
+        state['_redis'] = None
+        return state
+
+
+class RedisChannel(MigrationChannel):
+    """
+    Redis lists, for islands spread over several hosts. Individuals travel
+    as JSON: they need to_json(), and decode turns the JSON back into one
+    (eg: Gene.from_json). redisFactory makes a client (picklable, eg: a
+    module level function), called once in each island's process.
+    """
+
+    def __init__(self,
+                 redisFactory: Callable[[], Any],
+                 num_islands: int,
+                 decode: Callable[[str], Any],
+                 prefix: str = 'islands') -> None:
+        self.redisFactory = redisFactory
+        self.num_islands = num_islands
+        self.decode = decode
+        self.prefix = prefix
+
+    def key(self, island: int) -> str:
+        return '{}:migrants:{}'.format(self.prefix, island)
+
+    def endpoint(self, island: int) -> MigrationEndpoint:
+        return RedisEndpoint(self, island)
+
+
+@dataclass
+class IslandProgress:
+    island: int
+    generation: int
+    best_fitness: float
+
+
+# Called with (generation, best fitness of each island), once every island
+# has finished that generation:
+ProgressCallback = Callable[[int, dict[int, float]], None]
+
+
+def _runIsland(island: int,
+               makeIsland: Callable[[int], Island],
+               endpoint: MigrationEndpoint,
+               generations: int,
+               migration_interval: int,
+               num_migrants: int,
+               seed: Optional[int],
+               progress: Any) -> None:
+    # Forked islands would otherwise all share one random stream:
+    random.seed(None if seed is None else seed + island)
+    population = makeIsland(island)
+    for generation in range(generations):
+        population.step()
+        if (generation + 1) % migration_interval == 0:
+            endpoint.send(population.migrants(num_migrants))
+            population.receive(endpoint.receive())
+        best = population.migrants(1)[0]
+        progress.put(IslandProgress(island, generation, best.fitness))
+    progress.put((island, population.migrants(1)[0]))
+    endpoint.close()
+
+
+class IslandModel:
+    """
+    Runs independent populations, one process each, and every
+    migration_interval generations sends each island's num_migrants best
+    to the next island over the channel (ring topology).
+
+    makeIsland(island) builds an island inside its process, so it has to
+    be picklable (eg: a module level function or functools.partial).
+    To spread one run over several hosts, give every host a RedisChannel
+    over all the islands and run a different part of them on each.
+    """
+
+    def __init__(self,
+                 makeIsland: Callable[[int], Island],
+                 num_islands: int,
+                 channel: Optional[MigrationChannel] = None,
+                 migration_interval: int = 10,
+                 num_migrants: int = 1,
+                 seed: Optional[int] = None) -> None:
+        self.makeIsland = makeIsland
+        self.num_islands = num_islands
+        if channel is None:
+            channel = PipeChannel(num_islands)
+        self.channel = channel
+        self.migration_interval = migration_interval
+        self.num_migrants = num_migrants
+        # Island i seeds random with seed + i (fresh entropy if None):
+        self.seed = seed
+
+    def run(self,
+            generations: int,
+            callback: Optional[ProgressCallback] = None,
+            islands: Optional[list[int]] = None) -> Migrant:
+        """
+        Runs the islands (all of them by default) for generations, and
+        returns the best individual found
+        """
+        if islands is None:
+            islands = list(range(self.num_islands))
+        progress: Any = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_runIsland,
+                args=(
+                    island,
+                    self.makeIsland,
+                    self.channel.endpoint(island),
+                    generations,
+                    self.migration_interval,
+                    self.num_migrants,
+                    self.seed,
+                    progress),
+                daemon=True)
+            for island in islands]
+        for process in processes:
+            process.start()
+        reported: dict[int, dict[int, float]] = {}
+        finals: dict[int, Migrant] = {}
+        while len(finals) < len(islands):
+            try:
+                message = progress.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p for p in processes if p.exitcode not in (None, 0)]
+                if len(dead) > 0:
+                    raise RuntimeError(
+                        "Island process exited with {}".format(
+                            dead[0].exitcode))
+                continue
+            if isinstance(message, IslandProgress):
+                generation = reported.setdefault(message.generation, {})
+                generation[message.island] = message.best_fitness
+                if len(generation) == len(islands):
+                    del reported[message.generation]
+                    if callback is not None:
+                        callback(message.generation, generation)
+            else:
+                island, best = message
+                finals[island] = best
+        for process in processes:
+            process.join()
+        return min(finals.values(), key=lambda m: m.fitness)
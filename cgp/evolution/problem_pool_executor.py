@@ -0,0 +1,37 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+from cgp.problems import ProblemBase
+
+# Set up once per worker process by _initWorker:
+_WORKER_PROBLEM: Optional[ProblemBase] = None
+
+
+def _initWorker(problem: ProblemBase) -> None:
+    global _WORKER_PROBLEM
+    _WORKER_PROBLEM = problem
+
+
+def _workerProblem() -> ProblemBase:
+    if _WORKER_PROBLEM is None:
+        raise ValueError("No problem installed in this process")
+    return _WORKER_PROBLEM
+
+
+class ProblemPoolExecutor(ProcessPoolExecutor):
+    """
+    ProcessPoolExecutor whose workers receive the problem once, in their
+    initializer. Evolution then only sends them genes, instead of pickling
+    the problem (datasets included) with every task.
+    """
+
+    def __init__(self,
+                 problem: ProblemBase,
+                 max_workers: Optional[int] = None,
+                 mp_context: Any = None) -> None:
+        super().__init__(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_initWorker,
+            initargs=(problem,))
+        self.problem = problem
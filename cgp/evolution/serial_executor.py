@@ -0,0 +1,23 @@
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, TypeVar
+
+T = TypeVar('T')
+
+
+class SerialExecutor(Executor):
+    """
+    Executor that runs every task straight away in the calling thread.
+    Lets Evolution use the same code path with no pool at all.
+    """
+
+    def submit(self,  # type: ignore[override]
+               fn: Callable[..., T],
+               /,
+               *args: Any,
+               **kwargs: Any) -> Future[T]:
+        future: Future[T] = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
@@ -1,14 +1,20 @@
 from .gene import Gene
 from .gene_builder import GeneBuilder, GeneBuilderConfig
+from .gene_compiler import GeneCompiler
+from .gene_mutator_base import GeneMutatorBase
 from .goldman_mutator import GoldmanMutator
 from .point_mutator import PointMutator, PointMutatorConfig
+from .population_evaluator import PopulationEvaluator
 from .op_sets import OpsetKey, OpSets
 
 __all__ = ['Gene',
            'GeneBuilder',
            'GeneBuilderConfig',
+           'GeneCompiler',
+           'GeneMutatorBase',
            'GoldmanMutator',
            'PointMutator',
            'PointMutatorConfig',
+           'PopulationEvaluator',
            'OpsetKey',
            'OpSets']
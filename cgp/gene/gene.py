@@ -1,64 +1,220 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
+import hashlib
+from typing import Optional
 
+from fastclasses_json import dataclass_json, JSONMixin
 import numpy as np
 import numpy.typing as npt
 
 from .op_sets import OpSets, OpsetKey
+from .scratch_pool import ScratchPool
 
+# Row count from which evaluate() writes into pooled buffers:
+BUFFERED_MIN_ROWS = 1024
 
-@dataclass(frozen=True)
-class Gene:
+
+def _encodeArray(array: npt.NDArray[np.int32]) -> list:
+    return array.tolist()  # type: ignore
+
+
+def _arrayField() -> object:
+    return field(metadata={'fastclasses_json': {
+        'encoder': _encodeArray,
+        'decoder': np.asarray}})
+
+
+@dataclass_json
+@dataclass(frozen=True, eq=False)
+class Gene(JSONMixin):
+    """
+    A CGP genome. Middle nodes are rows of (in1idx, in2idx, in3idx, op_id)
+    in a contiguous (N, 4) int32 array, outputs are an int32 array.
+    Lists are accepted and converted on construction.
+    """
     num_inputs: int
-    middlenodes: list[tuple[int, int, int, int]]
-    output_idxes: list[int]
+    middlenodes: npt.NDArray[np.int32] = _arrayField()  # type: ignore
+    output_idxes: npt.NDArray[np.int32] = _arrayField()  # type: ignore
     opset_key: OpsetKey
 
+    def __post_init__(self) -> None:
+        middlenodes = np.ascontiguousarray(self.middlenodes, dtype=np.int32)
+        object.__setattr__(self, 'middlenodes', middlenodes.reshape((-1, 4)))
+        object.__setattr__(self, 'output_idxes', np.ascontiguousarray(
+            self.output_idxes, dtype=np.int32))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Gene):
+            return NotImplemented
+        return (self.num_inputs == other.num_inputs and
+                self.opset_key == other.opset_key and
+                np.array_equal(self.middlenodes, other.middlenodes) and
+                np.array_equal(self.output_idxes, other.output_idxes))
+
+    @cached_property
+    def activeMask(self) -> list[bool]:
+        """
+        Returns, for every middle node, whether it is reachable from the
+        outputs through inputs its op actually reads
+        """
+        ops = OpSets.OPSET_DICT[self.opset_key]
+        usedInputs = OpSets.usedInputs(self.opset_key)
+        middlenodes = self.middlenodes.tolist()
+        active = [False] * len(middlenodes)
+        for idx in self.output_idxes.tolist():
+            if idx >= self.num_inputs:
+                active[idx - self.num_inputs] = True
+        # Nodes only reference lower addresses,
+        # so a single backwards sweep marks everything:
+        for nodeIdx in range(len(middlenodes) - 1, -1, -1):
+            if not active[nodeIdx]:
+                continue
+            in1idx, in2idx, in3idx, op_id = middlenodes[nodeIdx]
+            if op_id >= len(ops):
+                raise ValueError("Unknown operator: {}".format(op_id))
+            for inIdx, used in zip((in1idx, in2idx, in3idx),
+                                   usedInputs[op_id]):
+                if used and inIdx >= self.num_inputs:
+                    active[inIdx - self.num_inputs] = True
+        return active
+
+    @cached_property
+    def activeNodes(self) -> list[int]:
+        """
+        Returns the indexes of the active middle nodes,
+        in ascending (and therefore topological) order
+        """
+        return [idx for idx, isActive in enumerate(self.activeMask)
+                if isActive]
+
+    @cached_property
+    def evaluationPlan(self) -> list[tuple[int, int, int, int, int]]:
+        """
+        Returns (slot, in1idx, in2idx, in3idx, op_id) for every active node,
+        where slot is the node's address. Evaluating the steps in order
+        computes each active node exactly once. Inputs the op ignores
+        point at in1, which is always computed.
+        """
+        usedInputs = OpSets.usedInputs(self.opset_key)
+        activeNodes = self.middlenodes[self.activeNodes].tolist()
+        plan = []
+        for nodeIdx, middleNode in zip(self.activeNodes, activeNodes):
+            in1idx, in2idx, in3idx, op_id = middleNode
+            _, usesIn2, usesIn3 = usedInputs[op_id]
+            plan.append((
+                nodeIdx + self.num_inputs,
+                in1idx,
+                in2idx if usesIn2 else in1idx,
+                in3idx if usesIn3 else in1idx,
+                op_id))
+        return plan
+
+    @cached_property
+    def releasePlan(self) -> list[list[int]]:
+        """
+        Returns, for every step of the evaluation plan, the node addresses
+        whose results are not needed after that step
+        """
+        lastUse = {}
+        for step, (_, in1idx, in2idx, in3idx, _) in enumerate(
+                self.evaluationPlan):
+            for inIdx in (in1idx, in2idx, in3idx):
+                lastUse[inIdx] = step
+        outputs = set(self.output_idxes.tolist())
+        releases: list[list[int]] = [[] for _ in self.evaluationPlan]
+        for address, step in lastUse.items():
+            if address >= self.num_inputs and address not in outputs:
+                releases[step].append(address)
+        return releases
+
+    @cached_property
+    def phenotypeHash(self) -> str:
+        """
+        Returns a hash of the active subgraph only: inputs, ops and outputs.
+        Genes that differ only in inactive genes hash the same.
+        """
+        # Renumber the active nodes so inactive gaps don't matter:
+        addresses = {idx: idx for idx in range(self.num_inputs)}
+        canonical: list[object] = [self.num_inputs, self.opset_key.value]
+        usedInputs = OpSets.usedInputs(self.opset_key)
+        for slot, in1idx, in2idx, in3idx, op_id in self.evaluationPlan:
+            used = usedInputs[op_id]
+            canonical.append((
+                op_id,
+                addresses[in1idx],
+                addresses[in2idx] if used[1] else -1,
+                addresses[in3idx] if used[2] else -1))
+            addresses[slot] = len(addresses)
+        canonical.append(tuple(
+            addresses[idx] for idx in self.output_idxes.tolist()))
+        return hashlib.sha256(repr(canonical).encode()).hexdigest()
+
     def evaluate(
             self,
-            input: npt.NDArray[np.float64]
-            ) -> npt.NDArray[np.float64]:
+            input: npt.NDArray[np.float64],
+            dtype: npt.DTypeLike = np.float64
+            ) -> npt.NDArray[np.floating]:
+        """
+        Evaluates the gene over every row of input. Inputs, intermediates and
+        outputs are all kept in dtype (eg: np.float32 halves the memory
+        traffic, see PrecisionUtil for how far it drifts from float64).
+        """
         if input.ndim != 2 or input.shape[1] != self.num_inputs:
             raise ValueError(
                 "Expected shape of (X,{}), received {}".format(
                     self.num_inputs,
                     input.shape))
-        result = np.asarray([
-            self.evaluateNode(x, input) for x in self.output_idxes])
+        dtype = np.dtype(dtype)
+        input = input.astype(dtype, copy=False)
+        slots: dict[int, npt.NDArray[np.floating]] = {
+            idx: input[:, idx] for idx in range(self.num_inputs)}
+        # Small inputs are dominated by call overhead, not allocation.
+        # The kernels also keep to the buffers' dtype, which the ops don't:
+        buffered = (input.shape[0] >= BUFFERED_MIN_ROWS or
+                    dtype != np.float64)
+        pool = ScratchPool(input.shape[0], dtype)
+        scratch = pool.acquire() if buffered else None
+        for (slot, in1idx, in2idx, in3idx, op_id), releases in zip(
+                self.evaluationPlan, self.releasePlan):
+            slots[slot] = self.evaluateMiddleNode(
+                self.middlenodes[slot - self.num_inputs],
+                slots[in1idx],
+                slots[in2idx],
+                slots[in3idx],
+                pool.acquire() if buffered else None,
+                scratch)
+            if buffered:
+                for address in releases:
+                    pool.release(slots.pop(address))
+        result = np.asarray([slots[x] for x in self.output_idxes.tolist()])
         result = np.swapaxes(result, 0, 1)
         return result
 
-    def evaluateNode(
-            self,
-            nodeIdx: int,
-            input: npt.NDArray[np.float64]
-            ) -> npt.NDArray[np.float64]:
-        if nodeIdx < self.num_inputs:
-            return input[:, nodeIdx]
-        else:
-            nodeIdx = nodeIdx - self.num_inputs
-            middleNode = self.middlenodes[nodeIdx]
-            return self.evaluateMiddleNode(middleNode, input)
-
     def evaluateMiddleNode(
             self,
             middleNode: tuple[int, int, int, int],
-            input: npt.NDArray[np.float64]
+            in1: npt.NDArray[np.float64],
+            in2: npt.NDArray[np.float64],
+            in3: npt.NDArray[np.float64],
+            out: Optional[npt.NDArray[np.float64]] = None,
+            scratch: Optional[npt.NDArray[np.float64]] = None
             ) -> npt.NDArray[np.float64]:
-
-        in1idx, in2idx, in3idx, op_id = middleNode
-        in1 = self.evaluateNode(in1idx, input)
-        in2 = self.evaluateNode(in2idx, input)
-        in3 = self.evaluateNode(in3idx, input)
-        ops = OpSets.OPSET_DICT[self.opset_key]
-
-        if op_id > len(ops):
-            raise ValueError("Unknown operator: {}".format(op_id))
-
-        op = ops[op_id]
+        """
+        Returns the node's result, with NaNs replaced by 0.
+        Given out (and scratch), the op's buffered kernel writes into out
+        instead of allocating a new array.
+        """
+        op_id = middleNode[3]
         try:
-            result = op[1](in1, in2, in3)
-            result[np.isnan(result)] = 0
-            return result
+            if out is None:
+                op = OpSets.OPSET_DICT[self.opset_key][op_id]
+                result = op[1](in1, in2, in3)
+                result[np.isnan(result)] = 0
+                return result
+            kernel = OpSets.KERNEL_DICT[self.opset_key][op_id]
+            kernel(in1, in2, in3, out, scratch)
+            np.copyto(out, 0.0, where=np.isnan(out))
+            return out
         except FloatingPointError as e:
             # numpy runtime warning:
             # We're going to reraise, but also post additional info:
@@ -80,11 +236,12 @@ class Gene:
             in3 = self.nodeToHumanFormula(in3idx)
             ops = OpSets.OPSET_DICT[self.opset_key]
 
-            if op_id > len(ops):
+            if op_id >= len(ops):
                 raise ValueError("Unknown operator: {}".format(op_id))
 
             op = ops[op_id]
             return op[0](in1, in2, in3)
 
     def toHumanFormula(self) -> list[str]:
-        return [self.nodeToHumanFormula(idx) for idx in self.output_idxes]
+        return [self.nodeToHumanFormula(idx)
+                for idx in self.output_idxes.tolist()]
@@ -1,5 +1,8 @@
 from dataclasses import dataclass
 import random
+from typing import Optional
+
+import numpy as np
 
 from .gene import Gene
 from .op_sets import OpSets, OpsetKey
@@ -14,28 +17,30 @@ class GeneBuilderConfig:
 
 
 class GeneBuilder:
-    def __init__(self, config: GeneBuilderConfig) -> None:
+    def __init__(self,
+                 config: GeneBuilderConfig,
+                 rng: Optional[np.random.Generator] = None) -> None:
         self.config = config
+        if rng is None:
+            # Seeded from random, so random.seed() still reproduces runs:
+            rng = np.random.default_rng(random.getrandbits(64))
+        self.rng = rng
 
     def makeGene(self) -> Gene:
         num_inputs = self.config.num_inputs
-        middlenodes = [
-            self.makeMiddleNode(x) for x in range(self.config.num_middlenodes)]
-        output_idx_range = self.config.num_inputs + self.config.num_middlenodes
-        output_idxes = [
-            random.randrange(output_idx_range)
-            for x in range(self.config.num_outputs)]
+        num_middlenodes = self.config.num_middlenodes
+        ops = OpSets.OPSET_DICT[self.config.opset_key]
+        middlenodes = np.empty((num_middlenodes, 4), dtype=np.int32)
+        # Each node can connect to any input or earlier node:
+        maxIdx = num_inputs + np.arange(num_middlenodes)
+        middlenodes[:, :3] = self.rng.integers(
+            maxIdx[:, np.newaxis], size=(num_middlenodes, 3))
+        middlenodes[:, 3] = self.rng.integers(len(ops), size=num_middlenodes)
+        output_idx_range = num_inputs + num_middlenodes
+        output_idxes = self.rng.integers(
+            output_idx_range, size=self.config.num_outputs)
         return Gene(
             num_inputs,
             middlenodes,
             output_idxes,
             self.config.opset_key)
-
-    def makeMiddleNode(self, middleIdx: int) -> tuple[int, int, int, int]:
-        maxIdx = self.config.num_inputs + middleIdx
-        in1idx = random.randrange(maxIdx)
-        in2idx = random.randrange(maxIdx)
-        in3idx = random.randrange(maxIdx)
-        ops = OpSets.OPSET_DICT[self.config.opset_key]
-        op = random.randrange(len(ops))
-        return (in1idx, in2idx, in3idx, op)
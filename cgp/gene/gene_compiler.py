@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from .gene import Gene
+from .op_sets import OpSets
+
+CompiledGene = Callable[[npt.NDArray[np.float64]], npt.NDArray[np.floating]]
+
+
+class GeneCompiler:
+    """
+    Turns a gene's active graph into straight-line Python, one local per
+    active node, and compiles it once. Compiled functions are kept in an
+    LRU keyed by phenotype hash, so neutral variants share one function.
+    Results are identical to Gene.evaluate, in the same dtype: anything
+    but float64 goes through the ops' kernels, which keep to it.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._compiled: OrderedDict[
+            tuple[str, str], CompiledGene] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._compiled)
+
+    def evaluate(
+            self,
+            g: Gene,
+            input: npt.NDArray[np.float64],
+            dtype: npt.DTypeLike = np.float64
+            ) -> npt.NDArray[np.floating]:
+        if input.ndim != 2 or input.shape[1] != g.num_inputs:
+            raise ValueError(
+                "Expected shape of (X,{}), received {}".format(
+                    g.num_inputs,
+                    input.shape))
+        return self.compile(g, dtype)(input)
+
+    def compile(self,
+                g: Gene,
+                dtype: npt.DTypeLike = np.float64) -> CompiledGene:
+        dtype = np.dtype(dtype)
+        key = (g.phenotypeHash, dtype.str)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = GeneCompiler.build(g, dtype)
+            self._compiled[key] = compiled
+            while len(self._compiled) > self.max_size:
+                self._compiled.popitem(last=False)
+        else:
+            self._compiled.move_to_end(key)
+        return compiled
+
+    @staticmethod
+    def toSource(g: Gene, dtype: npt.DTypeLike = np.float64) -> str:
+        def name(idx: int) -> str:
+            if idx < g.num_inputs:
+                return "in{}".format(idx)
+            return "n{}".format(idx)
+
+        buffered = np.dtype(dtype) != np.float64
+        lines = ["def compiled(input):"]
+        if buffered:
+            lines.append("    input = input.astype(dtype, copy=False)")
+            lines.append("    scratch = empty(input.shape[0], dtype)")
+        for idx in range(g.num_inputs):
+            lines.append("    in{} = input[:, {}]".format(idx, idx))
+        for slot, in1idx, in2idx, in3idx, op_id in g.evaluationPlan:
+            if buffered:
+                lines.append("    {} = empty(input.shape[0], dtype)".format(
+                    name(slot)))
+                lines.append("    kernel{}({}, {}, {}, {}, scratch)".format(
+                    op_id, name(in1idx), name(in2idx), name(in3idx),
+                    name(slot)))
+                lines.append("    copyto({0}, 0.0, where=isnan({0}))".format(
+                    name(slot)))
+            else:
+                lines.append("    {} = op{}({}, {}, {})".format(
+                    name(slot), op_id,
+                    name(in1idx), name(in2idx), name(in3idx)))
+                lines.append("    {0}[isnan({0})] = 0".format(name(slot)))
+        outputs = ", ".join(name(idx) for idx in g.output_idxes.tolist())
+        lines.append(
+            "    return swapaxes(asarray([{}]), 0, 1)".format(outputs))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def build(g: Gene, dtype: npt.DTypeLike = np.float64) -> CompiledGene:
+        namespace = {
+            'asarray': np.asarray,
+            'copyto': np.copyto,
+            'dtype': np.dtype(dtype),
+            'empty': np.empty,
+            'isnan': np.isnan,
+            'swapaxes': np.swapaxes,
+        }
+        ops = OpSets.OPSET_DICT[g.opset_key]
+        for op_id, op in enumerate(ops):
+            namespace["op{}".format(op_id)] = op[1]
+        kernels = OpSets.KERNEL_DICT[g.opset_key]
+        for op_id, kernel in enumerate(kernels):
+            namespace["kernel{}".format(op_id)] = kernel
+        code = compile(GeneCompiler.toSource(g, dtype), "<gene>", "exec")
+        exec(code, namespace)
+        return namespace['compiled']  # type: ignore
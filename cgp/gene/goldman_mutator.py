@@ -5,57 +5,47 @@ from .op_sets import OpSets
 
 
 class GoldmanMutator(GeneMutatorBase):
+    """
+    Mutates single genes until one of the parent's active genes changes.
+    Edits landing on inactive genes are kept, but cost no evaluation:
+    the parent's active mask tells us straight away whether a locus is used.
+    """
 
     def mutateGene(self, g: Gene) -> Gene:
-        middlenodes = []
-        for idx, middlenode in enumerate(g.middlenodes):
-            in1idx, in2idx, in3idx, op = middlenode
-            middlenodes.append((in1idx, in2idx, in3idx, op))
-        new_gene = Gene(
-            g.num_inputs,
-            middlenodes,
-            g.output_idxes,
-            g.opset_key
-        )
+        middlenodes = g.middlenodes.copy()
+        output_idxes = g.output_idxes.copy()
+        activeMask = g.activeMask
+        ops = OpSets.OPSET_DICT[g.opset_key]
+        usedInputs = OpSets.usedInputs(g.opset_key)
+        output_idx_range = g.num_inputs + len(middlenodes)
 
-        # Mutate until something used changes (ie: the formula changes):
-        while g.toHumanFormula() == new_gene.toHumanFormula():
+        # Mutate until something used changes:
+        activeChanged = False
+        while not activeChanged:
             # Are we changing a middle node or output node:
             if random.random() < 0.8:
                 # Middle node
-                middlenodes = new_gene.middlenodes
                 idx = random.randrange(len(middlenodes))
                 maxIdx = g.num_inputs + idx
-                in1idx, in2idx, in3idx, op = middlenodes[idx]
-                ops = OpSets.OPSET_DICT[g.opset_key]
-
-                which_val = random.choices(['1', '2', '3', 'op'])
-                if which_val == '1':
-                    in1idx = random.randrange(maxIdx)
-                elif which_val == '2':
-                    in2idx = random.randrange(maxIdx)
-                elif which_val == '3':
-                    in3idx = random.randrange(maxIdx)
+                which_val = random.randrange(4)
+                if which_val == 3:
+                    new_val = random.randrange(len(ops))
+                    used = True
                 else:
-                    op = random.randrange(len(ops))
-                middlenodes[idx] = (in1idx, in2idx, in3idx, op)
-                new_gene = Gene(
-                    new_gene.num_inputs,
-                    middlenodes,
-                    new_gene.output_idxes,
-                    new_gene.opset_key
-                )
+                    new_val = random.randrange(maxIdx)
+                    used = usedInputs[middlenodes.item(idx, 3)][which_val]
+                activeChanged = (activeMask[idx] and used and
+                                 new_val != middlenodes.item(idx, which_val))
+                middlenodes[idx, which_val] = new_val
             else:
                 # Output node
-                output_idxes = new_gene.output_idxes
                 idx = random.randrange(len(output_idxes))
-                output_idx_range = new_gene.num_inputs + len(
-                    new_gene.middlenodes)
-                output_idxes[idx] = random.randrange(output_idx_range)
-                new_gene = Gene(
-                    new_gene.num_inputs,
-                    new_gene.middlenodes,
-                    output_idxes,
-                    new_gene.opset_key
-                )
-        return new_gene
+                new_val = random.randrange(output_idx_range)
+                activeChanged = new_val != output_idxes.item(idx)
+                output_idxes[idx] = new_val
+        return Gene(
+            g.num_inputs,
+            middlenodes,
+            output_idxes,
+            g.opset_key
+        )
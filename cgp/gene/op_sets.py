@@ -1,4 +1,5 @@
 from enum import Enum
+from functools import cache
 import math
 from typing import Callable
 
@@ -11,6 +12,176 @@ class OpsetKey(Enum):
     GPTP_II_OPSET_KEY = 'GPTP_II_OPSET_KEY'
 
 
+# Buffered kernels, one per op: kernel(in1, in2, in3, out, scratch)
+# writes the op's result into out, and may clobber scratch.
+# Inputs are never written, and only boolean masks are allocated.
+# Each kernel gives exactly the same values as the op's lambda.
+
+def _abs(in1, in2, in3, out, scratch):  # type: ignore
+    np.absolute(in1, out=out)
+
+
+def _sqrt(in1, in2, in3, out, scratch):  # type: ignore
+    np.absolute(in1, out=out)
+    np.sqrt(out, out=out)
+
+
+def _sqr(in1, in2, in3, out, scratch):  # type: ignore
+    np.power(in1, 2, out=out)
+
+
+def _cube(in1, in2, in3, out, scratch):  # type: ignore
+    np.power(in1, 3, out=out)
+
+
+def _maxExponent(dtype: np.dtype) -> float:
+    # Largest x (just about) for which exp(x) is still finite in this dtype:
+    limit = np.log(np.finfo(dtype).max).astype(dtype)
+    return float(np.nextafter(limit, dtype.type(0)))
+
+
+def _scaled_exp(in1, in2, in3, out, scratch):  # type: ignore
+    np.add(in1, 1, out=out)
+    if out.dtype != np.float64:
+        # Saturate rather than overflow to inf, as float64 would still
+        # have a (large) finite value. Leave room for the doubling below:
+        np.minimum(out, _maxExponent(out.dtype) - math.log(2.0), out=out)
+    np.exp(out, out=out)
+    np.multiply(out, 2, out=out)
+    np.subtract(out, math.pow(math.e, 2), out=out)
+    np.subtract(out, 1, out=out)
+    np.divide(out, math.pow(math.e, 2) - 1, out=out)
+
+
+def _sin(in1, in2, in3, out, scratch):  # type: ignore
+    np.sin(in1, out=out)
+
+
+def _cos(in1, in2, in3, out, scratch):  # type: ignore
+    np.cos(in1, out=out)
+
+
+def _tanh(in1, in2, in3, out, scratch):  # type: ignore
+    np.tanh(in1, out=out)
+
+
+def _inv(in1, in2, in3, out, scratch):  # type: ignore
+    np.multiply(in1, -1, out=out)
+
+
+def _step(in1, in2, in3, out, scratch):  # type: ignore
+    # 0 below zero, else 1 (including NaN):
+    np.less(in1, 0.0, out=out)
+    np.subtract(1.0, out, out=out)
+
+
+def _hyp(in1, in2, in3, out, scratch):  # type: ignore
+    np.power(in1, 2, out=out)
+    np.power(in2, 2, out=scratch)
+    np.add(out, scratch, out=out)
+    np.divide(out, 2.0, out=out)
+    np.sqrt(out, out=out)
+
+
+def _half_add(in1, in2, in3, out, scratch):  # type: ignore
+    np.add(in1, in2, out=out)
+    np.divide(out, 2.0, out=out)
+
+
+def _half_sub(in1, in2, in3, out, scratch):  # type: ignore
+    np.subtract(in1, in2, out=out)
+    np.divide(out, 2.0, out=out)
+
+
+def _mult(in1, in2, in3, out, scratch):  # type: ignore
+    np.multiply(in1, in2, out=out)
+
+
+def _max(in1, in2, in3, out, scratch):  # type: ignore
+    np.maximum(in1, in2, out=out)
+
+
+def _min(in1, in2, in3, out, scratch):  # type: ignore
+    np.minimum(in1, in2, out=out)
+
+
+def _and(in1, in2, in3, out, scratch):  # type: ignore
+    np.greater(in1, 0.0, out=out)
+    np.greater(in2, 0.0, out=scratch)
+    np.multiply(out, scratch, out=out)
+    # {0, 1} -> {-1, 1}:
+    np.multiply(out, 2.0, out=out)
+    np.subtract(out, 1.0, out=out)
+
+
+def _or(in1, in2, in3, out, scratch):  # type: ignore
+    np.greater(in1, 0.0, out=out)
+    np.greater(in2, 0.0, out=scratch)
+    np.maximum(out, scratch, out=out)
+    # {0, 1} -> {-1, 1}:
+    np.multiply(out, 2.0, out=out)
+    np.subtract(out, 1.0, out=out)
+
+
+def _rmux(in1, in2, in3, out, scratch):  # type: ignore
+    np.copyto(out, in2)
+    np.copyto(out, in1, where=in3 > 0.0)
+
+
+def _imult(in1, in2, in3, out, scratch):  # type: ignore
+    np.multiply(in1, in2, out=out)
+    np.multiply(out, -1, out=out)
+
+
+def _xor(in1, in2, in3, out, scratch):  # type: ignore
+    # Strictly the same sign gives -1, anything else (including NaN) 1:
+    np.sign(in1, out=out)
+    np.sign(in2, out=scratch)
+    np.multiply(out, scratch, out=out)
+    np.greater(out, 0.0, out=out)
+    np.multiply(out, -2.0, out=out)
+    np.add(out, 1.0, out=out)
+
+
+def _istep(in1, in2, in3, out, scratch):  # type: ignore
+    # 0 below one, else -1 (including NaN):
+    np.less(in1, 1.0, out=out)
+    np.subtract(out, 1.0, out=out)
+
+
+def _add(in1, in2, in3, out, scratch):  # type: ignore
+    np.add(in1, in2, out=out)
+
+
+def _sub(in1, in2, in3, out, scratch):  # type: ignore
+    np.subtract(in1, in2, out=out)
+
+
+def _safe_division(in1, in2, in3, out, scratch):  # type: ignore
+    np.copyto(out, in1)
+    np.divide(in1, in2, out=out, where=in2 != 0)
+
+
+def _safe_log(in1, in2, in3, out, scratch):  # type: ignore
+    np.absolute(in1, out=scratch)
+    out.fill(0.0)
+    np.log(scratch, out=out, where=in1 != 0)
+
+
+def _clamped_exp(in1, in2, in3, out, scratch):  # type: ignore
+    # exp(200) overflows float32, so narrower types clamp
+    # at the largest exponent they can hold:
+    limit = min(200.0, _maxExponent(out.dtype))
+    out.fill(0.0)
+    np.exp(in1, out=out, where=(in1 <= limit) & (in1 > -200))
+    np.add(out, math.exp(limit), out=out, where=in1 > limit)
+
+
+def _if(in1, in2, in3, out, scratch):  # type: ignore
+    np.copyto(out, in3)
+    np.copyto(out, in2, where=in1 > 0)
+
+
 class OpSets:
     OpName = Callable[
         [
@@ -27,11 +198,20 @@ class OpSets:
         ],
         npt.NDArray[np.float64]]
     NamedOp = tuple[OpName, OpFunction]
+    KernelFunction = Callable[
+        [
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64]
+        ],
+        None]
 
     _SAFE_DIVISION: NamedOp = (   # /
         lambda in1, in2, in3: "/({}, {})".format(in1, in2),
         lambda in1, in2, in3: np.divide(
-            in1, in2, out=in1, where=in2 != 0)
+            in1, in2, out=np.copy(in1), where=in2 != 0)
     )
     _SAFE_LOG: NamedOp = (   # log
         lambda in1, in2, in3: "log({})".format(in1),
@@ -181,3 +361,39 @@ class OpSets:
         OpsetKey.IMPROBED_2022_OPSET_KEY: _IMPROBED_2022,
         OpsetKey.GPTP_II_OPSET_KEY: _GPTP_II
     }
+
+    # Buffered versions of the ops above, index for index:
+    _IMPROBED_2022_KERNELS: list[KernelFunction] = [
+        _abs, _sqrt, _sqr, _cube, _scaled_exp, _sin, _cos, _tanh, _inv,
+        _step, _hyp, _half_add, _half_sub, _mult, _max, _min, _and, _or,
+        _rmux, _imult, _xor, _istep
+    ]
+    _GPTP_II_KERNELS: list[KernelFunction] = [
+        _add, _sub, _mult, _safe_division, _safe_log, _clamped_exp, _if
+    ]
+
+    KERNEL_DICT = {
+        OpsetKey.IMPROBED_2022_OPSET_KEY: _IMPROBED_2022_KERNELS,
+        OpsetKey.GPTP_II_OPSET_KEY: _GPTP_II_KERNELS
+    }
+
+    # How many of (in1, in2, in3) each op above reads, index for index.
+    # Ops always read a prefix of them:
+    _IMPROBED_2022_ARITIES: list[int] = [
+        1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 2, 2, 2, 3, 2, 2, 1
+    ]
+    _GPTP_II_ARITIES: list[int] = [2, 2, 2, 2, 1, 1, 3]
+
+    ARITY_DICT = {
+        OpsetKey.IMPROBED_2022_OPSET_KEY: _IMPROBED_2022_ARITIES,
+        OpsetKey.GPTP_II_OPSET_KEY: _GPTP_II_ARITIES
+    }
+
+    @staticmethod
+    @cache
+    def usedInputs(opset_key: OpsetKey) -> list[tuple[bool, bool, bool]]:
+        """
+        Returns which of (in1, in2, in3) each op in the set reads
+        """
+        return [(arity >= 1, arity >= 2, arity >= 3)
+                for arity in OpSets.ARITY_DICT[opset_key]]
@@ -1,5 +1,9 @@
 from dataclasses import dataclass
 import random
+from typing import Optional
+
+import numpy as np
+
 from .gene import Gene
 from .gene_mutator_base import GeneMutatorBase
 from .op_sets import OpSets
@@ -11,30 +15,29 @@ class PointMutatorConfig:
 
 
 class PointMutator(GeneMutatorBase):
-    def __init__(self, config: PointMutatorConfig) -> None:
+    def __init__(self,
+                 config: PointMutatorConfig,
+                 rng: Optional[np.random.Generator] = None) -> None:
         self.config = config
+        if rng is None:
+            # Seeded from random, so random.seed() still reproduces runs:
+            rng = np.random.default_rng(random.getrandbits(64))
+        self.rng = rng
 
     def mutateGene(self, g: Gene) -> Gene:
         num_inputs = g.num_inputs
-        middlenodes = []
         ops = OpSets.OPSET_DICT[g.opset_key]
-        for idx, middlenode in enumerate(g.middlenodes):
-            maxIdx = num_inputs + idx
-            in1idx, in2idx, in3idx, op = middlenode
-            if random.random() < self.config.mutation_rate:
-                in1idx = random.randrange(maxIdx)
-            if random.random() < self.config.mutation_rate:
-                in2idx = random.randrange(maxIdx)
-            if random.random() < self.config.mutation_rate:
-                in3idx = random.randrange(maxIdx)
-            if random.random() < self.config.mutation_rate:
-                op = random.randrange(len(ops))
-            middlenodes.append((in1idx, in2idx, in3idx, op))
-        output_idxes = []
-        for idx in g.output_idxes:
-            if random.random() < self.config.mutation_rate:
-                output_idx_range = num_inputs + len(middlenodes)
-                output_idxes.append(random.randrange(output_idx_range))
-            else:
-                output_idxes.append(idx)
+        rate = self.config.mutation_rate
+        # One draw decides every locus that mutates:
+        middlenodes = g.middlenodes.copy()
+        rows, cols = np.nonzero(
+            self.rng.random(middlenodes.shape) < rate)
+        # Inputs may point at any input or earlier node, ops at any op:
+        high = np.where(cols == 3, len(ops), num_inputs + rows)
+        middlenodes[rows, cols] = self.rng.integers(high)
+        output_idxes = g.output_idxes.copy()
+        mask = self.rng.random(output_idxes.shape) < rate
+        output_idx_range = num_inputs + len(middlenodes)
+        output_idxes[mask] = self.rng.integers(
+            output_idx_range, size=np.count_nonzero(mask))
         return Gene(num_inputs, middlenodes, output_idxes, g.opset_key)
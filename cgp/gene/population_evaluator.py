@@ -0,0 +1,82 @@
+import numpy as np
+import numpy.typing as npt
+
+from .gene import Gene
+from .op_sets import OpSets
+
+
+class PopulationEvaluator:
+    """
+    Evaluates a whole population of genes over one dataset at once.
+
+    Every active node of every gene gets a row in one value table.
+    Nodes are grouped by depth, then by op, so each op runs once per
+    depth on a stacked (nodes x rows) block rather than once per node.
+    """
+
+    @staticmethod
+    def evaluate(
+            genes: list[Gene],
+            input: npt.NDArray[np.float64],
+            dtype: npt.DTypeLike = np.float64
+            ) -> npt.NDArray[np.floating]:
+        """
+        Returns a (genes, rows, outputs) array, where result[i] matches
+        genes[i].evaluate(input). The value table is kept in dtype, like
+        Gene.evaluate's.
+        """
+        if len(genes) == 0:
+            raise ValueError("Expected at least one gene")
+        num_inputs = genes[0].num_inputs
+        opset_key = genes[0].opset_key
+        num_outputs = len(genes[0].output_idxes)
+        for g in genes:
+            if (g.num_inputs != num_inputs or
+                    g.opset_key != opset_key or
+                    len(g.output_idxes) != num_outputs):
+                raise ValueError(
+                    "All genes must share inputs, outputs and opset")
+        if input.ndim != 2 or input.shape[1] != num_inputs:
+            raise ValueError(
+                "Expected shape of (X,{}), received {}".format(
+                    num_inputs,
+                    input.shape))
+
+        # Give every active node a row in the table, and bucket the nodes
+        # by (depth, op). The inputs are shared, and sit at depth 0:
+        groups: dict[tuple[int, int], list[tuple[int, int, int, int]]] = {}
+        output_rows = []
+        num_rows = num_inputs
+        for g in genes:
+            rows = {idx: idx for idx in range(num_inputs)}
+            depths = {idx: 0 for idx in range(num_inputs)}
+            for slot, in1idx, in2idx, in3idx, op_id in g.evaluationPlan:
+                depth = 1 + max(
+                    depths[in1idx], depths[in2idx], depths[in3idx])
+                groups.setdefault((depth, op_id), []).append((
+                    num_rows, rows[in1idx], rows[in2idx], rows[in3idx]))
+                rows[slot] = num_rows
+                depths[slot] = depth
+                num_rows += 1
+            output_rows.append([rows[idx] for idx in g.output_idxes])
+
+        dtype = np.dtype(dtype)
+        table = np.empty((num_rows, input.shape[0]), dtype=dtype)
+        table[:num_inputs] = input.T
+        ops = OpSets.OPSET_DICT[opset_key]
+        kernels = OpSets.KERNEL_DICT[opset_key]
+        for depth, op_id in sorted(groups):
+            target, in1, in2, in3 = np.asarray(groups[(depth, op_id)]).T
+            if dtype == np.float64:
+                result = ops[op_id][1](table[in1], table[in2], table[in3])
+                result[np.isnan(result)] = 0
+            else:
+                # Only the kernels keep to (and saturate within) dtype,
+                # as in Gene.evaluate:
+                result = np.empty((len(target), table.shape[1]), dtype)
+                kernels[op_id](table[in1], table[in2], table[in3],
+                               result, np.empty_like(result))
+                np.copyto(result, 0.0, where=np.isnan(result))
+            table[target] = result
+        # (genes, outputs, rows) -> (genes, rows, outputs):
+        return np.swapaxes(table[np.asarray(output_rows)], 1, 2)
@@ -0,0 +1,25 @@
+import numpy as np
+import numpy.typing as npt
+
+
+class ScratchPool:
+    """
+    Hands out same-shaped buffers for node results, and takes them back
+    once no later node reads them, so an evaluation only allocates as many
+    buffers as it has results alive at once.
+    """
+
+    def __init__(self, length: int, dtype: npt.DTypeLike = np.float64) -> None:
+        self.length = length
+        self.dtype = dtype
+        self.allocated = 0
+        self._free: list[npt.NDArray[np.floating]] = []
+
+    def acquire(self) -> npt.NDArray[np.floating]:
+        if len(self._free) > 0:
+            return self._free.pop()
+        self.allocated += 1
+        return np.empty(self.length, dtype=self.dtype)
+
+    def release(self, buffer: npt.NDArray[np.floating]) -> None:
+        self._free.append(buffer)
@@ -1,6 +1,19 @@
 from .brain import Brain
 from .brain_builder import BrainBuilder
+from .brain_fitness import BrainFitness
+from .brain_genome import BrainGenome
+from .brain_island import BrainIsland
 from .brain_mutator import BrainMutator
+from .brain_state import BrainState
 from .config import Config
+from .evaluation_pool import EvaluationPool
+from .fitness_race import FitnessRace, RaceResult, RaceStats
+from .multi_ann import MultiANN
+from .redis_evaluation import RedisEvaluator, RedisQueue, RedisWorker
+from .steady_state_evolution import SteadyStateEvolution
 
-__all__ = ['Brain', 'BrainBuilder', 'BrainMutator', 'Config']
+__all__ = ['Brain', 'BrainBuilder', 'BrainFitness', 'BrainGenome',
+           'BrainIsland', 'BrainMutator', 'BrainState', 'Config',
+           'EvaluationPool', 'FitnessRace', 'MultiANN', 'RaceResult',
+           'RaceStats', 'RedisEvaluator', 'RedisQueue', 'RedisWorker',
+           'SteadyStateEvolution']
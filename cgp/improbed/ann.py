@@ -1,6 +1,22 @@
+from __future__ import annotations
 from dataclasses import dataclass
+from functools import cached_property
 
 import numpy as np
+import numpy.typing as npt
+
+
+@dataclass(frozen=True)
+class PruneReport:
+    nodesBefore: int
+    nodesAfter: int
+    edgesBefore: int
+    edgesAfter: int
+
+    def __str__(self) -> str:
+        return "nodes {} -> {}, edges {} -> {}".format(
+            self.nodesBefore, self.nodesAfter,
+            self.edgesBefore, self.edgesAfter)
 
 
 @dataclass
@@ -14,13 +30,178 @@ class ANN:
     outputAddresses: list[int]
     inputIdxes: list[int]
 
-    def forward(self, input):
-        result = np.asarray([
-            self.evaluateLayer(x, input) for x in self.outputAddresses])
-        result = np.swapaxes(result, 0, 1)
-        return result
+    @cached_property
+    def rowOf(self) -> dict[int, int]:
+        """
+        Maps an address to its row in forward()'s value table: inputs keep
+        their address, node idx goes to len(inputIdxes) + idx.
+        Like Gene's caches, this assumes the lists are not modified after
+        the first forward().
+        """
+        numInputs = len(self.inputIdxes)
+        rowOf = {address: address for address in range(numInputs)}
+        for idx in range(len(self.address)):
+            rowOf.setdefault(self.address[idx], numInputs + idx)
+        return rowOf
+
+    @cached_property
+    def schedule(self) -> list[tuple[
+            npt.NDArray[np.int64],
+            npt.NDArray[np.int64],
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64]]]:
+        """
+        Topological schedule of the nodes the outputs depend on, as
+        (rows, connectionRows, weights, bias) groups. A group holds nodes of
+        the same depth and the same number of connections, so it can be
+        evaluated as one gather + weighted sum + tanh.
+        """
+        numInputs = len(self.inputIdxes)
+        rowOf = self.rowOf
+        # Depth of every node the outputs need, without recursion:
+        depth: dict[int, int] = {}
+        for output in self.outputAddresses:
+            stack = [(output, False)]
+            onStack: set[int] = set()
+            while len(stack) > 0:
+                address, expanded = stack.pop()
+                if address < numInputs or address in depth:
+                    continue
+                if address not in rowOf:
+                    raise ValueError(
+                        "Unknown address: {}".format(address))
+                connections = self.connectionAddresses[
+                    rowOf[address] - numInputs]
+                if expanded:
+                    onStack.discard(address)
+                    depth[address] = 1 + max([
+                        depth.get(c, 0) for c in connections], default=0)
+                    continue
+                if address in onStack or address in connections:
+                    print("Address: {}".format(address))
+                    print("Connections: {}".format(connections))
+                    raise ValueError("Address in self.connections")
+                onStack.add(address)
+                stack.append((address, True))
+                stack += [(c, False) for c in connections]
+        groups: dict[tuple[int, int], list[int]] = {}
+        for address in depth:
+            idx = rowOf[address] - numInputs
+            key = (depth[address], len(self.connectionAddresses[idx]))
+            groups.setdefault(key, []).append(idx)
+        schedule = []
+        for key in sorted(groups):
+            idxes = groups[key]
+            schedule.append((
+                np.asarray([numInputs + idx for idx in idxes],
+                           dtype=np.int64),
+                np.asarray([[rowOf[c] for c in self.connectionAddresses[idx]]
+                            for idx in idxes],
+                           dtype=np.int64).reshape((len(idxes), key[1])),
+                np.asarray([self.weights[idx] for idx in idxes],
+                           dtype=np.float64).reshape((len(idxes), key[1])),
+                np.asarray([self.bias[idx] for idx in idxes],
+                           dtype=np.float64)))
+        return schedule
+
+    @cached_property
+    def inputRows(self) -> list[int]:
+        """
+        The unmasked inputs the schedule reads; the rest stay 0
+        """
+        used: set[int] = set()
+        for _, connectionRows, _, _ in self.schedule:
+            used.update(connectionRows.flatten().tolist())
+        return [
+            address for address in range(len(self.inputIdxes))
+            if address in used and self.inputIdxes[address] != -1]
+
+    def numEdges(self) -> int:
+        return sum(len(c) for c in self.connectionAddresses)
+
+    def numScheduled(self) -> tuple[int, int]:
+        """
+        The (nodes, edges) forward() actually evaluates
+        """
+        return (sum(len(rows) for rows, _, _, _ in self.schedule),
+                sum(connectionRows.size
+                    for _, connectionRows, _, _ in self.schedule))
+
+    def prune(self) -> tuple[ANN, PruneReport]:
+        """
+        Returns an equivalent, smaller ANN: nodes the outputs can't reach are
+        dropped, connections to masked (-1) inputs are dropped (they always
+        read 0), and repeated connections are merged into one with the
+        summed weight. Merging can change the last bits of the outputs.
+        """
+        numInputs = len(self.inputIdxes)
+        rowOf = self.rowOf
+        reachable: set[int] = set()
+        stack = list(self.outputAddresses)
+        while len(stack) > 0:
+            address = stack.pop()
+            if address < numInputs or address in reachable:
+                continue
+            reachable.add(address)
+            stack += self.connectionAddresses[rowOf[address] - numInputs]
+        connectionAddresses = []
+        weights = []
+        isOut = []
+        bias = []
+        address = []
+        for idx in range(len(self.address)):
+            if self.address[idx] not in reachable or (
+                    rowOf[self.address[idx]] != numInputs + idx):
+                continue
+            merged: dict[int, float] = {}
+            for c, w in zip(self.connectionAddresses[idx], self.weights[idx]):
+                if c < numInputs and self.inputIdxes[c] == -1:
+                    continue
+                merged[c] = merged.get(c, 0.0) + w
+            connectionAddresses.append(list(merged.keys()))
+            weights.append(list(merged.values()))
+            isOut.append(self.isOut[idx])
+            bias.append(self.bias[idx])
+            address.append(self.address[idx])
+        pruned = ANN(
+            connectionAddresses,
+            weights,
+            isOut,
+            bias,
+            address,
+            [len(c) for c in connectionAddresses],
+            self.outputAddresses,
+            self.inputIdxes)
+        report = PruneReport(
+            len(self.address), len(pruned.address),
+            self.numEdges(), pruned.numEdges())
+        return pruned, report
+
+    def forward(self, input, dtype: npt.DTypeLike = np.float64):
+        # Everything is kept in dtype, so np.float32 stays single precision:
+        dtype = np.dtype(dtype)
+        input = input.astype(dtype, copy=False)
+        numInputs = len(self.inputIdxes)
+        values = np.zeros(
+            (numInputs + len(self.address), len(input)), dtype=dtype)
+        for address in self.inputRows:
+            values[address] = input[:, self.inputIdxes[address]]
+        for rows, connectionRows, weights, bias in self.schedule:
+            # (nodes, connections, batch), summed over the connections in
+            # order, same as evaluateLayer's per node sum:
+            weighted = values[connectionRows] * weights.astype(
+                dtype, copy=False)[:, :, np.newaxis]
+            base = np.sum(weighted, axis=1)
+            values[rows] = np.tanh(
+                base + bias.astype(dtype, copy=False)[:, np.newaxis])
+        outputRows = [self.rowOf[address] for address in self.outputAddresses]
+        return np.swapaxes(values[outputRows], 0, 1)
 
     def evaluateLayer(self, address, input):
+        """
+        Recursive evaluation of one address, kept as the reference for
+        forward()'s schedule
+        """
         if address < len(self.inputIdxes):
             inputIdx = self.inputIdxes[address]
             if inputIdx == -1:
@@ -35,11 +216,12 @@ class ANN:
             print("Address: {}".format(address))
             print("Connections: {}".format(connections))
             raise ValueError("Address in self.connections")
-        weights = np.asarray(self.weights[idx]).reshape((1, -1))
+        weights = np.asarray(
+            self.weights[idx], dtype=input.dtype).reshape((1, -1))
         values = np.asarray([
             self.evaluateLayer(x, input) for x in connections])
         base_values_no_sum = values * weights.T
         base_value = np.sum(base_values_no_sum, axis=0)
-        result = base_value + self.bias[idx]
+        result = base_value + input.dtype.type(self.bias[idx])
         result = np.tanh(result)
         return result
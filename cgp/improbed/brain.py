@@ -6,13 +6,17 @@ import numpy as np
 import numpy.typing as npt
 
 from cgp.util import MathUtil
-from cgp.gene import Gene
+from cgp.gene import Gene, GeneCompiler
 from .ann import ANN
 from .config import Config
 from .dendrite import Dendrite
+from .multi_ann import MultiANN
 from .neuron import Neuron
 from .point2d import Point2d
 
+# Each process keeps its own cache of compiled programs:
+PROGRAM_COMPILER = GeneCompiler()
+
 
 @dataclass_json
 @dataclass(frozen=True)
@@ -53,18 +57,34 @@ class Brain(JSONMixin):
         avgPerformance = 0.0
         if len(fitnessesPrev) > 0:
             avgPerformance = sum(fitnessesPrev) / len(fitnessesPrev)
+        outputPerformances = [
+            fitnessesPrev[outputNeuron.out - 1]
+            if len(fitnessesPrev) > 0 else 0.0
+            for outputNeuron in outputNeurons]
+
+        # Dendrite program inputs only depend on the state before this step,
+        # so every dendrite of every neuron is run as one batch:
+        allNeurons = nonOutputNeurons + outputNeurons
+        performances = (
+            [avgPerformance] * len(nonOutputNeurons) + outputPerformances)
+        allDendrites = [
+            self.dendritesToRun(neuron, isPre) for neuron in allNeurons]
+        allDendriteOutputs = self.runDendritePrograms(
+            allNeurons, allDendrites, performances)
+        # As are the soma programs of the non-output neurons:
+        somaOutputs = self.runSomaPrograms(
+            nonOutputNeurons, [avgPerformance] * len(nonOutputNeurons))
 
-        for neuron in nonOutputNeurons:
-            health, positionX, positionY, bias = self.runSoma(
-                neuron,
-                isPre,
-                avgPerformance)
+        for i, neuron in enumerate(nonOutputNeurons):
+            health, positionX, positionY, bias = self.updateNeuron(
+                neuron, somaOutputs[i], isPre)
             updatedNeuron = self.runAllDendrites(neuron,
+                                                 allDendrites[i],
+                                                 allDendriteOutputs[i],
                                                  Point2d(positionX, positionY),
                                                  health,
                                                  bias,
-                                                 isPre,
-                                                 avgPerformance)
+                                                 isPre)
             if (updatedNeuron.health > death_threshold):
                 # Neuron survives
                 newNeurons.append(updatedNeuron)
@@ -76,18 +96,30 @@ class Brain(JSONMixin):
                 newNeurons.append(replicatedNeuron)
                 if len(newNeurons) >= max_non_output_neurons:
                     break
-        for outputNeuron in outputNeurons:
-            performance = 0.0
-            if len(fitnessesPrev) > 0:
-                performance = fitnessesPrev[outputNeuron.out - 1]
-            health, positionX, positionY, bias = self.runSoma(
-                neuron, isPre, performance)
+        # Output somas are driven by the last non-output neuron processed
+        # above (or, failing that, the last neuron), with the dendrites it
+        # had once its own dendrites were run:
+        if len(nonOutputNeurons) > 0:
+            somaNeuron = Neuron(neuron.health,
+                                neuron.position,
+                                neuron.bias,
+                                allDendrites[i],
+                                neuron.out)
+        else:
+            somaNeuron = self.neurons[-1]
+        outputSomaOutputs = self.runSomaPrograms(
+            [somaNeuron] * len(outputNeurons), outputPerformances)
+        for j, outputNeuron in enumerate(outputNeurons):
+            health, positionX, positionY, bias = self.updateNeuron(
+                somaNeuron, outputSomaOutputs[j], isPre)
+            k = len(nonOutputNeurons) + j
             updatedNeuron = self.runAllDendrites(outputNeuron,
+                                                 allDendrites[k],
+                                                 allDendriteOutputs[k],
                                                  Point2d(positionX, positionY),
                                                  health,
                                                  bias,
-                                                 isPre,
-                                                 performance)
+                                                 isPre)
             newNeurons.append(updatedNeuron)
         # Build the new brain:
         return Brain(
@@ -98,14 +130,82 @@ class Brain(JSONMixin):
             self.config
         )
 
-    def runSoma(self,
-                neuron: Neuron,
-                isPre: bool,
-                performance: float = 0.0) -> tuple[float, float, float, float]:
-        somaProgramInputs = neuron.programInputs(performance)
-        somaProgramOutputs = self.somaProgram.evaluate(somaProgramInputs)
-        updatedNeuron = self.updateNeuron(neuron, somaProgramOutputs[0], isPre)
-        return updatedNeuron
+    def runSomaPrograms(self,
+                        neurons: list[Neuron],
+                        performances: list[float]
+                        ) -> npt.NDArray[np.float64]:
+        """
+        Runs the soma program once over every neuron,
+        returning one row of outputs per neuron
+        """
+        if len(neurons) == 0:
+            return np.zeros((0, len(self.somaProgram.output_idxes)))
+        somaProgramInputs = np.concatenate([
+            neuron.programInputs(performance)
+            for neuron, performance in zip(neurons, performances)])
+        return self.evaluateProgram(self.somaProgram, somaProgramInputs)
+
+    def dendritesToRun(self, neuron: Neuron, isPre: bool) -> list[Dendrite]:
+        """
+        Returns the neuron's dendrites, plus a newborn one if the neuron
+        is healthy enough
+        """
+        birth_threshold = (
+            self.config.dendrite_health_birth_threshold_pre
+            if isPre
+            else self.config.dendrite_health_birth_threshold_while)
+        if neuron.health > birth_threshold:
+            return neuron.dendrites + [self.generateDendrite(neuron)]
+        return neuron.dendrites
+
+    def runDendritePrograms(self,
+                            neurons: list[Neuron],
+                            dendrites: list[list[Dendrite]],
+                            performances: list[float]
+                            ) -> list[npt.NDArray[np.float64]]:
+        """
+        Runs the dendrite program once over every dendrite of every neuron,
+        returning a block of output rows per neuron
+        """
+        counts = [len(neuronDendrites) for neuronDendrites in dendrites]
+        inputs = np.empty((sum(counts), 9))
+        row = 0
+        for neuron, neuronDendrites, performance in zip(
+                neurons, dendrites, performances):
+            block = inputs[row:row + len(neuronDendrites)]
+            block[:, 0] = neuron.health
+            block[:, 1] = neuron.position.x
+            block[:, 2] = neuron.position.y
+            block[:, 3] = neuron.bias
+            block[:, 4:8] = [
+                [dendrite.health,
+                 dendrite.weight,
+                 dendrite.position.x,
+                 dendrite.position.y]
+                for dendrite in neuronDendrites]
+            block[:, 8] = performance
+            row += len(neuronDendrites)
+        if len(inputs) == 0:
+            outputs = np.zeros((0, len(self.dendriteProgram.output_idxes)))
+        else:
+            outputs = self.evaluateProgram(self.dendriteProgram, inputs)
+        return np.split(outputs, np.cumsum(counts)[:-1])
+
+    def evaluateProgram(self,
+                        program: Gene,
+                        inputs: npt.NDArray[np.float64]
+                        ) -> npt.NDArray[np.float64]:
+        return Brain.runProgram(self.config, program, inputs)
+
+    @staticmethod
+    def runProgram(config: Config,
+                   program: Gene,
+                   inputs: npt.NDArray[np.float64],
+                   dtype: npt.DTypeLike = np.float64
+                   ) -> npt.NDArray[np.floating]:
+        if config.compile_programs:
+            return PROGRAM_COMPILER.evaluate(program, inputs, dtype)
+        return program.evaluate(inputs, dtype)
 
     def updateNeuron(self,
                      neuron: Neuron,
@@ -159,49 +259,32 @@ class Brain(JSONMixin):
 
     def runAllDendrites(self,
                         neuron: Neuron,
+                        dendrites: list[Dendrite],
+                        dendriteOutputs: npt.NDArray[np.float64],
                         newSomaPosition: Point2d,
                         newSomaHealth: float,
                         newSomaBias: float,
-                        isPre: bool,
-                        performance: float) -> Neuron:
-        # We're going to rearrange this slightly
-        # 1: Loop through all existing dendrites, and update:
+                        isPre: bool) -> Neuron:
+        # dendrites comes from dendritesToRun,
+        # and dendriteOutputs from runDendritePrograms
         new_dendrites = []
-        base_dendrites = neuron.dendrites
-        birth_threshold = (
-            self.config.dendrite_health_birth_threshold_pre
-            if isPre
-            else self.config.dendrite_health_birth_threshold_while)
         death_threshold = (
             self.config.dendrite_health_death_threshold_pre
             if isPre
             else self.config.dendrite_health_death_threshold_while)
 
-        if neuron.health > birth_threshold:
-            base_dendrites.append(self.generateDendrite(neuron))
-        for dendrite in base_dendrites:
-            inputs = []
-            inputs.append(neuron.health)
-            inputs.append(neuron.position.x)
-            inputs.append(neuron.position.y)
-            inputs.append(neuron.bias)
-            inputs.append(dendrite.health)
-            inputs.append(dendrite.weight)
-            inputs.append(dendrite.position.x)
-            inputs.append(dendrite.position.y)
-            inputs.append(performance)
-            dendrite_program_outputs = self.dendriteProgram.evaluate(
-                np.asarray(inputs).reshape((1, -1)))
+        for dendrite, dendrite_program_outputs in zip(dendrites,
+                                                      dendriteOutputs):
             updated_dendrite = self.runDendrite(neuron,
                                                 dendrite,
-                                                dendrite_program_outputs[0],
+                                                dendrite_program_outputs,
                                                 isPre)
             if (updated_dendrite.health > death_threshold):
                 new_dendrites.append(updated_dendrite)
                 if len(new_dendrites) >= self.config.max_num_dendrites:
                     break
         if len(new_dendrites) == 0:
-            new_dendrites.append(neuron.dendrites[0])
+            new_dendrites.append(dendrites[0])
         return Neuron(newSomaHealth,
                       newSomaPosition,
                       newSomaBias,
@@ -284,6 +367,14 @@ class Brain(JSONMixin):
         )
 
     def extractANN(self, problem: int) -> ANN:
+        return self.extractMultiANN().view(problem)
+
+    def extractMultiANN(self) -> MultiANN:
+        """
+        Extracts the phenotype for every problem at once. Only the output
+        addresses and input masks differ between problems, so the
+        connections are resolved a single time and shared.
+        """
         numberInputs = len(self.inputLocations)
         nonOutputNeur: list[Neuron] = []
         nonOutputNeuronAddress = []
@@ -295,7 +386,6 @@ class Brain(JSONMixin):
         phenotype_connection_addresses: list[list[int]] = []
         phenotype_weights: list[list[float]] = []
         phenotype_num_connection_address = []
-        phenotype_output_addresses = []
         for i in range(len(self.neurons)):
             address = i + numberInputs
             neuron = self.neurons[i]
@@ -305,78 +395,98 @@ class Brain(JSONMixin):
             else:
                 nonOutputNeur.append(neuron)
                 nonOutputNeuronAddress.append(address)
-        for i in range(len(nonOutputNeur)):
-            neuron = nonOutputNeur[i]
-            phenotype_isOut.append(0)
-            phenotype_bias.append(neuron.bias)
-            phenotype_address.append(nonOutputNeuronAddress[i])
-            phenotype_connection_addresses.append([])
-            phenotype_weights.append([])
-            # neuronPosition = nonOutputNeur[i].position
-            for j in range(len(neuron.dendrites)):
-                dendrite = neuron.dendrites[j]
-                dendPos = dendrite.position
-                # If it's x is > neuron x, reflect it:
-                if dendPos.x > neuron.position.x:
-                    delta = dendPos.x - neuron.position.x
-                    dendPos = Point2d(neuron.position.x - delta, dendPos.y)
-                addressClosest = self.getClosest(
-                    len(nonOutputNeur),
-                    nonOutputNeur,
-                    neuron.out,
-                    dendPos
-                )
-                phenotype_connection_addresses[i].append(addressClosest)
-                phenotype_weights[i].append(dendrite.weight)
-            phenotype_num_connection_address.append(len(neuron.dendrites))
-        # END for i in range(len(nonOutputNeur)):
-        for i in range(len(outputNeurons)):
-            il = i + len(nonOutputNeur)
-            neuron = outputNeurons[i]
+        # Resolve every dendrite of the brain in one batched query:
+        connectedNeurons = nonOutputNeur + outputNeurons
+        closest = self.closestAddresses(
+            nonOutputNeur,
+            [neuron.out for neuron in connectedNeurons],
+            connectedNeurons)
+        for i in range(len(connectedNeurons)):
+            neuron = connectedNeurons[i]
             phenotype_isOut.append(neuron.out)
             phenotype_bias.append(neuron.bias)
-            phenotype_address.append(outputNeuronAddress[i])
-            phenotype_connection_addresses.append([])
-            phenotype_weights.append([])
-            for j in range(len(neuron.dendrites)):
-                dendrite = neuron.dendrites[j]
-                dendPos = dendrite.position
-                # If it's x is > neuron x, reflect it:
-                if dendPos.x > neuron.position.x:
-                    delta = dendPos.x - neuron.position.x
-                    dendPos = Point2d(neuron.position.x - delta, dendPos.y)
-                addressClosest = self.getClosest(
-                    len(nonOutputNeur),
-                    nonOutputNeur,
-                    neuron.out,
-                    dendPos
-                )
-                phenotype_connection_addresses[il].append(addressClosest)
-                phenotype_weights[il].append(dendrite.weight)
+            phenotype_connection_addresses.append(closest[i])
+            phenotype_weights.append(
+                [dendrite.weight for dendrite in neuron.dendrites])
             phenotype_num_connection_address.append(len(neuron.dendrites))
-            if neuron.out == problem + 1:
-                phenotype_output_addresses.append(outputNeuronAddress[i])
-        # END for i in range(len(outputNeurons)):
-        # Figure out out input idxes:
-        phenotype_inputIdxes = []
-        for i in range(len(self.config.num_inputs)):
-            count = self.config.num_inputs[i]
-            if i == problem:
-                phenotype_inputIdxes += list(range(count))
-            else:
-                phenotype_inputIdxes += ([-1] * count)
-
-        return ANN(
-            phenotype_connection_addresses,
-            phenotype_weights,
-            phenotype_isOut,
-            phenotype_bias,
-            phenotype_address,
-            phenotype_num_connection_address,
+        phenotype_address += nonOutputNeuronAddress
+        phenotype_address += outputNeuronAddress
+        # Outputs of each problem, in neuron order:
+        numProblems = len(self.config.num_inputs)
+        phenotype_output_addresses: list[list[int]] = [
+            [] for _ in range(numProblems)]
+        for i in range(len(outputNeurons)):
+            problem = outputNeurons[i].out - 1
+            if problem < numProblems:
+                phenotype_output_addresses[problem].append(
+                    outputNeuronAddress[i])
+
+        return MultiANN(
+            ANN(
+                phenotype_connection_addresses,
+                phenotype_weights,
+                phenotype_isOut,
+                phenotype_bias,
+                phenotype_address,
+                phenotype_num_connection_address,
+                sum(phenotype_output_addresses, []),
+                list(range(sum(self.config.num_inputs)))
+            ),
             phenotype_output_addresses,
-            phenotype_inputIdxes
+            list(self.config.num_inputs)
         )
 
+    def closestAddresses(self,
+                         nonOutNeur: list[Neuron],
+                         isOut: list[int],
+                         neurons: list[Neuron]) -> list[list[int]]:
+        """
+        Batched getClosest for every dendrite of the given neurons.
+        Dendrites to the right of their neuron are reflected first, as in
+        extractANN. Returns one list of addresses per neuron.
+
+        Distances to all candidates (inputs, then non-output neurons)
+        come from one matrix; a candidate only counts if it is strictly
+        to the left and closer than 3.0. argmin picks the first minimum,
+        which is the same tie-breaking as getClosest's strict < scan.
+        """
+        counts = [len(neuron.dendrites) for neuron in neurons]
+        dendX = np.asarray([
+            d.position.x for n in neurons for d in n.dendrites],
+            dtype=np.float64)
+        dendY = np.asarray([
+            d.position.y for n in neurons for d in n.dendrites],
+            dtype=np.float64)
+        neuronX = np.repeat(
+            np.asarray([n.position.x for n in neurons], dtype=np.float64),
+            counts)
+        dendX = np.where(dendX > neuronX, neuronX - (dendX - neuronX), dendX)
+        dendIsOut = np.repeat(np.asarray(isOut, dtype=np.int64), counts)
+
+        candidates = self.inputLocations + [n.position for n in nonOutNeur]
+        numberInputs = len(self.inputLocations)
+        candX = np.asarray([c.x for c in candidates], dtype=np.float64)
+        candY = np.asarray([c.y for c in candidates], dtype=np.float64)
+        deltaX = candX[np.newaxis, :] - dendX[:, np.newaxis]
+        deltaY = candY[np.newaxis, :] - dendY[:, np.newaxis]
+        distance = np.sqrt(
+            np.power(deltaX, 2) + np.power(deltaY, 2))
+        usable = (candX[np.newaxis, :] < dendX[:, np.newaxis]) & (
+            distance < 3.0)
+        # Inputs are only candidates for non-output neurons:
+        usable[:, :numberInputs] &= (dendIsOut == 0)[:, np.newaxis]
+        distance = np.where(usable, distance, np.inf)
+        addresses = np.zeros(len(dendX), dtype=np.int64)
+        if len(candidates) > 0 and len(dendX) > 0:
+            best = np.argmin(distance, axis=1)
+            found = usable[np.arange(len(dendX)), best]
+            addresses[found] = best[found]
+        # Non-output neuron j sits at address j + numberInputs, and argmin
+        # already counts inputs first, so the column index is the address.
+        starts = np.concatenate(([0], np.cumsum(counts))).tolist()
+        flat = addresses.tolist()
+        return [flat[starts[i]:starts[i + 1]] for i in range(len(neurons))]
+
     def getClosest(self,
                    numNonOutNeur: int,
                    nonOutNeur: list[Neuron],
@@ -0,0 +1,115 @@
+import logging
+import math
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from cgp.problems import ProblemBase
+from .brain import Brain
+from .brain_state import BrainState
+from .config import Config
+from .multi_ann import MultiANN
+
+
+class BrainFitness:
+    @staticmethod
+    def measure(brain: Brain,
+                config: Config,
+                problems: list[ProblemBase],
+                trainingSets: Optional[list[tuple[
+                    npt.NDArray[np.float64],
+                    npt.NDArray[np.float64]]]] = None,
+                num_epochs: Optional[int] = None) -> float:
+        """
+        Develops the brain through the pre-epoch and epoch steps, measuring
+        its ANNs on every problem after each epoch. Returns the best
+        (lowest) mean tanh(fitness), stopping early once it stops improving.
+
+        trainingSets and num_epochs default to each problem's trainingSet()
+        and config.num_epochs.
+        """
+        if trainingSets is None:
+            trainingSets = [problem.trainingSet() for problem in problems]
+        if num_epochs is None:
+            num_epochs = config.num_epochs
+        state = BrainState.fromBrain(brain)
+        for e in range(config.num_steps_pre_epoch):
+            logging.debug("\tBrain#{} Pre epoch: {}".format(id(brain), e))
+            state = state.update(True)
+        tf_prev = 1000000000
+        fitnesses_prev: list[float] = []
+        for e in range(num_epochs):
+            logging.debug("\tBrain#{} Epoch: {}".format(id(brain), e))
+            for _ in range(config.num_steps_during_epoch):
+                state = state.update(False, fitnesses_prev)
+            newBrain = state.toBrain()
+            # One extraction and one forward pass covers every problem:
+            multiANN = newBrain.extractMultiANN()
+            if config.prune_anns:
+                multiANN, report = multiANN.prune()
+                logging.debug(
+                    "\t\tBrain#{} ANN {}".format(id(brain), report))
+            fitnesses = [
+                math.tanh(fitness) for fitness in BrainFitness.measureANNs(
+                    multiANN, problems, trainingSets,
+                    config.fitness_chunk_rows, config.ann_dtype)]
+            tf = sum(fitnesses) / len(fitnesses)
+            logging.debug("\t\tBrain#{} tf: {}".format(id(brain), tf))
+            if tf >= tf_prev:
+                logging.debug(
+                    "\tBrain#{} Bailing early, fitness did not improve".format(
+                        id(brain)))
+                return tf_prev
+            else:
+                tf_prev = tf
+                fitnesses_prev = fitnesses
+        return tf_prev
+
+    @staticmethod
+    def measureANNs(multiANN: MultiANN,
+                    problems: list[ProblemBase],
+                    trainingSets: list[tuple[
+                        npt.NDArray[np.float64],
+                        npt.NDArray[np.float64]]],
+                    chunk_rows: int = 0,
+                    dtype: npt.DTypeLike = np.float64) -> list[float]:
+        """
+        Returns each problem's measureFitness of the ANNs' outputs. With
+        chunk_rows, the rows go through in chunks (still all problems in
+        one forward pass per chunk) into each problem's fitnessAccumulator.
+        The ANNs run in dtype.
+        """
+        if chunk_rows <= 0:
+            actual_outs = multiANN.forward(
+                [training_in for training_in, _ in trainingSets], dtype)
+            return [
+                problem.measureFitness(expected_out, actual_out)
+                for problem, (_, expected_out), actual_out in zip(
+                    problems, trainingSets, actual_outs)]
+        accumulators = [problem.fitnessAccumulator() for problem in problems]
+        numRows = max(len(training_in) for training_in, _ in trainingSets)
+        for start in range(0, numRows, chunk_rows):
+            rows = slice(start, start + chunk_rows)
+            actual_outs = multiANN.forward(
+                [training_in[rows] for training_in, _ in trainingSets],
+                dtype)
+            for accumulator, (_, expected_out), actual_out in zip(
+                    accumulators, trainingSets, actual_outs):
+                accumulator.add(expected_out[rows], actual_out)
+        return [accumulator.result() for accumulator in accumulators]
+
+    @staticmethod
+    def measureCheap(brain: Brain,
+                     config: Config,
+                     problems: list[ProblemBase]) -> float:
+        """
+        measure() on config.racing_rows rows of each problem (stratified)
+        and only config.racing_epochs epochs
+        """
+        return BrainFitness.measure(
+            brain,
+            config,
+            problems,
+            [p.trainingSubset(config.racing_rows) for p in problems],
+            min(config.racing_epochs, config.num_epochs))
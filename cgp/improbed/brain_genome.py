@@ -0,0 +1,92 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import cached_property
+import hashlib
+import random
+
+from fastclasses_json import dataclass_json, JSONMixin
+
+from cgp.gene import Gene
+from .brain import Brain
+from .config import Config
+from .dendrite import Dendrite
+from .neuron import Neuron
+from .point2d import Point2d
+
+
+@dataclass_json
+@dataclass(frozen=True)
+class BrainGenome(JSONMixin):
+    """
+    Everything needed to rebuild a brain: its two programs, the config,
+    and the seed its initial neurons, dendrites and input locations are
+    drawn from. Much smaller to send around than the Brain itself, and
+    build() always gives the same brain.
+    """
+    somaProgram: Gene
+    dendriteProgram: Gene
+    seed: int
+    config: Config
+
+    @cached_property
+    def contentHash(self) -> str:
+        """
+        Hash of everything the fitness depends on: the active programs, the
+        seed of the initial state, and the config. Genomes with the same
+        hash develop into the same brain.
+        """
+        content = repr((
+            self.somaProgram.phenotypeHash,
+            self.dendriteProgram.phenotypeHash,
+            self.seed,
+            self.config))
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def build(self) -> Brain:
+        rng = random.Random(self.seed)
+        initial_neurons = []
+        for _ in range(self.config.initial_non_output_neurons):
+            initial_neurons.append(self.randomNeuron(rng, 0))
+
+        for i in range(len(self.config.num_outputs)):
+            num_out_problem_i = self.config.num_outputs[i]
+            for _ in range(num_out_problem_i):
+                # Has to be +1 as indexes start at 0
+                initial_neurons.append(self.randomNeuron(rng, i + 1))
+
+        input_locations = []
+        for input_count in self.config.num_inputs:
+            for _ in range(input_count):
+                # Make a random input point:
+                p = Point2d(
+                    rng.random() * -1.0,
+                    rng.random() * 2 - 1)
+                input_locations.append(p)
+
+        return Brain(
+            self.somaProgram,
+            self.dendriteProgram,
+            initial_neurons,
+            input_locations,
+            self.config
+        )
+
+    def randomNeuron(self, rng: random.Random, out: int) -> Neuron:
+        dendrites = []
+        for _ in range(self.config.initial_num_dendrites):
+            # Dendrites initialized with random
+            #   health, weight, and position
+            dendrite = Dendrite(
+                rng.random() * 2 - 1,
+                rng.random() * 2 - 1,
+                Point2d(rng.random(), rng.random())
+            )
+            dendrites.append(dendrite)
+        # Neurons are *initialized* with random values
+        return Neuron(
+            rng.random() * 2 - 1,
+            Point2d(rng.random() * 2 - 1, rng.random() * 2 - 1),
+            rng.random() * 2 - 1,
+            dendrites,
+            out
+        )
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import random
+from typing import Optional
+
+from cgp.evolution import Migrant
+from cgp.problems import ProblemBase
+from cgp.util import FitnessCache
+from .brain_builder import BrainBuilder
+from .brain_fitness import BrainFitness
+from .brain_genome import BrainGenome
+from .brain_mutator import BrainMutator
+from .config import Config
+from .fitness_race import FitnessRace, RaceStats
+
+
+class BrainIsland:
+    """
+    One (1+lambda) lineage of brain genomes, measured serially in the
+    calling process, for cgp.evolution.IslandModel: the islands are where
+    the parallelism comes from. Races offspring when Config.racing_rows
+    is set.
+    """
+
+    def __init__(self,
+                 config: Config,
+                 problems: list[ProblemBase],
+                 lamb: int = 5,
+                 cache: Optional[FitnessCache] = None) -> None:
+        self.config = config
+        self.problems = problems
+        self.lamb = lamb
+        self.builder = BrainBuilder(config)
+        self.mutator = BrainMutator(config)
+        if cache is None:
+            cache = FitnessCache(max_size=100 * (1 + lamb))
+        self.cache = cache
+        self.race_stats = RaceStats()
+        individuals = [self.builder.makeGenome() for _ in range(1 + lamb)]
+        fitnesses = [self.measure(g) for g in individuals]
+        bestIdx = fitnesses.index(min(fitnesses))
+        self.parent = individuals[bestIdx]
+        self.parent_fitness = fitnesses[bestIdx]
+
+    def measure(self, genome: BrainGenome) -> float:
+        fitness = self.cache.get(genome.contentHash)
+        if fitness is None:
+            fitness = BrainFitness.measure(
+                genome.build(), self.config, self.problems)
+            self.cache.put(genome.contentHash, fitness)
+        return fitness
+
+    def cheapFitness(self, genome: BrainGenome) -> float:
+        key = FitnessRace.cheapKey(genome.contentHash)
+        fitness = self.cache.get(key)
+        if fitness is None:
+            fitness = BrainFitness.measureCheap(
+                genome.build(), self.config, self.problems)
+            self.cache.put(key, fitness)
+        return fitness
+
+    def race(self, genome: BrainGenome, threshold: float) -> float:
+        """
+        Fitness to select on when racing, see FitnessRace
+        """
+        fitness = self.cache.get(genome.contentHash)
+        if fitness is not None:
+            return fitness
+        audit = random.random() < self.config.racing_audit_rate
+        result = FitnessRace.run(
+            genome.build(), self.problems, threshold, audit)
+        self.race_stats.record(result, self.parent_fitness)
+        self.cache.put(
+            FitnessRace.cheapKey(genome.contentHash), result.cheap_fitness)
+        if result.promoted or audit:
+            self.cache.put(genome.contentHash, result.full_fitness)
+        return result.fitness()
+
+    def step(self) -> tuple[BrainGenome, float]:
+        offspring = [
+            self.mutator.mutate_genome(self.parent) for _ in range(self.lamb)]
+        if self.config.racing_rows > 0:
+            threshold = self.cheapFitness(
+                self.parent) + self.config.racing_margin
+            fitnesses = [self.race(g, threshold) for g in offspring]
+        else:
+            fitnesses = [self.measure(g) for g in offspring]
+        bestIdx = fitnesses.index(min(fitnesses))
+        if fitnesses[bestIdx] <= self.parent_fitness:
+            self.parent = offspring[bestIdx]
+            self.parent_fitness = fitnesses[bestIdx]
+        return self.parent, self.parent_fitness
+
+    def migrants(self, count: int) -> list[Migrant]:
+        # A (1+lambda) island only has its parent to give:
+        return [Migrant(self.parent_fitness, self.parent)][:count]
+
+    def receive(self, migrants: list[Migrant]) -> None:
+        for migrant in migrants:
+            if migrant.fitness <= self.parent_fitness:
+                self.parent = migrant.individual
+                self.parent_fitness = migrant.fitness
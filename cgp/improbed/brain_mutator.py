@@ -1,11 +1,10 @@
 import random
+from typing import Optional
 
 from cgp.gene import GoldmanMutator
 from .brain import Brain
+from .brain_genome import BrainGenome
 from .config import Config
-from .dendrite import Dendrite
-from .neuron import Neuron
-from .point2d import Point2d
 
 
 class BrainMutator:
@@ -14,69 +13,23 @@ class BrainMutator:
         self.dendrite_mutator = GoldmanMutator()
         self.config = config
 
-    def mutate_brain(self, b: Brain) -> Brain:
-        soma_program = self.soma_mutator.mutateGene(b.somaProgram)
-        dendrite_program = self.dendrite_mutator.mutateGene(b.dendriteProgram)
-
-        initial_neurons = []
-        for _ in range(self.config.initial_non_output_neurons):
-            dendrites = []
-            for _ in range(self.config.initial_num_dendrites):
-                # Dendrites initialized with random
-                #   health, weight, and position
-                dendrite = Dendrite(
-                    random.random() * 2 - 1,
-                    random.random() * 2 - 1,
-                    Point2d(random.random(), random.random())
-                )
-                dendrites.append(dendrite)
-            # Neurons are *initialized* with random values
-            neuron = Neuron(
-                random.random() * 2 - 1,
-                Point2d(random.random() * 2 - 1, random.random() * 2 - 1),
-                random.random() * 2 - 1,
-                dendrites,
-                0
-            )
-            initial_neurons.append(neuron)
-
-        for i in range(len(self.config.num_outputs)):
-            num_out_problem_i = self.config.num_outputs[i]
-            for _ in range(num_out_problem_i):
-                dendrites = []
-                for _ in range(self.config.initial_num_dendrites):
-                    # Dendrites initialized with random
-                    #   health, weight, and position
-                    dendrite = Dendrite(
-                        random.random() * 2 - 1,
-                        random.random() * 2 - 1,
-                        Point2d(random.random(), random.random())
-                    )
-                    dendrites.append(dendrite)
-                # Neurons are *initialized* with random values
-                neuron = Neuron(
-                    random.random() * 2 - 1,
-                    Point2d(random.random() * 2 - 1, random.random() * 2 - 1),
-                    random.random() * 2 - 1,
-                    dendrites,
-                    i+1  # Has to be +1 as indexes start at 0
-                )
-                initial_neurons.append(neuron)
-
-        input_locations = []
-        for input_count in self.config.num_inputs:
-            for _ in range(input_count):
-                # Make a random input point:
-                p = Point2d(
-                    random.random() * -1.0,
-                    random.random() * 2 - 1)
-                input_locations.append(p)
-
-        brain = Brain(
-            soma_program,
-            dendrite_program,
-            initial_neurons,
-            input_locations,
+    def mutate_brain(self, b: Brain, seed: Optional[int] = None) -> Brain:
+        return self.mutate_genome(
+            BrainGenome(b.somaProgram, b.dendriteProgram, 0, self.config),
+            seed).build()
+
+    def mutate_genome(self,
+                      g: BrainGenome,
+                      seed: Optional[int] = None) -> BrainGenome:
+        """
+        Mutates both programs. Only the programs are inherited: the initial
+        state is drawn fresh from seed (a random one if not given).
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        return BrainGenome(
+            self.soma_mutator.mutateGene(g.somaProgram),
+            self.dendrite_mutator.mutateGene(g.dendriteProgram),
+            seed,
             self.config
         )
-        return brain
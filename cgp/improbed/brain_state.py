@@ -0,0 +1,423 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from cgp.gene import Gene
+from cgp.util import MathUtil
+from .brain import Brain
+from .config import Config
+from .dendrite import Dendrite
+from .neuron import Neuron
+from .point2d import Point2d
+
+
+@dataclass(frozen=True)
+class BrainState:
+    """
+    Struct-of-arrays form of a Brain: one array per neuron attribute, and
+    a flat dendrite table whose rows are grouped by owning neuron.
+
+    update() follows Brain.update exactly (same values, same order),
+    but does the soma/dendrite arithmetic with array operations instead of
+    building Neuron/Dendrite objects. Convert with fromBrain()/toBrain()
+    for JSON, ANN extraction or the visualizer.
+    """
+    somaProgram: Gene
+    dendriteProgram: Gene
+    inputLocations: list[Point2d]
+    config: Config
+
+    # One entry per neuron:
+    health: npt.NDArray[np.float64]
+    positionX: npt.NDArray[np.float64]
+    positionY: npt.NDArray[np.float64]
+    bias: npt.NDArray[np.float64]
+    out: npt.NDArray[np.int64]
+
+    # One entry per dendrite, grouped by owner in neuron order:
+    dendriteOwner: npt.NDArray[np.int64]
+    dendriteHealth: npt.NDArray[np.float64]
+    dendriteWeight: npt.NDArray[np.float64]
+    dendritePositionX: npt.NDArray[np.float64]
+    dendritePositionY: npt.NDArray[np.float64]
+
+    @staticmethod
+    def fromBrain(brain: Brain) -> BrainState:
+        neurons = brain.neurons
+        dendrites = [d for neuron in neurons for d in neuron.dendrites]
+        return BrainState(
+            brain.somaProgram,
+            brain.dendriteProgram,
+            brain.inputLocations,
+            brain.config,
+            np.asarray([n.health for n in neurons], dtype=np.float64),
+            np.asarray([n.position.x for n in neurons], dtype=np.float64),
+            np.asarray([n.position.y for n in neurons], dtype=np.float64),
+            np.asarray([n.bias for n in neurons], dtype=np.float64),
+            np.asarray([n.out for n in neurons], dtype=np.int64),
+            np.repeat(
+                np.arange(len(neurons)),
+                [len(n.dendrites) for n in neurons]),
+            np.asarray([d.health for d in dendrites], dtype=np.float64),
+            np.asarray([d.weight for d in dendrites], dtype=np.float64),
+            np.asarray([d.position.x for d in dendrites], dtype=np.float64),
+            np.asarray([d.position.y for d in dendrites], dtype=np.float64))
+
+    def toBrain(self) -> Brain:
+        dendriteHealth = self.dendriteHealth.tolist()
+        dendriteWeight = self.dendriteWeight.tolist()
+        dendritePositionX = self.dendritePositionX.tolist()
+        dendritePositionY = self.dendritePositionY.tolist()
+        starts = self.dendriteStarts().tolist()
+        neurons = []
+        for i, (health, x, y, bias, out) in enumerate(zip(
+                self.health.tolist(),
+                self.positionX.tolist(),
+                self.positionY.tolist(),
+                self.bias.tolist(),
+                self.out.tolist())):
+            dendrites = [
+                Dendrite(
+                    dendriteHealth[j],
+                    dendriteWeight[j],
+                    Point2d(dendritePositionX[j], dendritePositionY[j]))
+                for j in range(starts[i], starts[i + 1])]
+            neurons.append(Neuron(health, Point2d(x, y), bias, dendrites, out))
+        return Brain(
+            self.somaProgram,
+            self.dendriteProgram,
+            neurons,
+            self.inputLocations,
+            self.config)
+
+    def dendriteStarts(self) -> npt.NDArray[np.int64]:
+        """
+        Returns the first dendrite row of every neuron, plus a final entry
+        for the end of the table
+        """
+        counts = np.bincount(self.dendriteOwner, minlength=len(self.health))
+        return np.concatenate(([0], np.cumsum(counts)))
+
+    def update(self,
+               isPre: bool,
+               fitnessesPrev: list[float] = []) -> BrainState:
+        config = self.config
+        numNeurons = len(self.health)
+        nonOutput = np.flatnonzero(self.out == 0)
+        outputs = np.flatnonzero(self.out != 0)
+        max_non_output_neurons = config.max_num_neurons - len(outputs)
+
+        death_threshold = (
+            config.neuron_health_death_threshold_pre
+            if isPre
+            else config.neuron_health_death_threshold_while)
+        birth_threshold = (
+            config.neuron_health_birth_threshold_pre
+            if isPre
+            else config.neuron_health_birth_threshold_while)
+        dendrite_birth_threshold = (
+            config.dendrite_health_birth_threshold_pre
+            if isPre
+            else config.dendrite_health_birth_threshold_while)
+        dendrite_death_threshold = (
+            config.dendrite_health_death_threshold_pre
+            if isPre
+            else config.dendrite_health_death_threshold_while)
+
+        avgPerformance = 0.0
+        if len(fitnessesPrev) > 0:
+            avgPerformance = sum(fitnessesPrev) / len(fitnessesPrev)
+        outputPerformances = np.asarray([
+            fitnessesPrev[o - 1] if len(fitnessesPrev) > 0 else 0.0
+            for o in self.out[outputs].tolist()], dtype=np.float64)
+        performance = np.full(numNeurons, avgPerformance)
+        performance[outputs] = outputPerformances
+
+        # Healthy neurons grow a dendrite at the end of their list:
+        born = np.flatnonzero(self.health > dendrite_birth_threshold)
+        owner = np.concatenate((self.dendriteOwner, born))
+        order = np.argsort(owner, kind='stable')
+        owner = owner[order]
+        dHealth = np.concatenate((self.dendriteHealth, np.ones(len(born))))
+        dHealth = dHealth[order]
+        dWeight = np.concatenate((self.dendriteWeight, np.ones(len(born))))
+        dWeight = dWeight[order]
+        dX = np.concatenate(
+            (self.dendritePositionX, self.positionX[born] * 0.8))[order]
+        dY = np.concatenate(
+            (self.dendritePositionY, self.positionY[born] * 0.8))[order]
+        counts = np.bincount(owner, minlength=numNeurons)
+        starts = np.concatenate(([0], np.cumsum(counts)))
+
+        # Every dendrite program runs as one batch:
+        dendriteInputs = np.stack((
+            self.health[owner],
+            self.positionX[owner],
+            self.positionY[owner],
+            self.bias[owner],
+            dHealth,
+            dWeight,
+            dX,
+            dY,
+            performance[owner]), axis=1)
+        if len(owner) > 0:
+            dendriteOutputs = Brain.runProgram(
+                config, self.dendriteProgram, dendriteInputs)
+        else:
+            dendriteOutputs = np.zeros((0, 4))
+        newDHealth, newDWeight, newDX, newDY = self.runDendrites(
+            dHealth, dWeight, dX, dY, dendriteOutputs, isPre)
+        # Each neuron keeps its first max_num_dendrites live dendrites:
+        alive = newDHealth > dendrite_death_threshold
+        liveBefore = np.concatenate(([0], np.cumsum(alive)))
+        rank = liveBefore[1:] - liveBefore[starts[owner]]
+        kept = alive & (rank <= config.max_num_dendrites)
+
+        # Soma programs of the non-output neurons:
+        somaInputs = self.somaProgramInputs(
+            nonOutput, self.dendriteOwner, self.dendriteHealth,
+            self.dendriteWeight, self.dendritePositionX,
+            self.dendritePositionY, performance[nonOutput])
+        somaHealth, somaX, somaY, somaBias = self.runSomas(
+            nonOutput, nonOutput, somaInputs, isPre)
+
+        # Walk survivals and replications in order, up to the cap:
+        events = np.stack(
+            (somaHealth > death_threshold, somaHealth > birth_threshold),
+            axis=1).reshape(-1)
+        total = np.cumsum(events)
+        capped = np.flatnonzero(events & (total >= max_non_output_neurons))
+        if len(capped) > 0:
+            events[capped[0] + 1:] = False
+            lastProcessed = capped[0] // 2
+        else:
+            lastProcessed = len(nonOutput) - 1
+
+        # Output somas are driven by the last non-output neuron processed
+        # (or, failing that, the last neuron), with the dendrites it had
+        # once its own dendrites were run:
+        if len(nonOutput) > 0:
+            somaNeuron = nonOutput[lastProcessed]
+            somaDendrites = (
+                owner, dHealth, dWeight, dX, dY)
+        else:
+            somaNeuron = numNeurons - 1
+            somaDendrites = (
+                self.dendriteOwner, self.dendriteHealth,
+                self.dendriteWeight, self.dendritePositionX,
+                self.dendritePositionY)
+        somaNeurons = np.full(len(outputs), somaNeuron)
+        outputSomaInputs = self.somaProgramInputs(
+            somaNeurons, *somaDendrites, outputPerformances)
+        outHealth, outX, outY, outBias = self.runSomas(
+            somaNeurons, outputs, outputSomaInputs, isPre)
+
+        # Assemble the new neurons: survivors and replicas, then outputs
+        newHealth = []
+        newX = []
+        newY = []
+        newBias = []
+        newOut = []
+        newOwner = []
+        rows = []
+        events = events.reshape((-1, 2))
+        newDendriteCount = config.initial_num_dendrites
+        replicaRows = np.full(newDendriteCount, -1)
+
+        def addNeuron(neuronIdx: int,
+                      health: float, x: float, y: float, bias: float,
+                      dendriteRows: npt.NDArray[np.int64]) -> None:
+            newOwner.append(np.full(len(dendriteRows), len(newHealth)))
+            rows.append(dendriteRows)
+            newHealth.append(health)
+            newX.append(x)
+            newY.append(y)
+            newBias.append(bias)
+            newOut.append(self.out[neuronIdx])
+
+        def keptRows(neuronIdx: int) -> npt.NDArray[np.int64]:
+            start, end = starts[neuronIdx], starts[neuronIdx + 1]
+            neuronRows = start + np.flatnonzero(kept[start:end])
+            if len(neuronRows) == 0:
+                # Keep the first dendrite, as it was before this step:
+                return np.asarray([-2 - start])
+            return neuronRows
+
+        for i in range(lastProcessed + 1):
+            neuronIdx = nonOutput[i]
+            survives, replicates = events[i]
+            if survives:
+                addNeuron(neuronIdx, somaHealth[i], somaX[i], somaY[i],
+                          somaBias[i], keptRows(neuronIdx))
+            if replicates:
+                addNeuron(neuronIdx, 1.0, somaX[i], somaY[i], 0.0,
+                          replicaRows)
+        for j, neuronIdx in enumerate(outputs):
+            addNeuron(neuronIdx, outHealth[j], outX[j], outY[j],
+                      outBias[j], keptRows(neuronIdx))
+
+        # Gather the dendrite table: updated rows are >= 0,
+        # fresh replica dendrites are -1, un-updated rows are -2 - row
+        rowIdx = np.concatenate(rows) if len(rows) > 0 else np.zeros(0, int)
+        updated = rowIdx >= 0
+        stale = rowIdx <= -2
+        fresh = rowIdx == -1
+        tableHealth = np.empty(len(rowIdx))
+        tableWeight = np.empty(len(rowIdx))
+        tableX = np.empty(len(rowIdx))
+        tableY = np.empty(len(rowIdx))
+        for table, new, old, freshVal in (
+                (tableHealth, newDHealth, dHealth, 1.0),
+                (tableWeight, newDWeight, dWeight, 0.0),
+                (tableX, newDX, dX, 0.0),
+                (tableY, newDY, dY, 0.0)):
+            table[updated] = new[rowIdx[updated]]
+            table[stale] = old[-2 - rowIdx[stale]]
+            table[fresh] = freshVal
+
+        return BrainState(
+            self.somaProgram,
+            self.dendriteProgram,
+            self.inputLocations,
+            config,
+            np.asarray(newHealth, dtype=np.float64),
+            np.asarray(newX, dtype=np.float64),
+            np.asarray(newY, dtype=np.float64),
+            np.asarray(newBias, dtype=np.float64),
+            np.asarray(newOut, dtype=np.int64),
+            (np.concatenate(newOwner) if len(newOwner) > 0
+             else np.zeros(0, dtype=np.int64)),
+            tableHealth,
+            tableWeight,
+            tableX,
+            tableY)
+
+    def somaProgramInputs(self,
+                          neurons: npt.NDArray[np.int64],
+                          owner: npt.NDArray[np.int64],
+                          dendriteHealth: npt.NDArray[np.float64],
+                          dendriteWeight: npt.NDArray[np.float64],
+                          dendritePositionX: npt.NDArray[np.float64],
+                          dendritePositionY: npt.NDArray[np.float64],
+                          performance: npt.NDArray[np.float64]
+                          ) -> npt.NDArray[np.float64]:
+        """
+        Neuron.programInputs for each of neurons, averaging over the given
+        dendrite table
+        """
+        numNeurons = len(self.health)
+        # bincount sums in row order, exactly like Neuron's loops:
+        counts = np.bincount(owner, minlength=numNeurons)[neurons]
+
+        def average(vals: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+            totals = np.bincount(owner, weights=vals, minlength=numNeurons)
+            return totals[neurons] / counts
+
+        return np.stack((
+            self.health[neurons],
+            self.positionX[neurons],
+            self.positionY[neurons],
+            self.bias[neurons],
+            average(dendritePositionX),
+            average(dendritePositionY),
+            average(dendriteWeight),
+            average(dendriteHealth),
+            performance), axis=1)
+
+    def runSomas(self,
+                 parents: npt.NDArray[np.int64],
+                 neurons: npt.NDArray[np.int64],
+                 somaInputs: npt.NDArray[np.float64],
+                 isPre: bool
+                 ) -> tuple[npt.NDArray[np.float64], ...]:
+        """
+        Brain.updateNeuron for a batch: runs the soma program over
+        somaInputs, and applies the increments to the parents' values
+        """
+        config = self.config
+        if len(neurons) == 0:
+            empty = np.zeros(0)
+            return empty, empty, empty, empty
+        somaOutputs = Brain.runProgram(config, self.somaProgram, somaInputs)
+        health = somaOutputs[:, 0]
+        positionX = somaOutputs[:, 1]
+        positionY = somaOutputs[:, 2]
+        bias = somaOutputs[:, 3]
+        healthIncrement = (
+            config.soma_health_increment_pre
+            if isPre
+            else config.soma_health_increment_while)
+        positionXIncrement = (
+            config.soma_position_increment_pre
+            if isPre
+            else config.soma_position_increment_while)
+        positionYIncrement = positionXIncrement
+        biasIncrement = (
+            config.soma_bias_increment_pre
+            if isPre
+            else config.soma_bias_increment_while)
+
+        if (config.increment_option ==
+                Config.NeuralValueIncrement.SIGMOID):
+            healthSig = MathUtil.sigArray(health)
+            healthIncrement = healthIncrement * healthSig
+            positionXIncrement = (
+                positionXIncrement * MathUtil.sigArray(positionX))
+            positionYIncrement = (
+                positionYIncrement * MathUtil.sigArray(positionY))
+            biasIncrement = biasIncrement * healthSig
+
+        health = self.health[parents] + (
+            MathUtil.signArray(health) * healthIncrement)
+        positionX = self.positionX[parents] + (
+            MathUtil.signArray(positionX) * positionXIncrement)
+        positionY = self.positionY[parents] + (
+            MathUtil.signArray(positionY) * positionYIncrement)
+        bias = self.bias[parents] + MathUtil.signArray(bias) * biasIncrement
+        return (
+            MathUtil.clampArray(health, -1.0, 1.0),
+            MathUtil.clampArray(positionX, -1.0, 1.0),
+            MathUtil.clampArray(positionY, -1.0, 1.0),
+            MathUtil.clampArray(bias, -1.0, 1.0))
+
+    def runDendrites(self,
+                     health: npt.NDArray[np.float64],
+                     weight: npt.NDArray[np.float64],
+                     positionX: npt.NDArray[np.float64],
+                     positionY: npt.NDArray[np.float64],
+                     dendriteOutputs: npt.NDArray[np.float64],
+                     isPre: bool
+                     ) -> tuple[npt.NDArray[np.float64], ...]:
+        """
+        Brain.runDendrite for every dendrite at once
+        """
+        config = self.config
+        healthIncrement = (
+            config.dendrite_health_increment_pre
+            if isPre
+            else config.dendrite_health_increment_while)
+        weightIncrement = (
+            config.dendrite_weight_increment_pre
+            if isPre
+            else config.dendrite_weight_increment_while)
+        positionIncrement = (
+            config.dendrite_position_increment_pre
+            if isPre
+            else config.dendrite_position_increment_while)
+        if len(health) == 0:
+            return health, weight, positionX, positionY
+        health = health + (
+            MathUtil.signArray(dendriteOutputs[:, 0]) * healthIncrement)
+        weight = weight + (
+            MathUtil.signArray(dendriteOutputs[:, 1]) * weightIncrement)
+        positionX = positionX + (
+            MathUtil.signArray(dendriteOutputs[:, 2]) * positionIncrement)
+        positionY = positionY + (
+            MathUtil.signArray(dendriteOutputs[:, 3]) * positionIncrement)
+        return (
+            MathUtil.clampArray(health, -1.0, 1.0),
+            MathUtil.clampArray(weight, -1.0, 1.0),
+            MathUtil.clampArray(positionX, -1.0, 1.0),
+            MathUtil.clampArray(positionY, -1.0, 1.0))
@@ -72,3 +72,30 @@ class Config:
         SIGMOID = 'SIGMOID'
 
     increment_option: NeuralValueIncrement = NeuralValueIncrement.SIGMOID
+
+    # Run the soma/dendrite programs through GeneCompiler
+    # rather than the Gene.evaluate interpreter (same results):
+    compile_programs: bool = False
+
+    # Prune dead neurons and merge repeated connections of the extracted
+    # ANNs before evaluating them (can change the last bits of fitness):
+    prune_anns: bool = False
+
+    # Measure the ANNs on this many training rows at a time, so memory
+    # stays bounded for big datasets. 0 measures every row at once.
+    fitness_chunk_rows: int = 0
+
+    # Run the extracted ANNs in this dtype, eg: 'float32' halves the memory
+    # traffic. PrecisionUtil.compare tells how far that drifts from float64:
+    ann_dtype: str = 'float64'
+
+    # Racing: offspring are first measured on racing_rows rows of each
+    # problem for racing_epochs epochs, and only measured fully when that
+    # is within racing_margin of the parent's cheap fitness.
+    # 0 rows turns racing off.
+    racing_rows: int = 0
+    racing_epochs: int = 2
+    racing_margin: float = 0.1
+    # Fraction of rejected offspring measured fully anyway, to count how
+    # often the cheap pass gets the ranking wrong:
+    racing_audit_rate: float = 0.05
@@ -0,0 +1,250 @@
+from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import math
+import multiprocessing.util
+import threading
+from typing import Any, Callable, Hashable, Optional, Union
+
+from cgp.problems import ProblemBase, SharedArray
+from cgp.util import FitnessCache
+from .brain import Brain
+from .brain_fitness import BrainFitness
+from .brain_genome import BrainGenome
+from .fitness_race import FitnessRace, RaceResult
+from .config import Config
+
+# Genomes are much cheaper to send, workers build the brain themselves:
+Individual = Union[Brain, BrainGenome]
+
+# Set up once per worker process by _initWorker:
+_WORKER_CONFIG: Optional[Config] = None
+_WORKER_PROBLEMS: list[ProblemBase] = []
+
+
+def _initWorker(config: Config,
+                problemFactory: Callable[[], list[ProblemBase]]) -> None:
+    global _WORKER_CONFIG, _WORKER_PROBLEMS
+    _WORKER_CONFIG = config
+    _WORKER_PROBLEMS = problemFactory()
+    # Pool workers skip atexit, but run multiprocessing's finalizers:
+    multiprocessing.util.Finalize(None, _shutdownWorker, exitpriority=10)
+
+
+def _shutdownWorker() -> None:
+    # Drops the views of published datasets, so their mappings can close:
+    _WORKER_PROBLEMS.clear()
+    SharedArray.detachAll()
+
+
+def _evaluate(brain: Individual) -> float:
+    assert _WORKER_CONFIG is not None
+    if isinstance(brain, BrainGenome):
+        brain = brain.build()
+    return BrainFitness.measure(brain, _WORKER_CONFIG, _WORKER_PROBLEMS)
+
+
+def _cheapFitness(brain: Individual) -> float:
+    assert _WORKER_CONFIG is not None
+    if isinstance(brain, BrainGenome):
+        brain = brain.build()
+    return BrainFitness.measureCheap(brain, _WORKER_CONFIG, _WORKER_PROBLEMS)
+
+
+def _race(brain: Individual, threshold: float, audit: bool) -> RaceResult:
+    if isinstance(brain, BrainGenome):
+        brain = brain.build()
+    return FitnessRace.run(brain, _WORKER_PROBLEMS, threshold, audit)
+
+
+class EvaluationPool:
+    """
+    Long lived pool of worker processes measuring BrainFitness.
+
+    Workers start once and build their own problems by calling
+    problemFactory in their initializer, so a task only carries the brain
+    (or just its BrainGenome).
+    problemFactory must be picklable (eg: a module level function or a
+    problem class). To share one copy of the datasets between workers,
+    publish() the problems and pass functools.partial(list, problems).
+
+    If a worker dies, the pool is restarted and the lost tasks are
+    resubmitted, up to max_retries times per task.
+
+    With a cache, genome fitnesses are memoized by BrainGenome.contentHash,
+    so an unchanged parent costs nothing to measure again.
+    """
+
+    def __init__(self,
+                 config: Config,
+                 problemFactory: Callable[[], list[ProblemBase]],
+                 processes: Optional[int] = None,
+                 max_retries: int = 2,
+                 mp_context: Any = None,
+                 cache: Optional[FitnessCache] = None):
+        self.config = config
+        self.problemFactory = problemFactory
+        self.processes = processes
+        self.max_retries = max_retries
+        self.mp_context = mp_context
+        self.cache = cache
+        self._cacheLock = threading.Lock()
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = self._startExecutor()
+
+    def _startExecutor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self.mp_context,
+            initializer=_initWorker,
+            initargs=(self.config, self.problemFactory))
+
+    def submit(self, brain: Individual) -> Future[float]:
+        """
+        Returns a future for the brain's fitness
+        """
+        result: Future[float] = Future()
+        fitness = self._cached(brain)
+        if fitness is not None:
+            result.set_result(fitness)
+            return result
+        self._submit(_evaluate, (brain,), brain, result, 0)
+        return result
+
+    def submitCheapFitness(self, brain: Individual) -> Future[float]:
+        """
+        Future for BrainFitness.measureCheap of the brain, which (plus
+        Config.racing_margin) its offspring have to reach in a race
+        """
+        result: Future[float] = Future()
+        fitness = self._cached(brain, cheap=True)
+        if fitness is not None:
+            result.set_result(fitness)
+            return result
+        self._submit(_cheapFitness, (brain,), brain, result, 0)
+        return result
+
+    def submitRace(self,
+                   brain: Individual,
+                   threshold: float,
+                   audit: bool = False) -> Future[RaceResult]:
+        """
+        Future for FitnessRace.run on the brain. Brains with a cached
+        fitness skip the race.
+        """
+        result: Future[RaceResult] = Future()
+        fitness = self._cached(brain)
+        if fitness is not None:
+            result.set_result(RaceResult(math.nan, fitness, True))
+            return result
+        self._submit(_race, (brain, threshold, audit), brain, result, 0)
+        return result
+
+    def _cached(self,
+                brain: Individual,
+                cheap: bool = False) -> Optional[float]:
+        if self.cache is None or not isinstance(brain, BrainGenome):
+            return None
+        key: Hashable = brain.contentHash
+        if cheap:
+            key = FitnessRace.cheapKey(brain.contentHash)
+        with self._cacheLock:
+            return self.cache.get(key)
+
+    def _store(self, brain: Individual, task: Callable, value: Any) -> None:
+        if self.cache is None or not isinstance(brain, BrainGenome):
+            return
+        entries: list[tuple[Hashable, float]] = []
+        cheapKey = FitnessRace.cheapKey(brain.contentHash)
+        if task is _evaluate:
+            entries.append((brain.contentHash, value))
+        elif task is _race:
+            entries.append((brain.contentHash, value.full_fitness))
+            entries.append((cheapKey, value.cheap_fitness))
+        elif task is _cheapFitness:
+            entries.append((cheapKey, value))
+        with self._cacheLock:
+            for key, fitness in entries:
+                if not math.isnan(fitness):
+                    self.cache.put(key, fitness)
+
+    def evaluate(self, brains: list[Individual]) -> list[float]:
+        """
+        Fitnesses of every brain, in order
+        """
+        futures = [self.submit(brain) for brain in brains]
+        return [future.result() for future in futures]
+
+    def _submit(self,
+                task: Callable,
+                args: tuple,
+                brain: Individual,
+                result: Future,
+                attempt: int) -> None:
+        with self._lock:
+            if self._closed:
+                result.set_exception(RuntimeError("EvaluationPool is closed"))
+                return
+            executor = self._executor
+            try:
+                inner = executor.submit(task, *args)
+            except BrokenProcessPool:
+                executor = self._restart(executor)
+                inner = executor.submit(task, *args)
+        inner.add_done_callback(
+            lambda f: self._done(
+                f, task, args, brain, result, attempt, executor))
+
+    def _done(self,
+              inner: Future,
+              task: Callable,
+              args: tuple,
+              brain: Individual,
+              result: Future,
+              attempt: int,
+              executor: ProcessPoolExecutor) -> None:
+        if inner.cancelled():
+            result.cancel()
+            return
+        error = inner.exception()
+        if error is None:
+            # Cached before anyone waiting on the result can ask again:
+            self._store(brain, task, inner.result())
+            result.set_result(inner.result())
+        elif (isinstance(error, BrokenProcessPool)
+              and attempt < self.max_retries and not self._closed):
+            logging.warning(
+                "Evaluation worker died, retrying Brain#{}".format(id(brain)))
+            with self._lock:
+                self._restart(executor)
+            self._submit(task, args, brain, result, attempt + 1)
+        else:
+            result.set_exception(error)
+
+    def _restart(self,
+                 broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        # Called with the lock held. Every task of a broken pool fails at
+        # once, so only the first of them replaces the executor:
+        if self._executor is broken:
+            broken.shutdown(wait=False)
+            self._executor = self._startExecutor()
+            self.restarts += 1
+        return self._executor
+
+    def close(self) -> None:
+        """
+        Cancels pending tasks and stops the workers
+        """
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> EvaluationPool:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
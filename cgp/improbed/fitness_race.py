@@ -0,0 +1,93 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import math
+
+from cgp.problems import ProblemBase
+from .brain import Brain
+from .brain_fitness import BrainFitness
+
+
+@dataclass(frozen=True)
+class RaceResult:
+    cheap_fitness: float
+    # Full fitness, or nan if the cheap pass rejected the brain:
+    full_fitness: float
+    promoted: bool
+
+    def fitness(self) -> float:
+        """
+        The fitness to select on: rejected brains never beat anything
+        """
+        if self.promoted:
+            return self.full_fitness
+        return math.inf
+
+
+@dataclass
+class RaceStats:
+    promoted: int = 0
+    rejected: int = 0
+    # Rejected offspring that were measured fully anyway:
+    audited: int = 0
+    # Audited offspring whose full fitness would have beaten the parent:
+    misranked: int = 0
+    # Promoted offspring whose full fitness didn't beat the parent:
+    wasted: int = 0
+
+    def record(self, result: RaceResult, parent_fitness: float) -> None:
+        if result.promoted:
+            self.promoted += 1
+            if result.full_fitness > parent_fitness:
+                self.wasted += 1
+            return
+        self.rejected += 1
+        if not math.isnan(result.full_fitness):
+            self.audited += 1
+            if result.full_fitness <= parent_fitness:
+                self.misranked += 1
+
+    def misrankRate(self) -> float:
+        if self.audited == 0:
+            return 0.0
+        return self.misranked / self.audited
+
+    def __str__(self) -> str:
+        return ("promoted {} rejected {} audited {} misranked {} "
+                "({:.1%}) wasted {}").format(
+                    self.promoted, self.rejected, self.audited,
+                    self.misranked, self.misrankRate(), self.wasted)
+
+
+class FitnessRace:
+    @staticmethod
+    def cheapKey(contentHash: str) -> tuple[str, str]:
+        """
+        FitnessCache key for a genome's cheap fitness, next to its full one
+        """
+        return ('cheap', contentHash)
+
+    @staticmethod
+    def threshold(brain: Brain, problems: list[ProblemBase]) -> float:
+        """
+        The cheap fitness offspring of this parent have to reach
+        """
+        config = brain.config
+        return BrainFitness.measureCheap(
+            brain, config, problems) + config.racing_margin
+
+    @staticmethod
+    def run(brain: Brain,
+            problems: list[ProblemBase],
+            threshold: float,
+            audit: bool = False) -> RaceResult:
+        """
+        Measures the brain cheaply, and fully only if that reached the
+        threshold (or audit is set, to check the cheap pass)
+        """
+        config = brain.config
+        cheap = BrainFitness.measureCheap(brain, config, problems)
+        promoted = cheap <= threshold
+        full = math.nan
+        if promoted or audit:
+            full = BrainFitness.measure(brain, config, problems)
+        return RaceResult(cheap, full, promoted)
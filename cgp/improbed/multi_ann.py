@@ -0,0 +1,95 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .ann import ANN, PruneReport
+
+
+@dataclass
+class MultiANN:
+    """
+    The phenotype of a brain for every problem at once.
+
+    ann holds the shared connections, with every input column of every
+    problem and every problem's outputs. view() gives the usual
+    single-problem ANN, and forward() runs every problem through its own
+    view. After prune(), each problem keeps its own pruned view instead.
+    """
+    ann: ANN
+    # The output addresses of each problem
+    outputAddresses: list[list[int]]
+    # The number of inputs of each problem
+    numInputs: list[int]
+    # Set by prune(): the pruned ANN of each problem
+    prunedViews: Optional[list[ANN]] = None
+
+    def view(self, problem: int) -> ANN:
+        """
+        Returns the ANN for one problem. It shares its connection lists
+        with the other views, only the outputs and input mask are its own
+        (unless pruned, then it is the problem's own pruned ANN).
+        """
+        if self.prunedViews is not None:
+            return self.prunedViews[problem]
+        inputIdxes: list[int] = []
+        for i in range(len(self.numInputs)):
+            count = self.numInputs[i]
+            if i == problem:
+                inputIdxes += list(range(count))
+            else:
+                inputIdxes += ([-1] * count)
+        return ANN(
+            self.ann.connectionAddresses,
+            self.ann.weights,
+            self.ann.isOut,
+            self.ann.bias,
+            self.ann.address,
+            self.ann.numConnectionAddress,
+            self.outputAddresses[problem],
+            inputIdxes)
+
+    def prune(self) -> tuple[MultiANN, PruneReport]:
+        """
+        ANN.prune on every problem's view, so each drops the nodes its own
+        outputs don't need and its connections to the other problems'
+        (masked) inputs. The report sums, over the views, the nodes and
+        edges forward() evaluates before and after.
+        """
+        nodesBefore = edgesBefore = nodesAfter = edgesAfter = 0
+        prunedViews = []
+        for view in self.views:
+            pruned, _ = view.prune()
+            prunedViews.append(pruned)
+            nodes, edges = view.numScheduled()
+            nodesBefore += nodes
+            edgesBefore += edges
+            nodes, edges = pruned.numScheduled()
+            nodesAfter += nodes
+            edgesAfter += edges
+        return (
+            MultiANN(self.ann, self.outputAddresses, self.numInputs,
+                     prunedViews),
+            PruneReport(nodesBefore, nodesAfter, edgesBefore, edgesAfter))
+
+    @cached_property
+    def views(self) -> list[ANN]:
+        """
+        view() of every problem, kept so their schedules are only built once
+        """
+        return [self.view(p) for p in range(len(self.numInputs))]
+
+    def forward(self,
+                inputs: list[npt.NDArray[np.float64]],
+                dtype: npt.DTypeLike = np.float64
+                ) -> list[npt.NDArray[np.float64]]:
+        """
+        Same as view(p).forward(inputs[p]) for every problem p. Each
+        problem's rows only go through the neurons its own outputs depend
+        on, so no neuron runs on rows whose outputs get thrown away.
+        """
+        return [view.forward(input, dtype)
+                for view, input in zip(self.views, inputs)]
@@ -0,0 +1,290 @@
+from __future__ import annotations
+from concurrent.futures import Future
+import json
+import logging
+import threading
+import time
+from typing import Any, Optional, Union
+import uuid
+
+from cgp.problems import ProblemBase
+from cgp.util import FitnessCache
+from .brain import Brain
+from .brain_fitness import BrainFitness
+from .brain_genome import BrainGenome
+
+Individual = Union[Brain, BrainGenome]
+
+
+class RedisQueue:
+    """
+    Key names and task encoding shared by RedisEvaluator and RedisWorker.
+
+    Tasks are JSON payloads on the tasks list. A worker moves a payload to
+    the processing list while it works on it, and records a lease deadline
+    for it. Results go into the results hash, keyed by task id.
+    """
+
+    def __init__(self, prefix: str = 'improbed') -> None:
+        self.tasks = prefix + ':tasks'
+        self.processing = prefix + ':processing'
+        self.leases = prefix + ':leases'
+        self.results = prefix + ':results'
+
+    @staticmethod
+    def encodeTask(taskId: str, individual: Individual) -> str:
+        kind = 'genome' if isinstance(individual, BrainGenome) else 'brain'
+        return json.dumps({
+            'id': taskId,
+            'kind': kind,
+            'individual': individual.to_json()})
+
+    @staticmethod
+    def decodeTask(payload: Union[str, bytes]) -> tuple[str, Brain]:
+        task = json.loads(payload)
+        if task['kind'] == 'genome':
+            brain = BrainGenome.from_json(task['individual']).build()
+        else:
+            brain = Brain.from_json(task['individual'])
+        return task['id'], brain
+
+
+class RedisEvaluator:
+    """
+    Measures BrainFitness on RedisWorker processes, which can run on any
+    host that can reach the Redis server. Same interface as EvaluationPool:
+    submit() returns a future, evaluate() a list of fitnesses.
+
+    A background thread polls for results. It also puts back on the queue
+    any of our tasks whose worker let its lease run out (eg: the worker
+    died), so lost work gets picked up by another worker.
+
+    Results in the hash that no pending task of ours waits for get
+    deleted, so only one evaluator should use a prefix.
+
+    redis is a client with decode_responses (eg: redis.Redis or a stand-in
+    for tests). processes is how many tasks callers should keep in flight,
+    eg: the total number of workers.
+    """
+
+    def __init__(self,
+                 redis: Any,
+                 prefix: str = 'improbed',
+                 processes: Optional[int] = None,
+                 lease_seconds: float = 300.0,
+                 poll_interval: float = 0.05,
+                 cache: Optional[FitnessCache] = None) -> None:
+        self.redis = redis
+        self.queue = RedisQueue(prefix)
+        self.processes = processes
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.cache = cache
+        self.requeued = 0
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[Individual, Future[float]]] = {}
+        # When we first saw a task in processing without a lease:
+        self._unleased: dict[str, float] = {}
+        self._closed = threading.Event()
+        self._poller = threading.Thread(target=self._poll, daemon=True)
+        self._poller.start()
+
+    def submit(self, brain: Individual) -> Future[float]:
+        """
+        Returns a future for the brain's fitness
+        """
+        result: Future[float] = Future()
+        if self.cache is not None and isinstance(brain, BrainGenome):
+            with self._lock:
+                fitness = self.cache.get(brain.contentHash)
+            if fitness is not None:
+                result.set_result(fitness)
+                return result
+        if self._closed.is_set():
+            result.set_exception(RuntimeError("RedisEvaluator is closed"))
+            return result
+        taskId = uuid.uuid4().hex
+        with self._lock:
+            self._pending[taskId] = (brain, result)
+        self.redis.lpush(
+            self.queue.tasks, RedisQueue.encodeTask(taskId, brain))
+        return result
+
+    def evaluate(self, brains: list[Individual]) -> list[float]:
+        """
+        Fitnesses of every brain, in order
+        """
+        futures = [self.submit(brain) for brain in brains]
+        return [future.result() for future in futures]
+
+    def _poll(self) -> None:
+        while not self._closed.wait(self.poll_interval):
+            try:
+                self._collectResults()
+                self._requeueExpired()
+            except Exception:
+                logging.exception("Polling Redis for results failed")
+
+    def _collectResults(self) -> None:
+        with self._lock:
+            taskIds = list(self._pending.keys())
+        if len(taskIds) > 0:
+            results = self.redis.hmget(self.queue.results, taskIds)
+            for taskId, result in zip(taskIds, results):
+                if result is not None:
+                    self._complete(taskId, result)
+        # Results nobody waits for, eg: from the slow worker of a task
+        # that was requeued and finished elsewhere first:
+        for taskId in self.redis.hkeys(self.queue.results):
+            with self._lock:
+                stale = taskId not in self._pending
+            if stale:
+                self.redis.hdel(self.queue.results, taskId)
+
+    def _complete(self, taskId: str, result: str) -> None:
+        self.redis.hdel(self.queue.results, taskId)
+        self._unleased.pop(taskId, None)
+        with self._lock:
+            entry = self._pending.pop(taskId, None)
+        if entry is not None:
+            self._resolve(entry, json.loads(result))
+
+    def _resolve(self,
+                 entry: tuple[Individual, Future[float]],
+                 outcome: dict[str, Any]) -> None:
+        brain, future = entry
+        if 'error' in outcome:
+            future.set_exception(RuntimeError(outcome['error']))
+            return
+        fitness = outcome['fitness']
+        if self.cache is not None and isinstance(brain, BrainGenome):
+            with self._lock:
+                self.cache.put(brain.contentHash, fitness)
+        future.set_result(fitness)
+
+    def _requeueExpired(self) -> None:
+        now = time.time()
+        with self._lock:
+            finished = [t for t in self._unleased if t not in self._pending]
+        for taskId in finished:
+            del self._unleased[taskId]
+        for payload in self.redis.lrange(self.queue.processing, 0, -1):
+            taskId = json.loads(payload)['id']
+            with self._lock:
+                if taskId not in self._pending:
+                    continue
+            lease = self.redis.hget(self.queue.leases, taskId)
+            if lease is None:
+                # The worker may not have written its lease yet:
+                deadline = self._unleased.setdefault(
+                    taskId, now + self.lease_seconds)
+            else:
+                deadline = float(lease)
+            if now < deadline:
+                continue
+            self._unleased.pop(taskId, None)
+            # Only requeue it if no worker finished it meanwhile:
+            if self.redis.lrem(self.queue.processing, 1, payload) == 1:
+                self.redis.hdel(self.queue.leases, taskId)
+                # Onto the end workers pop from, so it runs next:
+                self.redis.rpush(self.queue.tasks, payload)
+                self.requeued += 1
+                logging.warning(
+                    "Lease of task {} ran out, requeued".format(taskId))
+
+    def close(self) -> None:
+        """
+        Stops polling, and cancels whatever is still pending
+        """
+        self._closed.set()
+        self._poller.join()
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+        for taskId, (brain, future) in pending:
+            self.redis.lrem(
+                self.queue.tasks, 1, RedisQueue.encodeTask(taskId, brain))
+            future.cancel()
+
+    def __enter__(self) -> RedisEvaluator:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class RedisWorker:
+    """
+    Pops tasks queued by a RedisEvaluator, measures them against its own
+    problems, and pushes back the fitness. Holds a lease on each task
+    while working on it, renewed every lease_seconds / 3 by a heartbeat
+    thread, so a slow brain is not requeued while it is still being
+    measured; only a dead worker's lease runs out.
+    """
+
+    def __init__(self,
+                 redis: Any,
+                 problems: list[ProblemBase],
+                 prefix: str = 'improbed',
+                 lease_seconds: float = 300.0) -> None:
+        self.redis = redis
+        self.problems = problems
+        self.queue = RedisQueue(prefix)
+        self.lease_seconds = lease_seconds
+        self.completed = 0
+
+    def runOnce(self, timeout: float = 1.0) -> bool:
+        """
+        Measures at most one task, waiting up to timeout seconds for one.
+        Returns whether there was one.
+        """
+        payload = self.redis.blmove(
+            self.queue.tasks, self.queue.processing, timeout,
+            'RIGHT', 'LEFT')
+        if payload is None:
+            return False
+        taskId = json.loads(payload)['id']
+        self._renewLease(taskId)
+        measured = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(taskId, measured), daemon=True)
+        heartbeat.start()
+        try:
+            _, brain = RedisQueue.decodeTask(payload)
+            outcome: dict[str, Any] = {
+                'fitness': BrainFitness.measure(
+                    brain, brain.config, self.problems)}
+        except Exception as e:
+            logging.exception("Task {} failed".format(taskId))
+            outcome = {'error': repr(e)}
+        finally:
+            measured.set()
+            heartbeat.join()
+        self.redis.hset(self.queue.results, taskId, json.dumps(outcome))
+        self.redis.lrem(self.queue.processing, 1, payload)
+        self.redis.hdel(self.queue.leases, taskId)
+        self.completed += 1
+        return True
+
+    def _renewLease(self, taskId: str) -> None:
+        self.redis.hset(
+            self.queue.leases, taskId, str(time.time() + self.lease_seconds))
+
+    def _heartbeat(self, taskId: str, measured: threading.Event) -> None:
+        while not measured.wait(self.lease_seconds / 3):
+            try:
+                self._renewLease(taskId)
+            except Exception:
+                logging.exception(
+                    "Renewing the lease of task {} failed".format(taskId))
+
+    def run(self,
+            max_tasks: Optional[int] = None,
+            stop: Optional[threading.Event] = None) -> None:
+        """
+        Works until max_tasks are done, or stop is set (forever by default)
+        """
+        while max_tasks is None or self.completed < max_tasks:
+            if stop is not None and stop.is_set():
+                return
+            self.runOnce()
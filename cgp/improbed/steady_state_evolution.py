@@ -0,0 +1,147 @@
+from __future__ import annotations
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+import logging
+import math
+import os
+import random
+from typing import Callable, Optional, Union
+
+from .brain_builder import BrainBuilder
+from .brain_genome import BrainGenome
+from .brain_mutator import BrainMutator
+from .evaluation_pool import EvaluationPool
+from .fitness_race import RaceResult, RaceStats
+from .redis_evaluation import RedisEvaluator
+
+# Called with (generation, parent, parent fitness):
+GenerationCallback = Callable[[int, BrainGenome, float], None]
+
+
+class SteadyStateEvolution:
+    """
+    Asynchronous (1+lambda): instead of waiting for a whole generation of
+    offspring, a new offspring of the current parent is submitted as soon
+    as any evaluation finishes, so every worker stays busy even though
+    brains bail out of development at very different times.
+
+    An offspring replaces the parent when its fitness is no worse (lower
+    is better), as soon as it arrives. Every lamb finished offspring count
+    as one generation, which is when the callback runs, so runs stay
+    comparable with the generational loop.
+
+    pool can be a local EvaluationPool or a RedisEvaluator.
+
+    With Config.racing_rows set (and an EvaluationPool), offspring race:
+    only those whose cheap fitness is close enough to the parent's get
+    measured fully, see FitnessRace. race_stats counts how that goes.
+    """
+
+    def __init__(self,
+                 pool: Union[EvaluationPool, RedisEvaluator],
+                 builder: BrainBuilder,
+                 mutator: BrainMutator,
+                 lamb: int = 5,
+                 max_in_flight: Optional[int] = None) -> None:
+        self.pool = pool
+        self.builder = builder
+        self.mutator = mutator
+        self.lamb = lamb
+        if max_in_flight is None:
+            max_in_flight = pool.processes or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight
+        self.race_stats = RaceStats()
+
+    def initialParent(self) -> tuple[BrainGenome, float]:
+        """
+        Best of 1+lamb random genomes
+        """
+        individuals = [self.builder.makeGenome() for _ in range(1 + self.lamb)]
+        fitnesses = self.pool.evaluate(individuals)
+        bestIdx = fitnesses.index(min(fitnesses))
+        return individuals[bestIdx], fitnesses[bestIdx]
+
+    def run(self,
+            generations: int,
+            callback: Optional[GenerationCallback] = None,
+            parent: Optional[BrainGenome] = None,
+            parent_fitness: Optional[float] = None
+            ) -> tuple[BrainGenome, float]:
+        """
+        Evaluates generations * lamb offspring, and returns the final
+        parent and its fitness
+        """
+        if parent is None:
+            parent, parent_fitness = self.initialParent()
+        elif parent_fitness is None:
+            parent_fitness = self.pool.submit(parent).result()
+        assert parent_fitness is not None
+        config = self.builder.config
+        racing = config.racing_rows > 0 and isinstance(
+            self.pool, EvaluationPool)
+        # Until the parent's cheap fitness arrives, offspring race against
+        # the previous parent's threshold (inf at first: no rejections).
+        # Waiting on it would stall the workers on every replacement:
+        threshold = math.inf
+        cheap_future: Optional[Future[float]] = None
+        if racing:
+            assert isinstance(self.pool, EvaluationPool)
+            cheap_future = self.pool.submitCheapFitness(parent)
+        budget = generations * self.lamb
+        submitted = 0
+        finished = 0
+        in_flight: dict[Future, BrainGenome] = {}
+        while finished < budget:
+            if cheap_future is not None and cheap_future.done():
+                threshold = cheap_future.result() + config.racing_margin
+                cheap_future = None
+            # Top up the workers with offspring of the current parent:
+            while len(in_flight) < self.max_in_flight and submitted < budget:
+                child = self.mutator.mutate_genome(parent)
+                future: Future
+                if racing:
+                    assert isinstance(self.pool, EvaluationPool)
+                    audit = random.random() < config.racing_audit_rate
+                    future = self.pool.submitRace(child, threshold, audit)
+                else:
+                    future = self.pool.submit(child)
+                in_flight[future] = child
+                submitted += 1
+            waiting: set[Future] = set(in_flight)
+            if cheap_future is not None:
+                waiting.add(cheap_future)
+            done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in in_flight:
+                    # The parent's cheap fitness, picked up at the top:
+                    continue
+                child = in_flight.pop(future)
+                result = future.result()
+                cheap_fitness = math.nan
+                if isinstance(result, RaceResult):
+                    self.race_stats.record(result, parent_fitness)
+                    fitness = result.fitness()
+                    cheap_fitness = result.cheap_fitness
+                else:
+                    fitness = result
+                finished += 1
+                if fitness <= parent_fitness:
+                    parent = child
+                    parent_fitness = fitness
+                    if racing and not math.isnan(cheap_fitness):
+                        # The race already measured it cheaply:
+                        threshold = cheap_fitness + config.racing_margin
+                        cheap_future = None
+                    elif racing:
+                        assert isinstance(self.pool, EvaluationPool)
+                        cheap_future = self.pool.submitCheapFitness(parent)
+                if finished % self.lamb == 0:
+                    generation = finished // self.lamb - 1
+                    logging.debug(
+                        "\tGeneration {} done, {} offspring in flight".format(
+                            generation, len(in_flight)))
+                    if racing:
+                        logging.debug("\t\tRacing: {}".format(
+                            self.race_stats))
+                    if callback is not None:
+                        callback(generation, parent, parent_fitness)
+        return parent, parent_fitness
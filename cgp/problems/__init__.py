@@ -1,3 +1,12 @@
+from .dataset_registry import DatasetRegistry
+from .fitness_accumulator import CollectingAccumulator, FitnessAccumulator
+from .fitness_accumulator import MeanAccumulator
 from .problem_base import ProblemBase
 from .glass_problem import GlassProblem
-from .iris_problem import IrisProblem
\ No newline at end of file
+from .iris_problem import IrisProblem
+from .row_chunks import RowChunks
+from .shared_array import SharedArray
+
+__all__ = ['CollectingAccumulator', 'DatasetRegistry', 'FitnessAccumulator',
+           'GlassProblem', 'IrisProblem', 'MeanAccumulator', 'ProblemBase',
+           'RowChunks', 'SharedArray']
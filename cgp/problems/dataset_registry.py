@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Callable, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+# Parses a source file into (inputs, class indexes):
+DatasetParser = Callable[[str], tuple[
+    npt.NDArray[np.float64], npt.NDArray[np.int64]]]
+
+
+@dataclass(frozen=True)
+class DatasetSource:
+    # Relative to DatasetRegistry.dataDir():
+    path: str
+    parse: DatasetParser
+
+
+class DatasetRegistry:
+    """
+    Loads the problems' datasets from a binary cache instead of parsing
+    their CSVs every time.
+
+    The first load of a dataset parses its source file once, normalizes it
+    if asked to, and saves contiguous float64 inputs and int64 outputs as
+    .npy files named after the source's sha256. Later loads (from any
+    process) memory-map those files. Editing the source changes its hash,
+    so the stale cache is simply not used.
+
+    The data directory is $CGP_DATA_DIR, or data/ next to the cgp package
+    (not the working directory). The cache goes in $CGP_CACHE_DIR, or
+    .cache/ inside the data directory.
+    """
+    _SOURCES: dict[str, DatasetSource] = {}
+    # (path, size, mtime) -> sha256, so a process only hashes a file once:
+    _HASHES: dict[tuple[str, int, int], str] = {}
+
+    @staticmethod
+    def register(name: str, path: str, parse: DatasetParser) -> None:
+        DatasetRegistry._SOURCES[name] = DatasetSource(path, parse)
+
+    @staticmethod
+    def dataDir() -> str:
+        dataDir = os.environ.get('CGP_DATA_DIR')
+        if dataDir is None:
+            packageDir = os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__)))
+            dataDir = os.path.join(os.path.dirname(packageDir), 'data')
+        return dataDir
+
+    @staticmethod
+    def cacheDir() -> str:
+        cacheDir = os.environ.get('CGP_CACHE_DIR')
+        if cacheDir is None:
+            cacheDir = os.path.join(DatasetRegistry.dataDir(), '.cache')
+        return cacheDir
+
+    @staticmethod
+    def sourceHash(path: str) -> str:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        sourceHash: Optional[str] = DatasetRegistry._HASHES.get(key)
+        if sourceHash is None:
+            with open(path, 'rb') as f:
+                sourceHash = hashlib.sha256(f.read()).hexdigest()
+            DatasetRegistry._HASHES[key] = sourceHash
+        return sourceHash
+
+    @staticmethod
+    def load(name: str,
+             normalizeInputs: bool = False) -> tuple[
+            npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+        """
+        Returns the read-only (inputs, outputs) of a registered dataset,
+        in the source's row order. normalizeInputs divides every input
+        column by its max (or 0, whichever is bigger). If the cache can't
+        be written (eg: a read-only data directory), the parsed arrays are
+        returned uncached.
+        """
+        if name not in DatasetRegistry._SOURCES:
+            raise ValueError("Unknown dataset: {}".format(name))
+        source = DatasetRegistry._SOURCES[name]
+        path = os.path.join(DatasetRegistry.dataDir(), source.path)
+        prefix = os.path.join(DatasetRegistry.cacheDir(), '{}-{}{}'.format(
+            name,
+            DatasetRegistry.sourceHash(path)[:16],
+            '-normalized' if normalizeInputs else ''))
+        inputsPath = prefix + '-inputs.npy'
+        outputsPath = prefix + '-outputs.npy'
+        if not (os.path.exists(inputsPath) and os.path.exists(outputsPath)):
+            inputs, outputs = source.parse(path)
+            inputs = np.ascontiguousarray(inputs, dtype=np.float64)
+            if normalizeInputs:
+                inputs = inputs / np.maximum(np.max(inputs, axis=0), 0.0)
+            outputs = np.ascontiguousarray(outputs, dtype=np.int64)
+            try:
+                DatasetRegistry._save(outputsPath, outputs)
+                DatasetRegistry._save(inputsPath, inputs)
+            except OSError as e:
+                logging.warning(
+                    "Could not cache dataset {}: {}".format(name, e))
+                # Read-only, like the memory-mapped cache:
+                inputs.flags.writeable = False
+                outputs.flags.writeable = False
+                return inputs, outputs
+        return (np.load(inputsPath, mmap_mode='r'),
+                np.load(outputsPath, mmap_mode='r'))
+
+    @staticmethod
+    def _save(path: str, array: npt.NDArray) -> None:
+        # Written aside and renamed, so concurrent loaders never see a
+        # partial file:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix='.npy')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmpPath, path)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
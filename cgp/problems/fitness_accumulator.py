@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+
+class FitnessAccumulator(ABC):
+    """
+    Folds the outputs of a dataset into a fitness, one chunk of rows at a
+    time. Get a fresh one from ProblemBase.fitnessAccumulator() for every
+    individual measured.
+    """
+
+    @abstractmethod
+    def add(self,
+            expected_output: npt.NDArray[np.float64],
+            actual_output: npt.NDArray[np.float64]) -> None:
+        pass
+
+    @abstractmethod
+    def result(self) -> float:
+        pass
+
+
+class MeanAccumulator(FitnessAccumulator):
+    """
+    For fitnesses that are the mean of a per row term (eg: cross-entropy):
+    only keeps a running sum and count. Matches the mean over the whole
+    dataset up to the order of the additions.
+    """
+
+    def __init__(self,
+                 terms: Callable[[npt.NDArray[np.float64],
+                                  npt.NDArray[np.float64]],
+                                 npt.NDArray[np.float64]]) -> None:
+        self.terms = terms
+        self.total = 0.0
+        self.count = 0
+
+    def add(self,
+            expected_output: npt.NDArray[np.float64],
+            actual_output: npt.NDArray[np.float64]) -> None:
+        if len(actual_output) == 0:
+            return
+        self.total += float(np.sum(
+            self.terms(expected_output, actual_output), dtype=np.float64))
+        self.count += len(actual_output)
+
+    def result(self) -> float:
+        if self.count == 0:
+            raise ValueError("No rows were added")
+        return self.total / self.count
+
+
+class CollectingAccumulator(FitnessAccumulator):
+    """
+    For fitnesses that need every row at once: keeps the outputs (rows x
+    outputs, not the intermediates that made them) and measures them at
+    the end.
+    """
+
+    def __init__(self,
+                 measureFitness: Callable[[npt.NDArray[np.float64],
+                                           npt.NDArray[np.float64]],
+                                          float]) -> None:
+        self.measureFitness = measureFitness
+        self.expected_outputs: list[npt.NDArray[np.float64]] = []
+        self.actual_outputs: list[npt.NDArray[np.float64]] = []
+
+    def add(self,
+            expected_output: npt.NDArray[np.float64],
+            actual_output: npt.NDArray[np.float64]) -> None:
+        self.expected_outputs.append(np.asarray(expected_output))
+        self.actual_outputs.append(actual_output)
+
+    def result(self) -> float:
+        if len(self.actual_outputs) == 0:
+            raise ValueError("No rows were added")
+        return self.measureFitness(
+            np.concatenate(self.expected_outputs),
+            np.concatenate(self.actual_outputs))
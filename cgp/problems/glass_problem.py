@@ -4,6 +4,7 @@ import random
 import numpy as np
 import numpy.typing as npt
 
+from .dataset_registry import DatasetRegistry
 from .problem_base import ProblemBase
 
 
@@ -15,48 +16,36 @@ class GlassProblem(ProblemBase):
 
     def __init__(self, normalizeInputs: bool = False) -> None:
         super().__init__()
-        self._data = []
-        # Load the dataset:
-        with open('data/uci_glass/glass.data', newline='') as csvfile:
+        self.normalizeInputs = normalizeInputs
+        # The order is drawn now, but the data only loads on first use:
+        self._shuffle_seed = random.getrandbits(32)
+
+    @staticmethod
+    def parse(path: str) -> tuple[
+            npt.NDArray[np.float64],
+            npt.NDArray[np.int64]]:
+        inputs = []
+        outputs = []
+        with open(path, newline='') as csvfile:
             csvreader = csv.reader(csvfile, delimiter=',', quotechar='|')
             for row in csvreader:
                 if len(row) == 11:
-                    input = [float(i) for i in row[1:10]]
+                    inputs.append([float(i) for i in row[1:10]])
                     # Have to subtract one as classes start at 1,
                     # and our indexes start at 0
-                    output = int(row[10]) - 1
-                    data_item = (input, output)
-                    self._data.append(data_item)
-
-        # Need to normalize:
-        if normalizeInputs:
-            max_input = [0.0] * 9
-            for i, o in self._data:
-                for idx in range(9):
-                    if i[idx] > max_input[idx]:
-                        max_input[idx] = i[idx]
-
-            for idx in range(len(self._data)):
-                i, o = self._data[idx]
-                i = np.asarray(i) / np.asarray(max_input)
-                self._data[idx] = (i, o)
+                    outputs.append(int(row[10]) - 1)
+        return np.asarray(inputs), np.asarray(outputs)
 
-        # Now the fun part:
-        # We need to split between training and validation:
-        # 150 data items:
-        random.shuffle(self._data)
-        # train_data = self._data[:150]
-        # validation_data = self._data[150:]
-        train_data = self._data
-        validation_data = self._data
-        # Now to map it better:
-        train_data_in = np.asarray([td[0] for td in train_data])
-        train_data_out = np.asarray([td[1] for td in train_data])
-
-        self._training_data = (train_data_in, train_data_out)
-        validation_data_in = np.asarray([vd[0] for vd in validation_data])
-        validation_data_out = np.asarray([vd[1] for vd in validation_data])
-        self._validation_data = (validation_data_in, validation_data_out)
+    def _load(self) -> None:
+        if getattr(self, '_training_data', None) is not None:
+            return
+        inputs, outputs = DatasetRegistry.load('glass', self.normalizeInputs)
+        order = list(range(len(inputs)))
+        random.Random(self._shuffle_seed).shuffle(order)
+        # Training and validation are the same (shuffled) rows:
+        data = (inputs[order], outputs[order])
+        self._training_data = data
+        self._validation_data = data
 
     def numInputs(self) -> int:
         return 9
@@ -68,16 +57,22 @@ class GlassProblem(ProblemBase):
     def trainingSet(self) -> tuple[
             npt.NDArray[np.float64],
             npt.NDArray[np.float64]]:
+        self._load()
         return self._training_data
 
     def validationSet(self) -> tuple[
             npt.NDArray[np.float64],
             npt.NDArray[np.float64]]:
+        self._load()
         return self._validation_data
 
+    # Scales by the max over every row, so chunked measuring falls back on
+    # ProblemBase's collecting accumulator:
     def measureFitness(self,
                        expected_output: npt.NDArray[np.float64],
                        actual_output:  npt.NDArray[np.float64]) -> float:
+        # Outputs may be float32, the log-sum-exp is done in float64:
+        actual_output = np.asarray(actual_output, dtype=np.float64)
         with np.errstate(all='raise'):
             try:
                 omax = np.max(actual_output)
@@ -96,3 +91,6 @@ class GlassProblem(ProblemBase):
                 print("Actual output: {}".format(actual_output))
                 print("Expected output: {}".format(expected_output))
                 raise
+
+
+DatasetRegistry.register('glass', 'uci_glass/glass.data', GlassProblem.parse)
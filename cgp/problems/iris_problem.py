@@ -4,61 +4,54 @@ import random
 import numpy as np
 import numpy.typing as npt
 
+from .dataset_registry import DatasetRegistry
+from .fitness_accumulator import FitnessAccumulator, MeanAccumulator
 from .problem_base import ProblemBase
 
 
 class IrisProblem(ProblemBase):
 
+    _CLASSES = ['Iris-setosa', 'Iris-versicolor', 'Iris-virginica']
+
     def __init__(self, normalizeInputs: bool = False) -> None:
         super().__init__()
 
-        self._classes = ['Iris-setosa', 'Iris-versicolor', 'Iris-virginica']
+        self._classes = list(IrisProblem._CLASSES)
         self._class_map = {}
         for idx in range(len(self._classes)):
             c = self._classes[idx]
             self._class_map[c] = idx
+        self.normalizeInputs = normalizeInputs
+        # The split is drawn now, but the data only loads on first use:
+        self._shuffle_seed = random.getrandbits(32)
 
-        self._data = []
-        # Load the dataset:
-        datafile = 'data/iris_flower_classification/iris.data'
-        with open(datafile, newline='') as csvfile:
+    @staticmethod
+    def parse(path: str) -> tuple[
+            npt.NDArray[np.float64],
+            npt.NDArray[np.int64]]:
+        inputs = []
+        outputs = []
+        with open(path, newline='') as csvfile:
             csvreader = csv.reader(csvfile, delimiter=',', quotechar='|')
             for row in csvreader:
                 if len(row) == 5:
-                    input = [float(i) for i in row[:4]]
-                    output = self._class_map[row[4]]
-                    data_item = (input, output)
-                    self._data.append(data_item)
-
-        if normalizeInputs:
-            # Need to normalize:
-            max_input = [0.0, 0.0, 0.0, 0.0]
-            for i, o in self._data:
-                for idx in range(4):
-                    if i[idx] > max_input[idx]:
-                        max_input[idx] = i[idx]
-
-            for idx in range(len(self._data)):
-                i, o = self._data[idx]
-                i = np.asarray(i) / np.asarray(max_input)
-                self._data[idx] = (i, o)
-
+                    inputs.append([float(i) for i in row[:4]])
+                    outputs.append(IrisProblem._CLASSES.index(row[4]))
+        return np.asarray(inputs), np.asarray(outputs)
+
+    def _load(self) -> None:
+        if getattr(self, '_training_data', None) is not None:
+            return
+        inputs, outputs = DatasetRegistry.load('iris', self.normalizeInputs)
         # Now the fun part:
         # We need to split between training and validation:
         # 150 data items:
-        random.shuffle(self._data)
-        train_data = self._data[:100]
-        validation_data = self._data[100:]
-        # Now to map it better:
-        train_data_in = np.asarray([td[0] for td in train_data])
-        train_data_out = np.asarray(
-            [td[1] for td in train_data])
-
-        self._training_data = (train_data_in, train_data_out)
-        validation_data_in = np.asarray([vd[0] for vd in validation_data])
-        validation_data_out = np.asarray(
-            [vd[1] for vd in validation_data])
-        self._validation_data = (validation_data_in, validation_data_out)
+        order = list(range(len(inputs)))
+        random.Random(self._shuffle_seed).shuffle(order)
+        train = order[:100]
+        validation = order[100:]
+        self._training_data = (inputs[train], outputs[train])
+        self._validation_data = (inputs[validation], outputs[validation])
 
     def numInputs(self) -> int:
         return 4
@@ -70,20 +63,37 @@ class IrisProblem(ProblemBase):
     def trainingSet(self) -> tuple[
             npt.NDArray[np.float64],
             npt.NDArray[np.float64]]:
+        self._load()
         return self._training_data
 
     def validationSet(self) -> tuple[
             npt.NDArray[np.float64],
             npt.NDArray[np.float64]]:
+        self._load()
         return self._validation_data
 
-    def measureFitness(self,
-                       expected_output: npt.NDArray[np.float64],
-                       actual_output: npt.NDArray[np.float64]
-                       ) -> float:
+    def crossEntropy(self,
+                     expected_output: npt.NDArray[np.float64],
+                     actual_output: npt.NDArray[np.float64]
+                     ) -> npt.NDArray[np.float64]:
+        # Outputs may be float32, the log-sum-exp is done in float64:
+        actual_output = np.asarray(actual_output, dtype=np.float64)
         true_class_logits = actual_output[
             np.arange(len(actual_output)), expected_output]
         cross_entropy = - true_class_logits + np.log(
             np.sum(np.exp(actual_output), axis=-1))
-        # return cross_entropy
-        return np.mean(cross_entropy)  # type: ignore
+        return cross_entropy  # type: ignore
+
+    def measureFitness(self,
+                       expected_output: npt.NDArray[np.float64],
+                       actual_output: npt.NDArray[np.float64]
+                       ) -> float:
+        return np.mean(  # type: ignore
+            self.crossEntropy(expected_output, actual_output))
+
+    def fitnessAccumulator(self) -> FitnessAccumulator:
+        return MeanAccumulator(self.crossEntropy)
+
+
+DatasetRegistry.register(
+    'iris', 'iris_flower_classification/iris.data', IrisProblem.parse)
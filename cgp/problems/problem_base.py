@@ -1,10 +1,160 @@
 from abc import ABC, abstractmethod
+import atexit
+from typing import Any, Callable
 
 import numpy as np
 import numpy.typing as npt
 
+from .fitness_accumulator import CollectingAccumulator, FitnessAccumulator
+from .row_chunks import RowChunks
+from .shared_array import SharedArray
+
 
 class ProblemBase(ABC):
+    # Attributes holding the (input, expected_output) pairs returned by
+    # trainingSet() / validationSet(). publish() moves these to shared memory.
+    _DATASET_ATTRIBUTES: tuple[str, ...] = (
+        '_training_data', '_validation_data')
+
+    def publish(self) -> None:
+        """
+        Copies the datasets into shared memory once. From then on this
+        problem uses read-only views of the segments, and pickling it (eg:
+        to pool workers) only sends the segment names: the unpickled copy
+        attaches to the same memory instead of holding its own arrays.
+        The segments are unlinked by unpublish(), or at exit.
+        """
+        if '_shared_handles' in self.__dict__:
+            return
+        # Problems that load lazily load now:
+        self.trainingSet()
+        self.validationSet()
+        handles: dict[str, tuple[SharedArray, ...]] = {}
+        segments = []
+        # Training and validation may be the same arrays, share them once:
+        created: dict[int, SharedArray] = {}
+        for attribute in self._DATASET_ATTRIBUTES:
+            arrays = getattr(self, attribute, None)
+            if arrays is None:
+                continue
+            for array in arrays:
+                if id(array) not in created:
+                    handle, segment = SharedArray.create(array)
+                    created[id(array)] = handle
+                    segments.append(segment)
+            handles[attribute] = tuple(created[id(a)] for a in arrays)
+        self._shared_handles = handles
+        self._shared_segments = segments
+        self._attachShared()
+        atexit.register(self.unpublish)
+
+    def unpublish(self) -> None:
+        """
+        Unlinks the segments made by publish(), and closes this process'
+        mappings of them. The problem goes back to private copies of its
+        datasets. Views handed out earlier keep their segment mapped until
+        they are released.
+        """
+        self.detachShared()
+        for segment in self.__dict__.pop('_shared_segments', []):
+            segment.close()
+            segment.unlink()
+        atexit.unregister(self.unpublish)
+
+    def detachShared(self) -> None:
+        """
+        Swaps the shared views for private copies and closes the
+        mappings, without unlinking anything (eg: in a worker)
+        """
+        handles = self.__dict__.pop('_shared_handles', {})
+        self._copyDatasets(list(handles.keys()))
+        for attributeHandles in handles.values():
+            for handle in attributeHandles:
+                handle.detach()
+
+    def _copyDatasets(self, attributes: list[str]) -> None:
+        # Training and validation may be the same arrays, copy them once:
+        copies: dict[int, npt.NDArray] = {}
+        for attribute in attributes:
+            arrays = getattr(self, attribute, None)
+            if arrays is None:
+                continue
+            for array in arrays:
+                if id(array) not in copies:
+                    copies[id(array)] = np.array(array)
+            setattr(self, attribute, tuple(copies[id(a)] for a in arrays))
+
+    def _attachShared(self) -> None:
+        for attribute, handles in self._shared_handles.items():
+            setattr(self, attribute, tuple(h.attach() for h in handles))
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = dict(self.__dict__)
+        # Only the owner unlinks the segments:
+        state.pop('_shared_segments', None)
+        for attribute in state.get('_shared_handles', {}):
+            state[attribute] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if '_shared_handles' in state:
+            self._attachShared()
+
+    def trainingSubset(self,
+                       size: int,
+                       seed: int = 0) -> tuple[
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64]]:
+        """
+        Returns about size rows of trainingSet(), in their original order.
+        Class labels (integer expected outputs) keep their proportions, with
+        at least one row per class. The same size and seed give the same
+        rows.
+        """
+        input, expected_output = self.trainingSet()
+        if size >= len(input):
+            return input, expected_output
+        rng = np.random.default_rng(seed)
+        if expected_output.ndim == 1 and np.issubdtype(
+                expected_output.dtype, np.integer):
+            classes, counts = np.unique(expected_output, return_counts=True)
+            idxes = []
+            for label, count in zip(classes.tolist(), counts.tolist()):
+                take = max(1, round(size * count / len(input)))
+                idxes.append(rng.choice(
+                    np.flatnonzero(expected_output == label),
+                    size=min(take, count),
+                    replace=False))
+            rows = np.sort(np.concatenate(idxes))
+        else:
+            rows = np.sort(rng.choice(len(input), size=size, replace=False))
+        return input[rows], expected_output[rows]
+
+    def fitnessAccumulator(self) -> FitnessAccumulator:
+        """
+        Returns an accumulator that gives the same fitness as
+        measureFitness() over chunks of rows. Problems whose fitness is a
+        mean over rows should return a MeanAccumulator; this default keeps
+        every output row until the end.
+        """
+        return CollectingAccumulator(self.measureFitness)
+
+    def measureFitnessChunked(
+            self,
+            evaluate: Callable[[npt.NDArray[np.float64]],
+                               npt.NDArray[np.float64]],
+            dataset: tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]],
+            chunk_rows: int) -> float:
+        """
+        measureFitness(expected, evaluate(input)) over dataset, but only
+        evaluating chunk_rows rows at a time (eg: evaluate is Gene.evaluate
+        or ANN.forward), so the intermediates stay chunk sized
+        """
+        accumulator = self.fitnessAccumulator()
+        for input, expected_output in RowChunks.iterate(dataset, chunk_rows):
+            accumulator.add(expected_output, evaluate(input))
+        return accumulator.result()
 
     @abstractmethod
     def numInputs(self) -> int:
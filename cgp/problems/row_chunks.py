@@ -0,0 +1,35 @@
+from typing import Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+
+class RowChunks:
+    @staticmethod
+    def iterate(arrays: tuple[npt.NDArray[np.float64], ...],
+                chunk_rows: int) -> Iterator[tuple[
+                    npt.NDArray[np.float64], ...]]:
+        """
+        Yields the same chunk_rows rows of every array (eg: a dataset's
+        input and expected output) at a time, as views. Memory-mapped
+        arrays (see memmap) only get read a chunk at a time.
+        chunk_rows <= 0 yields everything as one chunk.
+        """
+        numRows = len(arrays[0])
+        for array in arrays:
+            if len(array) != numRows:
+                raise ValueError(
+                    "Expected {} rows, received {}".format(
+                        numRows, len(array)))
+        if chunk_rows <= 0:
+            chunk_rows = max(1, numRows)
+        for start in range(0, numRows, chunk_rows):
+            yield tuple(array[start:start + chunk_rows] for array in arrays)
+
+    @staticmethod
+    def memmap(path: str) -> npt.NDArray[np.float64]:
+        """
+        Opens a .npy file read-only without loading it,
+        for datasets bigger than memory
+        """
+        return np.load(path, mmap_mode='r')  # type: ignore
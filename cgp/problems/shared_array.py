@@ -0,0 +1,82 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import numpy.typing as npt
+
+# Segments attached by this process, kept open while their views are used:
+_ATTACHED: dict[str, shared_memory.SharedMemory] = {}
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """
+    Picklable handle to a NumPy array in a shared memory segment
+    """
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    @staticmethod
+    def create(array: npt.NDArray
+               ) -> tuple[SharedArray, shared_memory.SharedMemory]:
+        """
+        Copies the array into a new segment. The caller owns the returned
+        segment, and has to close() and unlink() it when done.
+        """
+        array = np.ascontiguousarray(array)
+        segment = shared_memory.SharedMemory(
+            create=True, size=max(array.nbytes, 1))
+        view: npt.NDArray = np.ndarray(
+            array.shape, dtype=array.dtype, buffer=segment.buf)
+        view[...] = array
+        return SharedArray(segment.name, array.shape, array.dtype.str), segment
+
+    def attach(self) -> npt.NDArray:
+        """
+        Returns a read-only view of the segment, without copying
+        """
+        segment = _ATTACHED.get(self.name)
+        if segment is None:
+            segment = shared_memory.SharedMemory(name=self.name)
+            _ATTACHED[self.name] = segment
+        # frombuffer holds the buffer (np.ndarray(buffer=) doesn't), so
+        # detach() can tell when views, or views of them, are still alive:
+        view: npt.NDArray = np.frombuffer(
+            segment.buf,
+            dtype=np.dtype(self.dtype),
+            count=int(np.prod(self.shape))).reshape(self.shape)
+        view.setflags(write=False)
+        return view
+
+    def detach(self) -> bool:
+        """
+        Closes this process' mapping of the segment. Returns False, and
+        keeps it mapped, while views of it are still in use.
+        """
+        segment = _ATTACHED.pop(self.name, None)
+        if segment is None:
+            return True
+        try:
+            segment.close()
+        except BufferError:
+            _ATTACHED[self.name] = segment
+            return False
+        return True
+
+    @staticmethod
+    def detachAll() -> int:
+        """
+        detach() for every segment this process attached, eg: when a
+        worker shuts down. Returns how many are still in use.
+        """
+        inUse = 0
+        for name in list(_ATTACHED.keys()):
+            segment = _ATTACHED.pop(name)
+            try:
+                segment.close()
+            except BufferError:
+                _ATTACHED[name] = segment
+                inUse += 1
+        return inUse
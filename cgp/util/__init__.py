@@ -1,3 +1,5 @@
+from .fitness_cache import FitnessCache
 from .math_util import MathUtil
+from .precision_util import PrecisionUtil
 
-__all__ = ['MathUtil']
+__all__ = ['FitnessCache', 'MathUtil', 'PrecisionUtil']
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class FitnessCache:
+    """
+    Bounded least-recently-used map from an individual's key to its fitness.
+    Counts hits and misses so we can see what the cache saves.
+    """
+
+    def __init__(self, max_size: int = 10000) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[float]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, fitness: float) -> None:
+        self._entries[key] = fitness
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
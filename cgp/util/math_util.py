@@ -1,5 +1,11 @@
 import math
 
+import numpy as np
+import numpy.typing as npt
+
+# math.exp as a (object-dtype) ufunc, for MathUtil.sigArray:
+_MATH_EXP = np.frompyfunc(math.exp, 1, 1)
+
 
 class MathUtil:
     @staticmethod
@@ -18,3 +24,22 @@ class MathUtil:
     @staticmethod
     def sig(val: float) -> float:
         return 1.0 / (1.0 + math.exp(-val))
+
+    # Element-wise versions of the above, giving identical values:
+
+    @staticmethod
+    def clampArray(vals: npt.NDArray[np.float64],
+                   min_val: float,
+                   max_val: float) -> npt.NDArray[np.float64]:
+        return np.maximum(np.minimum(vals, max_val), min_val)
+
+    @staticmethod
+    def signArray(vals: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+        return np.where(vals > 0.0, 1.0, np.where(vals < 0.0, -1.0, 0.0))
+
+    @staticmethod
+    def sigArray(vals: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+        # math.exp rather than np.exp:
+        # NumPy's SIMD exp can differ from it in the last place
+        exps = _MATH_EXP(np.negative(vals)).astype(np.float64)
+        return 1.0 / (1.0 + exps)
@@ -0,0 +1,35 @@
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+
+class PrecisionUtil:
+    @staticmethod
+    def maxDeviation(reference: npt.NDArray[np.floating],
+                     candidate: npt.NDArray[np.floating]) -> float:
+        """
+        Returns the largest absolute difference between the two arrays.
+        Non-finite values that don't match exactly count as inf.
+        """
+        reference = np.asarray(reference, dtype=np.float64)
+        candidate = np.asarray(candidate, dtype=np.float64)
+        finite = np.isfinite(reference) & np.isfinite(candidate)
+        bothNan = np.isnan(reference) & np.isnan(candidate)
+        if np.any(~finite & (reference != candidate) & ~bothNan):
+            return float('inf')
+        if not np.any(finite):
+            return 0.0
+        return float(np.max(np.abs(reference[finite] - candidate[finite])))
+
+    @staticmethod
+    def compare(evaluate: Callable[..., npt.NDArray[np.floating]],
+                input: npt.NDArray[np.float64],
+                dtype: npt.DTypeLike = np.float32) -> float:
+        """
+        Runs evaluate(input, dtype) (eg: Gene.evaluate or ANN.forward)
+        in float64 and in dtype, and returns the max deviation between them
+        """
+        reference = evaluate(input, np.float64)
+        candidate = evaluate(input, dtype)
+        return PrecisionUtil.maxDeviation(reference, candidate)
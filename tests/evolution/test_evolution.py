@@ -0,0 +1,126 @@
+from cgp.evolution import Evolution, EvolutionConfig, ProblemPoolExecutor
+from cgp.gene import GeneBuilder, GeneBuilderConfig, OpsetKey
+from cgp.gene import PointMutator, PointMutatorConfig
+from cgp.problems import ProblemBase
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import numpy as np
+import random
+import unittest
+
+
+class ToyProblem(ProblemBase):
+    def __init__(self) -> None:
+        rng = np.random.default_rng(0)
+        self.input = rng.uniform(-1, 1, (40, 2))
+        self.output = self.input[:, :1] * self.input[:, 1:] + 0.5
+
+    def numInputs(self) -> int:
+        return 2
+
+    def numOutputs(self) -> int:
+        return 1
+
+    def trainingSet(self):
+        return self.input, self.output
+
+    def validationSet(self):
+        return self.input, self.output
+
+    def measureFitness(self, expected_output, actual_output) -> float:
+        return float(np.mean((expected_output - actual_output) ** 2))
+
+
+class PickleCountingProblem(ToyProblem):
+    pickled = 0
+
+    def __getstate__(self):
+        PickleCountingProblem.pickled += 1
+        return self.__dict__
+
+
+class TestEvolution(unittest.TestCase):
+
+    def runEvolution(self, executor=None, chunk_rows=0, problem=None,
+                     dtype='float64'):
+        random.seed(0)
+        builder = GeneBuilder(
+            GeneBuilderConfig(2, 20, 1, OpsetKey.GPTP_II_OPSET_KEY))
+        mutator = PointMutator(PointMutatorConfig(0.1))
+        config = EvolutionConfig(
+            mu=4, lamb=12, max_generations=6, num_chunks=3,
+            chunk_rows=chunk_rows, dtype=dtype)
+        if problem is None:
+            problem = ToyProblem()
+        evolution = Evolution(
+            problem, builder, mutator, config, executor)
+        generations = []
+        population = evolution.run(
+            lambda g, p: generations.append((g, p[0].fitness)))
+        return evolution, population, generations
+
+    def test_run(self) -> None:
+        evolution, population, generations = self.runEvolution()
+        self.assertEqual(len(population), 4)
+        self.assertEqual([g for g, _ in generations], list(range(6)))
+        # Elitist, so the best never gets worse:
+        best = [f for _, f in generations]
+        self.assertEqual(best, sorted(best, reverse=True))
+        fitnesses = [m.fitness for m in population]
+        self.assertEqual(fitnesses, sorted(fitnesses))
+        self.assertEqual(
+            evolution.measure([population[0].gene]), [fitnesses[0]])
+
+    def test_executors_agree(self) -> None:
+        _, serial, _ = self.runEvolution()
+        with ThreadPoolExecutor(2) as executor:
+            _, threaded, _ = self.runEvolution(executor)
+        with ProcessPoolExecutor(2) as executor:
+            _, processes, _ = self.runEvolution(executor)
+        problem = ToyProblem()
+        with ProblemPoolExecutor(problem, 2) as executor:
+            _, installed, _ = self.runEvolution(executor, problem=problem)
+        for population in (threaded, processes, installed):
+            self.assertEqual(
+                [m.fitness for m in population],
+                [m.fitness for m in serial])
+
+    def test_problem_pool_only_sends_genes(self) -> None:
+        problem = PickleCountingProblem()
+        fork = multiprocessing.get_context('fork')
+        with ProblemPoolExecutor(problem, 2, fork) as executor:
+            self.runEvolution(executor, problem=problem)
+        self.assertEqual(PickleCountingProblem.pickled, 0)
+        with ProcessPoolExecutor(2, fork) as executor:
+            self.runEvolution(executor, problem=problem)
+        self.assertGreater(PickleCountingProblem.pickled, 0)
+
+    def test_float32_measures_close(self) -> None:
+        evolution, population, _ = self.runEvolution(dtype='float32')
+        genes = [m.gene for m in population]
+        whole = Evolution(
+            evolution.problem, evolution.builder, evolution.mutator)
+        np.testing.assert_allclose(
+            [m.fitness for m in population], whole.measure(genes),
+            rtol=1e-4)
+
+    def test_chunked_rows_agree(self) -> None:
+        _, whole, _ = self.runEvolution()
+        _, chunked, _ = self.runEvolution(chunk_rows=7)
+        self.assertEqual(
+            [m.fitness for m in chunked], [m.fitness for m in whole])
+
+    def test_callback_stops_run(self) -> None:
+        random.seed(0)
+        evolution = Evolution(
+            ToyProblem(),
+            GeneBuilder(
+                GeneBuilderConfig(2, 20, 1, OpsetKey.GPTP_II_OPSET_KEY)),
+            PointMutator(PointMutatorConfig(0.1)),
+            EvolutionConfig(mu=2, lamb=4, max_generations=10))
+        evolution.run(lambda g, p: g == 2)
+        self.assertEqual(evolution.generation, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+from cgp.evolution import Evolution, EvolutionConfig, IslandModel, Migrant
+from cgp.evolution import RedisChannel
+from cgp.gene import Gene, GeneBuilder, GeneBuilderConfig, OpsetKey
+from cgp.gene import GoldmanMutator
+from cgp.problems import ProblemBase
+import numpy as np
+import random
+import unittest
+
+
+class SumProblem(ProblemBase):
+    """
+    Learn x0 + x1, scored by mean squared error
+    """
+
+    def __init__(self) -> None:
+        self.input = np.random.default_rng(0).uniform(-1, 1, (20, 2))
+        self.output = self.input.sum(axis=1, keepdims=True)
+
+    def numInputs(self) -> int:
+        return 2
+
+    def numOutputs(self) -> int:
+        return 1
+
+    def trainingSet(self):
+        return self.input, self.output
+
+    def validationSet(self):
+        return self.input, self.output
+
+    def measureFitness(self, expected_output, actual_output) -> float:
+        return float(np.mean((expected_output - actual_output) ** 2))
+
+
+def makeIsland(island: int) -> Evolution:
+    builder = GeneBuilder(
+        GeneBuilderConfig(2, 20, 1, OpsetKey.GPTP_II_OPSET_KEY))
+    return Evolution(
+        SumProblem(),
+        builder,
+        GoldmanMutator(),
+        EvolutionConfig(mu=3, lamb=6))
+
+
+class StandInRedis:
+    def __init__(self) -> None:
+        self.lists: dict[str, list[str]] = {}
+
+    def rpush(self, name, value):
+        self.lists.setdefault(name, []).append(value)
+
+    def lpop(self, name):
+        items = self.lists.get(name, [])
+        return items.pop(0) if len(items) > 0 else None
+
+
+class TestIslands(unittest.TestCase):
+
+    def test_island_model(self) -> None:
+        progress = []
+        model = IslandModel(
+            makeIsland, 3, migration_interval=2, num_migrants=2, seed=0)
+        best = model.run(4, lambda g, f: progress.append((g, f)))
+        self.assertEqual([g for g, _ in progress], [0, 1, 2, 3])
+        for _, fitnesses in progress:
+            self.assertEqual(sorted(fitnesses.keys()), [0, 1, 2])
+        self.assertEqual(best.fitness, min(progress[-1][1].values()))
+        self.assertIsInstance(best.individual, Gene)
+
+    def test_receive_keeps_best(self) -> None:
+        random.seed(0)
+        evolution = makeIsland(0)
+        worst = evolution.migrants(3)[-1].fitness
+        migrant = makeIsland(1).migrants(1)[0]
+        evolution.receive([Migrant(-1.0, migrant.individual)])
+        self.assertEqual(evolution.migrants(1)[0].fitness, -1.0)
+        self.assertLessEqual(evolution.migrants(3)[-1].fitness, worst)
+
+    def test_redis_channel_ring(self) -> None:
+        redis = StandInRedis()
+        channel = RedisChannel(lambda: redis, 2, Gene.from_json)
+        random.seed(0)
+        migrant = makeIsland(0).migrants(1)[0]
+        channel.endpoint(1).send([migrant])
+        self.assertEqual(channel.endpoint(1).receive(), [])
+        received = channel.endpoint(0).receive()
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0].fitness, migrant.fitness)
+        self.assertEqual(received[0].individual, migrant.individual)
+
+
+if __name__ == '__main__':
+    unittest.main()
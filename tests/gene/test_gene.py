@@ -0,0 +1,117 @@
+from cgp.gene import Gene, GeneBuilder, GeneBuilderConfig, OpsetKey, OpSets
+from cgp.gene.gene import BUFFERED_MIN_ROWS
+import random
+import unittest
+import numpy as np
+
+
+def evaluateRecursive(g: Gene, nodeIdx: int, input: np.ndarray) -> np.ndarray:
+    if nodeIdx < g.num_inputs:
+        return np.copy(input[:, nodeIdx])
+    in1idx, in2idx, in3idx, op_id = g.middlenodes[nodeIdx - g.num_inputs]
+    op = OpSets.OPSET_DICT[g.opset_key][op_id]
+    result = op[1](
+        evaluateRecursive(g, in1idx, input),
+        evaluateRecursive(g, in2idx, input),
+        evaluateRecursive(g, in3idx, input))
+    result[np.isnan(result)] = 0
+    return result
+
+
+class TestGene(unittest.TestCase):
+
+    def test_active_nodes(self) -> None:
+        g = Gene(
+            2,
+            [
+                (0, 1, 0, 11),  # 2: used by 4
+                (0, 0, 0, 0),   # 3: only read by an unused input
+                (2, 2, 3, 13),  # 4: output
+            ],
+            [4, 1],
+            OpsetKey.IMPROBED_2022_OPSET_KEY)
+        self.assertEqual(g.activeNodes, [0, 2])
+        self.assertEqual([step[0] for step in g.evaluationPlan], [2, 4])
+
+    def test_evaluate_matches_recursive(self) -> None:
+        random.seed(0)
+        input = np.random.RandomState(0).uniform(-2, 2, (50, 9))
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(GeneBuilderConfig(9, 200, 4, opset_key))
+            for _ in range(20):
+                g = builder.makeGene()
+                expected = np.swapaxes(np.asarray([
+                    evaluateRecursive(g, idx, input)
+                    for idx in g.output_idxes]), 0, 1)
+                with np.errstate(all='ignore'):
+                    actual = g.evaluate(input)
+                    np.testing.assert_array_equal(actual, expected)
+                    # The plan is reused across calls:
+                    np.testing.assert_array_equal(g.evaluate(input), actual)
+
+    def test_buffered_evaluate_matches_recursive(self) -> None:
+        rng = np.random.default_rng(0)
+        input = rng.uniform(-2, 2, (BUFFERED_MIN_ROWS, 9))
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(
+                GeneBuilderConfig(9, 200, 4, opset_key), rng)
+            for _ in range(10):
+                g = builder.makeGene()
+                expected = np.swapaxes(np.asarray([
+                    evaluateRecursive(g, idx, input)
+                    for idx in g.output_idxes]), 0, 1)
+                with np.errstate(all='ignore'):
+                    np.testing.assert_array_equal(g.evaluate(input), expected)
+
+    def test_evaluate_leaves_input_untouched(self) -> None:
+        g = Gene(
+            2,
+            [(0, 1, 0, 3), (0, 1, 0, 3)],
+            [2, 3, 0],
+            OpsetKey.GPTP_II_OPSET_KEY)
+        input = np.asarray([[4.0, 2.0], [3.0, 0.0]])
+        output = g.evaluate(input)
+        np.testing.assert_array_equal(input, [[4.0, 2.0], [3.0, 0.0]])
+        np.testing.assert_array_equal(
+            output, [[2.0, 2.0, 4.0], [3.0, 3.0, 3.0]])
+
+    def test_phenotype_hash(self) -> None:
+        g = Gene(
+            2,
+            [(0, 1, 0, 11), (1, 1, 1, 8), (2, 1, 1, 0)],
+            [4, 1],
+            OpsetKey.IMPROBED_2022_OPSET_KEY)
+        # Changing an inactive node, or an input abs doesn't read:
+        neutral = Gene(
+            2,
+            [(0, 1, 0, 11), (0, 0, 1, 5), (2, 0, 0, 0)],
+            [4, 1],
+            OpsetKey.IMPROBED_2022_OPSET_KEY)
+        self.assertEqual(g.phenotypeHash, neutral.phenotypeHash)
+        # The same graph at different addresses:
+        moved = Gene(
+            2,
+            [(1, 1, 1, 8), (0, 1, 0, 11), (3, 1, 1, 0)],
+            [4, 1],
+            OpsetKey.IMPROBED_2022_OPSET_KEY)
+        self.assertEqual(g.phenotypeHash, moved.phenotypeHash)
+        changed = Gene(
+            2,
+            [(0, 1, 0, 12), (1, 1, 1, 8), (2, 1, 1, 0)],
+            [4, 1],
+            OpsetKey.IMPROBED_2022_OPSET_KEY)
+        self.assertNotEqual(g.phenotypeHash, changed.phenotypeHash)
+
+    def test_unknown_operator(self) -> None:
+        numOps = len(OpSets.OPSET_DICT[OpsetKey.IMPROBED_2022_OPSET_KEY])
+        g = Gene(
+            2,
+            [(0, 1, 0, numOps)],
+            [2],
+            OpsetKey.IMPROBED_2022_OPSET_KEY)
+        self.assertRaises(ValueError, g.toHumanFormula)
+        self.assertRaises(ValueError, lambda: g.activeMask)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+from cgp.gene import GeneBuilder, GeneBuilderConfig, GeneCompiler, OpsetKey
+import unittest
+import numpy as np
+
+
+class TestGeneCompiler(unittest.TestCase):
+
+    def test_matches_gene_evaluate(self) -> None:
+        rng = np.random.default_rng(0)
+        input = rng.uniform(-2, 2, (30, 9))
+        compiler = GeneCompiler()
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(
+                GeneBuilderConfig(9, 200, 4, opset_key), rng)
+            for _ in range(20):
+                g = builder.makeGene()
+                with np.errstate(all='ignore'):
+                    np.testing.assert_array_equal(
+                        compiler.evaluate(g, input), g.evaluate(input))
+
+    def test_float32_matches_gene_evaluate(self) -> None:
+        rng = np.random.default_rng(1)
+        # Large enough to saturate both exp ops in float32:
+        input = rng.choice([-300.0, -1.5, 0.0, 0.5, 100.0, 150.0, 300.0],
+                           (30, 9))
+        compiler = GeneCompiler()
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(
+                GeneBuilderConfig(9, 200, 4, opset_key), rng)
+            for _ in range(20):
+                g = builder.makeGene()
+                with np.errstate(all='ignore'):
+                    actual = compiler.evaluate(g, input, np.float32)
+                    np.testing.assert_array_equal(
+                        actual, g.evaluate(input, np.float32))
+                self.assertEqual(actual.dtype, np.float32)
+
+    def test_dtype_in_cache_key(self) -> None:
+        g = GeneBuilder(GeneBuilderConfig(
+            9, 50, 4, OpsetKey.GPTP_II_OPSET_KEY),
+            np.random.default_rng(0)).makeGene()
+        compiler = GeneCompiler()
+        input = np.ones((2, 9))
+        self.assertEqual(compiler.evaluate(g, input).dtype, np.float64)
+        self.assertEqual(
+            compiler.evaluate(g, input, np.float32).dtype, np.float32)
+        self.assertEqual(len(compiler), 2)
+
+    def test_lru_limit(self) -> None:
+        builder = GeneBuilder(GeneBuilderConfig(
+            9, 50, 4, OpsetKey.GPTP_II_OPSET_KEY), np.random.default_rng(0))
+        compiler = GeneCompiler(max_size=3)
+        genes = [builder.makeGene() for _ in range(5)]
+        for g in genes:
+            compiler.compile(g)
+        self.assertEqual(len(compiler), 3)
+        # Recompiling an evicted gene still gives a working function:
+        input = np.ones((2, 9))
+        np.testing.assert_array_equal(
+            compiler.evaluate(genes[0], input), genes[0].evaluate(input))
+
+
+if __name__ == '__main__':
+    unittest.main()
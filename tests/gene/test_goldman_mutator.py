@@ -0,0 +1,44 @@
+from cgp.gene import Gene, GeneBuilder, GeneBuilderConfig, GoldmanMutator
+from cgp.gene import OpsetKey, OpSets
+import random
+import unittest
+import numpy as np
+
+
+def activeGenes(g: Gene, parent: Gene) -> list[int]:
+    # g's genes at the loci the parent actually uses:
+    used = OpSets.usedInputs(parent.opset_key)
+    genes = []
+    for idx in parent.activeNodes:
+        node = g.middlenodes[idx].tolist()
+        parent_op = parent.middlenodes[idx, 3]
+        genes.append(node[3])
+        genes.extend([node[i] for i in range(3) if used[parent_op][i]])
+    return genes + g.output_idxes.tolist()
+
+
+class TestGoldmanMutator(unittest.TestCase):
+
+    def test_active_gene_changes(self) -> None:
+        random.seed(0)
+        builder = GeneBuilder(GeneBuilderConfig(
+            9, 200, 4, OpsetKey.IMPROBED_2022_OPSET_KEY))
+        mutator = GoldmanMutator()
+        for _ in range(50):
+            parent = builder.makeGene()
+            parent_nodes = parent.middlenodes.copy()
+            parent_outputs = parent.output_idxes.copy()
+            child = mutator.mutateGene(parent)
+            # The parent is left alone:
+            np.testing.assert_array_equal(parent.middlenodes, parent_nodes)
+            np.testing.assert_array_equal(
+                parent.output_idxes, parent_outputs)
+            # Exactly one of the parent's active genes differs:
+            parent_genes = activeGenes(parent, parent)
+            child_genes = activeGenes(child, parent)
+            diffs = [a != b for a, b in zip(parent_genes, child_genes)]
+            self.assertEqual(sum(diffs), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
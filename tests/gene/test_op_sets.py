@@ -30,6 +30,53 @@ class TestOpSets(unittest.TestCase):
         in3 = np.zeros(100)
         OpSets._SAFE_LOG[1](in1, in2, in3)
 
+    def test_kernels_match_ops(self) -> None:
+        rng = np.random.default_rng(0)
+        special = [0.0, -0.0, np.nan, np.inf, -np.inf, 1e-200, -1.0, 1.0,
+                   200.0, 201.0, -200.0, -201.0, 1e308]
+
+        def makeInput() -> np.ndarray:
+            input = rng.uniform(-5, 5, 500)
+            input[:300] = rng.choice(special, 300)
+            return input
+
+        for key, opset in OpSets.OPSET_DICT.items():
+            kernels = OpSets.KERNEL_DICT[key]
+            self.assertEqual(len(kernels), len(opset))
+            for op, kernel in zip(opset, kernels):
+                in1, in2, in3 = makeInput(), makeInput(), makeInput()
+                originals = (in1.copy(), in2.copy(), in3.copy())
+                out = np.empty(500)
+                with np.errstate(all='ignore'):
+                    expected = op[1](in1.copy(), in2.copy(), in3.copy())
+                    kernel(in1, in2, in3, out, np.empty(500))
+                np.testing.assert_array_equal(out, expected)
+                # Inputs are left alone:
+                for input, original in zip((in1, in2, in3), originals):
+                    np.testing.assert_array_equal(input, original)
+
+    def test_used_inputs_match_names(self) -> None:
+        markers = ('\x00', '\x01', '\x02')
+        for key, opset in OpSets.OPSET_DICT.items():
+            used = OpSets.usedInputs(key)
+            self.assertEqual(len(used), len(opset))
+            for op, opUsed in zip(opset, used):
+                name = op[0](*markers)
+                self.assertEqual(
+                    opUsed, tuple(marker in name for marker in markers),
+                    name)
+
+    def test_unused_inputs_are_ignored(self) -> None:
+        rng = np.random.default_rng(0)
+        for key, opset in OpSets.OPSET_DICT.items():
+            for op, opUsed in zip(opset, OpSets.usedInputs(key)):
+                inputs = [rng.uniform(-5, 5, 100) for _ in range(3)]
+                expected = op[1](*inputs)
+                for which in range(3):
+                    if not opUsed[which]:
+                        inputs[which] = rng.uniform(-5, 5, 100)
+                np.testing.assert_array_equal(op[1](*inputs), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
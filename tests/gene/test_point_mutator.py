@@ -0,0 +1,36 @@
+from cgp.gene import GeneBuilder, GeneBuilderConfig, OpsetKey, OpSets
+from cgp.gene import PointMutator, PointMutatorConfig
+import unittest
+import numpy as np
+
+
+class TestPointMutator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.config = GeneBuilderConfig(
+            9, 200, 4, OpsetKey.IMPROBED_2022_OPSET_KEY)
+        self.gene = GeneBuilder(self.config, rng).makeGene()
+
+    def test_no_mutation(self) -> None:
+        mutator = PointMutator(
+            PointMutatorConfig(0.0), np.random.default_rng(0))
+        self.assertEqual(mutator.mutateGene(self.gene), self.gene)
+
+    def test_mutations_stay_valid(self) -> None:
+        mutator = PointMutator(
+            PointMutatorConfig(1.0), np.random.default_rng(0))
+        child = mutator.mutateGene(self.gene)
+        self.assertNotEqual(child, self.gene)
+        self.assertEqual(child.middlenodes.dtype, np.int32)
+        # Inputs only ever reference inputs or earlier nodes:
+        addresses = 9 + np.arange(200)
+        self.assertTrue(np.all(
+            child.middlenodes[:, :3] < addresses[:, np.newaxis]))
+        ops = OpSets.OPSET_DICT[self.config.opset_key]
+        self.assertTrue(np.all(child.middlenodes[:, 3] < len(ops)))
+        self.assertTrue(np.all(child.output_idxes < 209))
+
+
+if __name__ == '__main__':
+    unittest.main()
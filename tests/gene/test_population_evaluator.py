@@ -0,0 +1,62 @@
+from cgp.gene import GeneBuilder, GeneBuilderConfig, OpsetKey
+from cgp.gene import Gene, PopulationEvaluator
+import random
+import unittest
+import numpy as np
+
+
+class TestPopulationEvaluator(unittest.TestCase):
+
+    def test_matches_gene_evaluate(self) -> None:
+        random.seed(0)
+        input = np.random.RandomState(0).uniform(-2, 2, (30, 9))
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(GeneBuilderConfig(9, 200, 4, opset_key))
+            genes = [builder.makeGene() for _ in range(25)]
+            with np.errstate(all='ignore'):
+                expected = [g.evaluate(input) for g in genes]
+                actual = PopulationEvaluator.evaluate(genes, input)
+            self.assertEqual(actual.shape, (25, 30, 4))
+            for idx in range(len(genes)):
+                np.testing.assert_allclose(actual[idx], expected[idx])
+
+    def test_float32_matches_gene_evaluate(self) -> None:
+        # Large enough to saturate both exp ops in float32:
+        random.seed(1)
+        input = np.random.RandomState(1).choice(
+            [-300.0, -1.5, 0.0, 0.5, 100.0, 150.0, 300.0], (40, 9))
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(GeneBuilderConfig(9, 200, 4, opset_key))
+            genes = [builder.makeGene() for _ in range(25)]
+            with np.errstate(all='ignore'):
+                expected = [g.evaluate(input, np.float32) for g in genes]
+                actual = PopulationEvaluator.evaluate(
+                    genes, input, np.float32)
+            self.assertEqual(actual.dtype, np.float32)
+            for idx in range(len(genes)):
+                np.testing.assert_array_equal(actual[idx], expected[idx])
+
+    def test_float32_saturates_exp(self) -> None:
+        input = np.array([[100.0, 150.0, 300.0]])
+        for opset_key, op_id in ((OpsetKey.IMPROBED_2022_OPSET_KEY, 4),
+                                 (OpsetKey.GPTP_II_OPSET_KEY, 5)):
+            gene = Gene(3, [[idx, idx, idx, op_id] for idx in range(3)],
+                        [3, 4, 5], opset_key)
+            with np.errstate(all='ignore'):
+                expected = gene.evaluate(input, np.float32)
+                actual = PopulationEvaluator.evaluate(
+                    [gene], input, np.float32)[0]
+            self.assertTrue(np.all(np.isfinite(actual)))
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_mismatched_genes(self) -> None:
+        genes = [
+            GeneBuilder(GeneBuilderConfig(
+                9, 10, num_outputs, OpsetKey.GPTP_II_OPSET_KEY)).makeGene()
+            for num_outputs in (3, 4)]
+        with self.assertRaises(ValueError):
+            PopulationEvaluator.evaluate(genes, np.zeros((5, 9)))
+
+
+if __name__ == '__main__':
+    unittest.main()
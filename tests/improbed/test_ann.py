@@ -0,0 +1,57 @@
+from cgp.improbed import BrainBuilder, Config
+from cgp.improbed.ann import ANN
+import numpy as np
+import random
+import unittest
+
+
+class TestANN(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        config = Config(num_inputs=[4, 9], num_outputs=[3, 7])
+        brain = BrainBuilder(config).build()
+        for _ in range(config.num_steps_pre_epoch):
+            brain = brain.update(True)
+        self.brain = brain
+        self.input = np.random.default_rng(0).uniform(-1, 1, (25, 9))
+
+    def test_forward_matches_recursive_evaluation(self) -> None:
+        ann = self.brain.extractANN(1)
+        expected = np.swapaxes(np.asarray([
+            ann.evaluateLayer(x, self.input) for x in ann.outputAddresses]),
+            0, 1)
+        np.testing.assert_array_equal(ann.forward(self.input), expected)
+
+    def test_schedule_is_topological(self) -> None:
+        ann = self.brain.extractANN(0)
+        done = set(range(len(ann.inputIdxes)))
+        for rows, connectionRows, _, _ in ann.schedule:
+            self.assertTrue(set(connectionRows.flatten().tolist()) <= done)
+            done |= set(rows.tolist())
+
+    def test_prune(self) -> None:
+        ann = self.brain.extractANN(0)
+        pruned, report = ann.prune()
+        self.assertEqual(report.nodesBefore, len(ann.address))
+        self.assertEqual(report.nodesAfter, len(pruned.address))
+        self.assertEqual(report.edgesAfter, pruned.numEdges())
+        self.assertLessEqual(report.edgesAfter, report.edgesBefore)
+        for connections in pruned.connectionAddresses:
+            self.assertEqual(len(connections), len(set(connections)))
+            for c in connections:
+                if c < len(pruned.inputIdxes):
+                    self.assertNotEqual(pruned.inputIdxes[c], -1)
+        np.testing.assert_allclose(
+            pruned.forward(self.input[:, :4]), ann.forward(self.input[:, :4]))
+
+    def test_cycle_raises(self) -> None:
+        # Two nodes feeding each other:
+        ann = ANN([[2], [1]], [[1.0], [1.0]], [1, 0], [0.0, 0.0], [1, 2],
+                  [1, 1], [1], [0])
+        with self.assertRaises(ValueError):
+            ann.forward(np.zeros((3, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+from cgp.improbed import BrainBuilder, Config
+from cgp.improbed.point2d import Point2d
+import random
+import unittest
+
+
+class TestBrain(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[4, 9], num_outputs=[3, 7])
+        self.brain = BrainBuilder(self.config).build()
+
+    def test_update_respects_caps(self) -> None:
+        brain = self.brain
+        for _ in range(self.config.num_steps_pre_epoch):
+            brain = brain.update(True)
+        for _ in range(self.config.num_steps_during_epoch):
+            brain = brain.update(False, [0.5, 0.5])
+        self.assertLessEqual(len(brain.neurons), self.config.max_num_neurons)
+        self.assertEqual(
+            len([n for n in brain.neurons if n.out > 0]),
+            sum(self.config.num_outputs))
+        for neuron in brain.neurons:
+            self.assertGreater(len(neuron.dendrites), 0)
+            self.assertLessEqual(
+                len(neuron.dendrites), self.config.max_num_dendrites)
+
+    def test_update_leaves_brain_untouched(self) -> None:
+        before = self.brain.to_json()
+        self.brain.update(True)
+        self.assertEqual(self.brain.to_json(), before)
+
+    def test_closest_addresses_match_get_closest(self) -> None:
+        brain = self.brain
+        for _ in range(self.config.num_steps_pre_epoch):
+            brain = brain.update(True)
+        nonOutput = [n for n in brain.neurons if n.out == 0]
+        neurons = nonOutput + [n for n in brain.neurons if n.out > 0]
+        closest = brain.closestAddresses(
+            nonOutput, [n.out for n in neurons], neurons)
+        for neuron, addresses in zip(neurons, closest):
+            expected = []
+            for dendrite in neuron.dendrites:
+                dendPos = dendrite.position
+                if dendPos.x > neuron.position.x:
+                    delta = dendPos.x - neuron.position.x
+                    dendPos = Point2d(neuron.position.x - delta, dendPos.y)
+                expected.append(brain.getClosest(
+                    len(nonOutput), nonOutput, neuron.out, dendPos))
+            self.assertEqual(addresses, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
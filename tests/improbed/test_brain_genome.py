@@ -0,0 +1,62 @@
+from cgp.improbed import BrainBuilder, BrainGenome, BrainMutator, Config
+import random
+import unittest
+
+
+class TestBrainGenome(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[4, 9], num_outputs=[3, 7])
+        self.genome = BrainBuilder(self.config).makeGenome(seed=42)
+
+    def test_build_is_reproducible(self) -> None:
+        brain = self.genome.build()
+        self.assertEqual(self.genome.build().to_json(), brain.to_json())
+        self.assertEqual(
+            len(brain.neurons),
+            self.config.initial_non_output_neurons
+            + sum(self.config.num_outputs))
+        self.assertEqual(
+            len(brain.inputLocations), sum(self.config.num_inputs))
+
+    def test_seed_sets_initial_state(self) -> None:
+        other = BrainGenome(
+            self.genome.somaProgram,
+            self.genome.dendriteProgram,
+            43,
+            self.config)
+        self.assertNotEqual(
+            other.build().to_json(), self.genome.build().to_json())
+
+    def test_json_round_trip(self) -> None:
+        copy = BrainGenome.from_json(self.genome.to_json())
+        self.assertEqual(copy.build().to_json(), self.genome.build().to_json())
+
+    def test_mutate_genome(self) -> None:
+        child = BrainMutator(self.config).mutate_genome(self.genome, seed=7)
+        self.assertEqual(child.seed, 7)
+        self.assertNotEqual(child.somaProgram, self.genome.somaProgram)
+        self.assertNotEqual(
+            child.dendriteProgram, self.genome.dendriteProgram)
+
+    def test_content_hash(self) -> None:
+        same = BrainGenome.from_json(self.genome.to_json())
+        self.assertEqual(same.contentHash, self.genome.contentHash)
+        reseeded = BrainGenome(
+            self.genome.somaProgram,
+            self.genome.dendriteProgram,
+            43,
+            self.config)
+        self.assertNotEqual(reseeded.contentHash, self.genome.contentHash)
+        otherConfig = BrainGenome(
+            self.genome.somaProgram,
+            self.genome.dendriteProgram,
+            42,
+            Config(num_inputs=[4, 9], num_outputs=[3, 7], num_epochs=2))
+        self.assertNotEqual(
+            otherConfig.contentHash, self.genome.contentHash)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+from cgp.improbed import BrainBuilder, BrainState, Config
+import random
+import unittest
+
+
+class TestBrainState(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(
+            num_inputs=[4, 9],
+            num_outputs=[3, 7],
+            max_num_neurons=12,
+            max_num_dendrites=6)
+        self.brain = BrainBuilder(self.config).build()
+
+    def test_round_trip(self) -> None:
+        state = BrainState.fromBrain(self.brain)
+        self.assertEqual(state.toBrain().to_json(), self.brain.to_json())
+
+    def test_update_matches_brain(self) -> None:
+        brain = self.brain
+        state = BrainState.fromBrain(brain)
+        for step in range(12):
+            isPre = step < 4
+            fitnessesPrev = [] if isPre else [0.2 + 0.01 * step, 0.6]
+            brain = brain.update(isPre, fitnessesPrev)
+            state = state.update(isPre, fitnessesPrev)
+            self.assertEqual(state.toBrain().to_json(), brain.to_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+from cgp.improbed import BrainBuilder, BrainFitness, Config, EvaluationPool
+from cgp.util import FitnessCache
+import dataclasses
+import functools
+import os
+import random
+import tempfile
+import unittest
+
+from tests.improbed.toy_problems import makeProblems
+
+
+class TestEvaluationPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[2], num_outputs=[2], num_epochs=2)
+        builder = BrainBuilder(self.config)
+        self.brains = [builder.build() for _ in range(3)]
+
+    def test_matches_serial_fitness(self) -> None:
+        expected = [
+            BrainFitness.measure(brain, self.config, makeProblems())
+            for brain in self.brains]
+        with EvaluationPool(self.config, makeProblems, processes=2) as pool:
+            self.assertEqual(pool.evaluate(self.brains), expected)
+            self.assertEqual(
+                pool.submit(self.brains[0]).result(), expected[0])
+
+    def test_chunked_fitness_matches(self) -> None:
+        chunked = dataclasses.replace(self.config, fitness_chunk_rows=7)
+        for brain in self.brains:
+            self.assertEqual(
+                BrainFitness.measure(brain, chunked, makeProblems()),
+                BrainFitness.measure(brain, self.config, makeProblems()))
+
+    def test_float32_fitness_is_close(self) -> None:
+        single = dataclasses.replace(self.config, ann_dtype='float32')
+        for brain in self.brains:
+            self.assertAlmostEqual(
+                BrainFitness.measure(brain, single, makeProblems()),
+                BrainFitness.measure(brain, self.config, makeProblems()),
+                places=5)
+
+    def test_recovers_from_worker_crash(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            marker = os.path.join(directory, 'crash')
+            open(marker, 'w').close()
+            factory = functools.partial(makeProblems, marker)
+            with EvaluationPool(self.config, factory, processes=1) as pool:
+                fitnesses = pool.evaluate(self.brains)
+                self.assertGreaterEqual(pool.restarts, 1)
+        self.assertEqual(fitnesses, [
+            BrainFitness.measure(brain, self.config, makeProblems())
+            for brain in self.brains])
+
+    def test_cache_memoizes_genomes(self) -> None:
+        genome = BrainBuilder(self.config).makeGenome(seed=3)
+        cache = FitnessCache()
+        with EvaluationPool(self.config, makeProblems, processes=1,
+                            cache=cache) as pool:
+            first = pool.submit(genome).result()
+            self.assertEqual(pool.submit(genome).result(), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first, BrainFitness.measure(
+            genome.build(), self.config, makeProblems()))
+
+
+if __name__ == '__main__':
+    unittest.main()
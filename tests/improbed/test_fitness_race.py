@@ -0,0 +1,87 @@
+from cgp.improbed import BrainBuilder, BrainFitness, BrainMutator, Config
+from cgp.improbed import EvaluationPool, FitnessRace, RaceResult, RaceStats
+from cgp.improbed import SteadyStateEvolution
+from cgp.util import FitnessCache
+import dataclasses
+import math
+import random
+import unittest
+
+from tests.improbed.toy_problems import makeProblems
+
+
+class TestFitnessRace(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[2], num_outputs=[2], num_epochs=2,
+                             racing_rows=4, racing_epochs=1)
+        self.problems = makeProblems()
+        self.brain = BrainBuilder(self.config).build(0)
+
+    def test_promotes_within_threshold(self) -> None:
+        cheap = BrainFitness.measureCheap(
+            self.brain, self.config, self.problems)
+        result = FitnessRace.run(self.brain, self.problems, cheap)
+        self.assertTrue(result.promoted)
+        self.assertEqual(result.cheap_fitness, cheap)
+        self.assertEqual(
+            result.fitness(),
+            BrainFitness.measure(self.brain, self.config, self.problems))
+
+    def test_rejects_beyond_threshold(self) -> None:
+        result = FitnessRace.run(self.brain, self.problems, -1.0)
+        self.assertFalse(result.promoted)
+        self.assertTrue(math.isnan(result.full_fitness))
+        self.assertEqual(result.fitness(), math.inf)
+        audited = FitnessRace.run(self.brain, self.problems, -1.0, True)
+        self.assertFalse(audited.promoted)
+        self.assertFalse(math.isnan(audited.full_fitness))
+        self.assertEqual(audited.fitness(), math.inf)
+
+    def test_stats(self) -> None:
+        stats = RaceStats()
+        stats.record(RaceResult(1.0, 2.0, True), 1.5)
+        stats.record(RaceResult(3.0, math.nan, False), 1.5)
+        stats.record(RaceResult(3.0, 1.0, False), 1.5)
+        stats.record(RaceResult(3.0, 2.0, False), 1.5)
+        self.assertEqual(stats, RaceStats(promoted=1, rejected=3, audited=2,
+                                          misranked=1, wasted=1))
+        self.assertEqual(stats.misrankRate(), 0.5)
+
+    def test_pool_caches_cheap_fitness(self) -> None:
+        genome = BrainBuilder(self.config).makeGenome(0)
+        cache = FitnessCache()
+        with EvaluationPool(self.config, makeProblems, processes=1,
+                            cache=cache) as pool:
+            race = pool.submitRace(genome, math.inf).result()
+            self.assertEqual(
+                pool.submitCheapFitness(genome).result(),
+                race.cheap_fitness)
+            self.assertEqual(cache.hits, 1)
+        self.assertEqual(
+            race.cheap_fitness,
+            BrainFitness.measureCheap(
+                genome.build(), self.config, self.problems))
+
+    def test_steady_state_racing(self) -> None:
+        self.config = dataclasses.replace(
+            self.config, racing_audit_rate=0.5)
+        with EvaluationPool(self.config, makeProblems, processes=2) as pool:
+            evolution = SteadyStateEvolution(
+                pool,
+                BrainBuilder(self.config),
+                BrainMutator(self.config),
+                lamb=3)
+            parent, start_fitness = evolution.initialParent()
+            parent, fitness = evolution.run(
+                3, lambda g, p, f: None, parent, start_fitness)
+            self.assertLessEqual(fitness, start_fitness)
+            # Whatever won was measured fully, not just cheaply:
+            self.assertEqual(pool.submit(parent).result(), fitness)
+        stats = evolution.race_stats
+        self.assertEqual(stats.promoted + stats.rejected, 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
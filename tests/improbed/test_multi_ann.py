@@ -0,0 +1,78 @@
+from cgp.improbed import BrainBuilder, Config
+from cgp.improbed.ann import ANN
+import numpy as np
+import random
+import unittest
+
+
+class TestMultiANN(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[4, 9], num_outputs=[3, 7])
+        brain = BrainBuilder(self.config).build()
+        for _ in range(self.config.num_steps_pre_epoch):
+            brain = brain.update(True)
+        self.brain = brain
+        rng = np.random.default_rng(0)
+        self.inputs = [rng.uniform(-1, 1, (20, 4)),
+                       rng.uniform(-1, 1, (30, 9))]
+
+    def test_views_mask_other_problems(self) -> None:
+        multi = self.brain.extractMultiANN()
+        self.assertEqual(multi.view(0).inputIdxes, [0, 1, 2, 3] + [-1] * 9)
+        self.assertEqual(multi.view(1).inputIdxes, [-1] * 4 + list(range(9)))
+        self.assertEqual(len(multi.view(0).outputAddresses), 3)
+        self.assertEqual(len(multi.view(1).outputAddresses), 7)
+        self.assertIs(
+            multi.view(0).connectionAddresses,
+            multi.view(1).connectionAddresses)
+
+    def test_forward_matches_single_problem(self) -> None:
+        outputs = self.brain.extractMultiANN().forward(self.inputs)
+        for problem in range(2):
+            expected = self.brain.extractANN(problem).forward(
+                self.inputs[problem])
+            np.testing.assert_array_equal(outputs[problem], expected)
+
+    def test_forward_only_runs_each_problems_neurons(self) -> None:
+        multi = self.brain.extractMultiANN()
+        multi.forward(self.inputs)
+        numInputs = sum(self.config.num_inputs)
+        for view in multi.views:
+            scheduled = {
+                view.address[row - numInputs]
+                for rows, _, _, _ in view.schedule
+                for row in rows.tolist()}
+            pruned, _ = view.prune()
+            self.assertEqual(scheduled, set(pruned.address))
+
+    def test_prune_drops_masked_inputs(self) -> None:
+        multi = self.brain.extractMultiANN()
+        pruned, report = multi.prune()
+        numInputs = sum(self.config.num_inputs)
+
+        def maskedConnections(view: ANN) -> int:
+            return sum(
+                1 for _, connectionRows, _, _ in view.schedule
+                for row in connectionRows.flatten().tolist()
+                if row < numInputs and view.inputIdxes[row] == -1)
+
+        self.assertGreater(
+            sum(maskedConnections(view) for view in multi.views), 0)
+        for problem in range(2):
+            view = pruned.view(problem)
+            self.assertEqual(view.inputIdxes, multi.view(problem).inputIdxes)
+            self.assertEqual(maskedConnections(view), 0)
+            np.testing.assert_allclose(
+                pruned.forward(self.inputs)[problem],
+                multi.forward(self.inputs)[problem], rtol=1e-12)
+        self.assertEqual(
+            (report.nodesAfter, report.edgesAfter),
+            tuple(map(sum, zip(*[view.numScheduled()
+                                 for view in pruned.views]))))
+        self.assertLess(report.edgesAfter, report.edgesBefore)
+
+
+if __name__ == '__main__':
+    unittest.main()
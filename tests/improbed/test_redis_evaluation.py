@@ -0,0 +1,153 @@
+from cgp.improbed import BrainBuilder, BrainFitness, Config
+from cgp.improbed import RedisEvaluator, RedisWorker
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tests.improbed.toy_problems import makeProblems
+
+
+class StandInRedis:
+    """
+    In-process stand-in for the few Redis commands the queue uses
+    """
+
+    def __init__(self) -> None:
+        self.lists: dict[str, list[str]] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.changed = threading.Condition()
+
+    def lpush(self, name, value):
+        with self.changed:
+            self.lists.setdefault(name, []).insert(0, value)
+            self.changed.notify_all()
+
+    def rpush(self, name, value):
+        with self.changed:
+            self.lists.setdefault(name, []).append(value)
+            self.changed.notify_all()
+
+    def blmove(self, first_list, second_list, timeout, src, dest):
+        with self.changed:
+            if not self.changed.wait_for(
+                    lambda: len(self.lists.get(first_list, [])) > 0,
+                    timeout):
+                return None
+            items = self.lists[first_list]
+            value = items.pop(0 if src == 'LEFT' else -1)
+            second = self.lists.setdefault(second_list, [])
+            second.insert(0 if dest == 'LEFT' else len(second), value)
+            return value
+
+    def lrem(self, name, count, value):
+        with self.changed:
+            items = self.lists.get(name, [])
+            if value in items:
+                items.remove(value)
+                return 1
+            return 0
+
+    def lrange(self, name, start, end):
+        with self.changed:
+            return list(self.lists.get(name, []))
+
+    def hset(self, name, key, value):
+        with self.changed:
+            self.hashes.setdefault(name, {})[key] = value
+
+    def hget(self, name, key):
+        with self.changed:
+            return self.hashes.get(name, {}).get(key)
+
+    def hmget(self, name, keys):
+        with self.changed:
+            return [self.hashes.get(name, {}).get(k) for k in keys]
+
+    def hkeys(self, name):
+        with self.changed:
+            return list(self.hashes.get(name, {}))
+
+    def hdel(self, name, key):
+        with self.changed:
+            self.hashes.get(name, {}).pop(key, None)
+
+
+class TestRedisEvaluation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[2], num_outputs=[2], num_epochs=2)
+        builder = BrainBuilder(self.config)
+        self.genomes = [builder.makeGenome() for _ in range(3)]
+        self.expected = [
+            BrainFitness.measure(g.build(), self.config, makeProblems())
+            for g in self.genomes]
+        self.redis = StandInRedis()
+        self.stop = threading.Event()
+
+    def startWorker(self) -> None:
+        worker = RedisWorker(self.redis, makeProblems())
+        thread = threading.Thread(
+            target=worker.run, kwargs={'stop': self.stop}, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.stop.set)
+
+    def test_evaluate(self) -> None:
+        self.startWorker()
+        with RedisEvaluator(self.redis) as evaluator:
+            self.assertEqual(evaluator.evaluate(self.genomes), self.expected)
+            brain = self.genomes[0].build()
+            self.assertEqual(
+                evaluator.submit(brain).result(), self.expected[0])
+
+    def test_requeues_lost_tasks(self) -> None:
+        with RedisEvaluator(self.redis, lease_seconds=0.2) as evaluator:
+            future = evaluator.submit(self.genomes[1])
+            # A worker takes the task, then dies without finishing it:
+            lost = RedisWorker(self.redis, makeProblems())
+            self.redis.blmove(
+                lost.queue.tasks, lost.queue.processing, 1, 'RIGHT', 'LEFT')
+            time.sleep(0.3)
+            self.startWorker()
+            self.assertEqual(future.result(timeout=30), self.expected[1])
+            self.assertEqual(evaluator.requeued, 1)
+
+    def test_heartbeat_keeps_slow_tasks(self) -> None:
+        measure = BrainFitness.measure
+
+        def slowMeasure(*args):
+            time.sleep(0.6)
+            return measure(*args)
+
+        worker = RedisWorker(self.redis, makeProblems(), lease_seconds=0.2)
+        thread = threading.Thread(
+            target=worker.run, kwargs={'stop': self.stop}, daemon=True)
+        with mock.patch.object(BrainFitness, 'measure', slowMeasure):
+            thread.start()
+            self.addCleanup(thread.join)
+            self.addCleanup(self.stop.set)
+            with RedisEvaluator(self.redis, lease_seconds=0.2) as evaluator:
+                future = evaluator.submit(self.genomes[2])
+                self.assertEqual(future.result(timeout=30), self.expected[2])
+                self.assertEqual(evaluator.requeued, 0)
+                self.assertEqual(evaluator._unleased, {})
+        self.assertEqual(worker.completed, 1)
+
+    def test_drops_stale_results(self) -> None:
+        with RedisEvaluator(self.redis) as evaluator:
+            self.redis.hset(
+                evaluator.queue.results, 'finished-elsewhere', '{}')
+            self.startWorker()
+            evaluator.evaluate(self.genomes[:1])
+            deadline = time.time() + 5
+            while (self.redis.hkeys(evaluator.queue.results)
+                   and time.time() < deadline):
+                time.sleep(0.05)
+            self.assertEqual(self.redis.hkeys(evaluator.queue.results), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+from cgp.improbed import BrainBuilder, BrainMutator, Config, EvaluationPool
+from cgp.improbed import SteadyStateEvolution
+import random
+import unittest
+
+from tests.improbed.toy_problems import makeProblems
+
+
+class TestSteadyStateEvolution(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        self.config = Config(num_inputs=[2], num_outputs=[2], num_epochs=2)
+
+    def test_run(self) -> None:
+        generations = []
+        with EvaluationPool(self.config, makeProblems, processes=2) as pool:
+            evolution = SteadyStateEvolution(
+                pool,
+                BrainBuilder(self.config),
+                BrainMutator(self.config),
+                lamb=3)
+            parent, start_fitness = evolution.initialParent()
+            parent, fitness = evolution.run(
+                4,
+                lambda g, p, f: generations.append((g, f)),
+                parent,
+                start_fitness)
+            self.assertEqual(pool.submit(parent).result(), fitness)
+        self.assertEqual([g for g, _ in generations], [0, 1, 2, 3])
+        # The parent only ever gets replaced by something no worse:
+        fitnesses = [start_fitness] + [f for _, f in generations]
+        self.assertEqual(fitnesses, sorted(fitnesses, reverse=True))
+        self.assertEqual(fitness, fitnesses[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+The problem the pool, race, Redis and steady-state tests run brains on,
+kept here since test modules don't import each other
+"""
+from cgp.problems import ProblemBase
+import numpy as np
+import os
+
+
+class ToyProblem(ProblemBase):
+    """
+    Two inputs, two one-hot outputs (is the first input positive), scored
+    by mean squared error. Shaped for Config(num_inputs=[2],
+    num_outputs=[2]).
+    """
+
+    def __init__(self, crashMarker: str = ''):
+        self.crashMarker = crashMarker
+        rng = np.random.default_rng(0)
+        self.input = rng.uniform(-1, 1, (20, 2))
+        self.output = np.stack(
+            (self.input[:, 0] > 0, self.input[:, 0] <= 0), axis=1) * 1.0
+
+    def numInputs(self) -> int:
+        return 2
+
+    def numOutputs(self) -> int:
+        return 2
+
+    def trainingSet(self):
+        # Kills the worker the first time, if asked to:
+        if self.crashMarker != '' and os.path.exists(self.crashMarker):
+            os.remove(self.crashMarker)
+            os._exit(1)
+        return self.input, self.output
+
+    def validationSet(self):
+        return self.input, self.output
+
+    def measureFitness(self, expected_output, actual_output) -> float:
+        return float(np.mean((expected_output - actual_output) ** 2))
+
+
+def makeProblems(crashMarker: str = '') -> list[ProblemBase]:
+    # Module level, so pools can pickle it as a problem factory:
+    return [ToyProblem(crashMarker)]
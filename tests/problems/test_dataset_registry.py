@@ -0,0 +1,104 @@
+from cgp.problems import DatasetRegistry, GlassProblem, IrisProblem
+import numpy as np
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+IRIS_ROWS = [
+    '5.1,3.5,1.4,0.2,Iris-setosa',
+    '7.0,3.2,4.7,1.4,Iris-versicolor',
+    '6.3,3.3,6.0,2.5,Iris-virginica',
+] * 50
+
+
+class TestDatasetRegistry(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.dataDir = os.path.join(self.directory.name, 'data')
+        self.cacheDir = os.path.join(self.directory.name, 'cache')
+        self.environ = mock.patch.dict(os.environ, {
+            'CGP_DATA_DIR': self.dataDir, 'CGP_CACHE_DIR': self.cacheDir})
+        self.environ.start()
+        self.writeSource('iris_flower_classification/iris.data',
+                         IRIS_ROWS + [''])
+        rng = np.random.default_rng(0)
+        self.writeSource('uci_glass/glass.data', [
+            ','.join([str(i + 1)] + ['{:.4f}'.format(v) for v in row] +
+                     [str(i % 7 + 1)])
+            for i, row in enumerate(rng.uniform(0, 10, (30, 9)))])
+
+    def tearDown(self) -> None:
+        self.environ.stop()
+        self.directory.cleanup()
+
+    def writeSource(self, path: str, rows: list[str]) -> None:
+        path = os.path.join(self.dataDir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('\n'.join(rows))
+
+    def test_loads_lazily_from_cache(self) -> None:
+        problem = IrisProblem(normalizeInputs=True)
+        self.assertFalse(os.path.exists(self.cacheDir))
+        training_in, training_out = problem.trainingSet()
+        validation_in, _ = problem.validationSet()
+        self.assertEqual(training_in.shape, (100, 4))
+        self.assertEqual(validation_in.shape, (50, 4))
+        self.assertEqual(training_out.dtype, np.int64)
+        self.assertEqual(len(os.listdir(self.cacheDir)), 2)
+        # Normalized by the max of each column:
+        expected = np.asarray([[5.1, 3.5, 1.4, 0.2],
+                               [7.0, 3.2, 4.7, 1.4],
+                               [6.3, 3.3, 6.0, 2.5]]) / [7.0, 3.5, 6.0, 2.5]
+        np.testing.assert_array_equal(
+            training_in, expected[training_out])
+
+        with mock.patch('csv.reader') as reader:
+            inputs, outputs = DatasetRegistry.load('iris', True)
+            reader.assert_not_called()
+        self.assertIsInstance(inputs, np.memmap)
+        self.assertFalse(inputs.flags.writeable)
+
+    def test_source_change_invalidates(self) -> None:
+        first, _ = DatasetRegistry.load('glass')
+        self.assertEqual(first.shape, (30, 9))
+        self.writeSource('uci_glass/glass.data', ['1,' + '2,' * 9 + '3'])
+        second, outputs = DatasetRegistry.load('glass')
+        np.testing.assert_array_equal(second, np.full((1, 9), 2.0))
+        np.testing.assert_array_equal(outputs, [2])
+
+    def test_glass_shuffles_every_row(self) -> None:
+        problem = GlassProblem()
+        inputs, outputs = problem.trainingSet()
+        self.assertIs(problem.validationSet()[0], inputs)
+        source, sourceOutputs = DatasetRegistry.load('glass')
+        order = np.lexsort(inputs.T[::-1])
+        sourceOrder = np.lexsort(source.T[::-1])
+        np.testing.assert_array_equal(inputs[order], source[sourceOrder])
+        np.testing.assert_array_equal(
+            outputs[order], sourceOutputs[sourceOrder])
+
+    def test_unwritable_cache(self) -> None:
+        # A file where the cache directory should be, so even root can't
+        # write it:
+        open(self.cacheDir, 'w').close()
+        with self.assertLogs(level='WARNING'):
+            inputs, outputs = DatasetRegistry.load('iris', True)
+        self.assertEqual(inputs.shape, (150, 4))
+        self.assertEqual(inputs.dtype, np.float64)
+        self.assertEqual(outputs.dtype, np.int64)
+        self.assertFalse(inputs.flags.writeable)
+        np.testing.assert_array_equal(
+            inputs.max(axis=0), [1.0, 1.0, 1.0, 1.0])
+        # Still loadable by the problems:
+        self.assertEqual(IrisProblem().trainingSet()[0].shape, (100, 4))
+
+    def test_unknown_dataset(self) -> None:
+        self.assertRaises(ValueError, DatasetRegistry.load, 'mnist')
+
+
+if __name__ == '__main__':
+    unittest.main()
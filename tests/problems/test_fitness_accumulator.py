@@ -0,0 +1,100 @@
+from cgp.gene import GeneBuilder, GeneBuilderConfig, OpsetKey
+from cgp.problems import MeanAccumulator, ProblemBase, RowChunks
+import numpy as np
+import os
+import random
+import tempfile
+import unittest
+
+
+def crossEntropy(expected_output, actual_output):
+    true_class_logits = actual_output[
+        np.arange(len(actual_output)), expected_output]
+    return - true_class_logits + np.log(
+        np.sum(np.exp(actual_output), axis=-1))
+
+
+class ToyProblem(ProblemBase):
+    def __init__(self, meanFitness: bool) -> None:
+        self.meanFitness = meanFitness
+        rng = np.random.default_rng(0)
+        self.input = rng.uniform(-1, 1, (103, 3))
+        self.output = rng.integers(0, 2, 103)
+
+    def numInputs(self) -> int:
+        return 3
+
+    def numOutputs(self) -> int:
+        return 2
+
+    def trainingSet(self):
+        return self.input, self.output
+
+    def validationSet(self):
+        return self.input, self.output
+
+    def measureFitness(self, expected_output, actual_output) -> float:
+        # Like GlassProblem, scaled by the max of every row:
+        if not self.meanFitness:
+            actual_output = actual_output / np.max(np.abs(actual_output))
+        return float(np.mean(crossEntropy(expected_output, actual_output)))
+
+    def fitnessAccumulator(self):
+        if self.meanFitness:
+            return MeanAccumulator(crossEntropy)
+        return super().fitnessAccumulator()
+
+
+class TestFitnessAccumulator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        builder = GeneBuilder(
+            GeneBuilderConfig(3, 30, 2, OpsetKey.GPTP_II_OPSET_KEY))
+        self.gene = builder.makeGene()
+
+    def test_chunked_matches_whole(self) -> None:
+        for meanFitness in [True, False]:
+            problem = ToyProblem(meanFitness)
+            input, expected_output = problem.trainingSet()
+            whole = problem.measureFitness(
+                expected_output, self.gene.evaluate(input))
+            for chunk_rows in [0, 1, 10, 103, 500]:
+                chunked = problem.measureFitnessChunked(
+                    self.gene.evaluate, problem.trainingSet(), chunk_rows)
+                self.assertAlmostEqual(chunked, whole, places=12)
+
+    def test_mean_accumulator_needs_rows(self) -> None:
+        accumulator = MeanAccumulator(crossEntropy)
+        accumulator.add(np.zeros(0, dtype=int), np.zeros((0, 2)))
+        self.assertRaises(ValueError, accumulator.result)
+
+    def test_memmapped_chunks(self) -> None:
+        problem = ToyProblem(True)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name)
+                     for name in ['input.npy', 'output.npy']]
+            for path, array in zip(paths, problem.trainingSet()):
+                np.save(path, array)
+            dataset = tuple(RowChunks.memmap(path) for path in paths)
+            self.assertIsInstance(dataset[0], np.memmap)
+            chunks = list(RowChunks.iterate(dataset, 25))
+            self.assertEqual([len(i) for i, _ in chunks], [25] * 4 + [3])
+            np.testing.assert_array_equal(
+                np.concatenate([o for _, o in chunks]), problem.output)
+            self.assertAlmostEqual(
+                problem.measureFitnessChunked(
+                    self.gene.evaluate, dataset, 25),
+                problem.measureFitnessChunked(
+                    self.gene.evaluate, problem.trainingSet(), 0),
+                places=12)
+            del dataset, chunks
+
+    def test_mismatched_rows(self) -> None:
+        self.assertRaises(
+            ValueError, list,
+            RowChunks.iterate((np.zeros((3, 2)), np.zeros(2)), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+from cgp.problems import ProblemBase, SharedArray, shared_array
+from multiprocessing import shared_memory
+import numpy as np
+import pickle
+import unittest
+
+
+class ToyProblem(ProblemBase):
+    def __init__(self) -> None:
+        rng = np.random.default_rng(0)
+        self._training_data = (rng.uniform(-1, 1, (50, 3)),
+                               rng.integers(0, 2, 50))
+        self._validation_data = self._training_data
+
+    def numInputs(self) -> int:
+        return 3
+
+    def numOutputs(self) -> int:
+        return 2
+
+    def trainingSet(self):
+        return self._training_data
+
+    def validationSet(self):
+        return self._validation_data
+
+    def measureFitness(self, expected_output, actual_output) -> float:
+        return 0.0
+
+
+class TestProblemBase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.problem = ToyProblem()
+        self.expected = [a.copy() for a in self.problem.trainingSet()]
+
+    def tearDown(self) -> None:
+        self.problem.unpublish()
+
+    def test_publish_shares_read_only_views(self) -> None:
+        self.problem.publish()
+        copy = pickle.loads(pickle.dumps(self.problem))
+        for array, expected in zip(copy.trainingSet(), self.expected):
+            np.testing.assert_array_equal(array, expected)
+            self.assertFalse(array.flags.writeable)
+        # Training and validation were the same arrays, so one segment each:
+        self.assertEqual(len(self.problem._shared_segments), 2)
+
+    def test_pickle_only_sends_names(self) -> None:
+        unpublished = len(pickle.dumps(self.problem))
+        self.problem.publish()
+        self.assertLess(len(pickle.dumps(self.problem)), unpublished / 2)
+
+    def test_unpublish_unlinks(self) -> None:
+        self.problem.publish()
+        name = self.problem._shared_handles['_training_data'][0].name
+        self.problem.unpublish()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+        # This process' mapping is closed too:
+        self.assertNotIn(name, shared_array._ATTACHED)
+        np.testing.assert_array_equal(
+            self.problem.trainingSet()[0], self.expected[0])
+        self.assertTrue(self.problem.trainingSet()[0].flags.writeable)
+
+    def test_views_in_use_stay_mapped(self) -> None:
+        self.problem.publish()
+        handle = self.problem._shared_handles['_training_data'][0]
+        view = self.problem.trainingSet()[0]
+        self.problem.unpublish()
+        self.assertIn(handle.name, shared_array._ATTACHED)
+        np.testing.assert_array_equal(view, self.expected[0])
+        del view
+        self.assertEqual(SharedArray.detachAll(), 0)
+        self.assertNotIn(handle.name, shared_array._ATTACHED)
+
+    def test_training_subset_is_stratified(self) -> None:
+        input, expected_output = self.problem.trainingSubset(10, seed=3)
+        self.assertEqual(len(input), len(expected_output))
+        self.assertEqual(set(expected_output.tolist()), {0, 1})
+        full_input, full_output = self.problem.trainingSet()
+        # Rows come from the full set, in the original order:
+        rows = [np.flatnonzero((full_input == row).all(axis=1))[0]
+                for row in input]
+        self.assertEqual(rows, sorted(rows))
+        np.testing.assert_array_equal(full_output[rows], expected_output)
+        again = self.problem.trainingSubset(10, seed=3)
+        np.testing.assert_array_equal(again[0], input)
+
+    def test_training_subset_of_everything(self) -> None:
+        input, _ = self.problem.trainingSubset(100)
+        self.assertIs(input, self.problem.trainingSet()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+from cgp.util import FitnessCache
+import unittest
+
+
+class TestFitnessCache(unittest.TestCase):
+
+    def test_hits_and_misses(self) -> None:
+        cache = FitnessCache(max_size=2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 1.0)
+        self.assertEqual(cache.get('a'), 1.0)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hitRate(), 0.5)
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = FitnessCache(max_size=2)
+        cache.put('a', 1.0)
+        cache.put('b', 2.0)
+        # Touch a, so b is the oldest:
+        cache.get('a')
+        cache.put('c', 3.0)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1.0)
+        self.assertEqual(cache.get('c'), 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 from cgp.util import MathUtil
 import unittest
+import numpy as np
 
 
 class TestMathUtil(unittest.TestCase):
@@ -23,6 +24,23 @@ class TestMathUtil(unittest.TestCase):
         # Test Zero:
         self.assertEqual(MathUtil.sign(0), 0)
 
+    def test_array_versions(self) -> None:
+        vals = np.asarray([-800.0, -2.0, -0.0, 0.0, 0.3, 1.5, 40.0, np.nan])
+        np.testing.assert_array_equal(
+            MathUtil.clampArray(vals, -1.0, 1.0),
+            [MathUtil.clamp(v, -1.0, 1.0) for v in vals])
+        np.testing.assert_array_equal(
+            MathUtil.signArray(vals),
+            [MathUtil.sign(v) for v in vals])
+        np.testing.assert_array_equal(
+            MathUtil.sigArray(vals[1:]),
+            [MathUtil.sig(v) for v in vals[1:]])
+
+    def test_sig_array_matches_sig(self) -> None:
+        vals = np.random.default_rng(0).uniform(-50, 50, 10000)
+        np.testing.assert_array_equal(
+            MathUtil.sigArray(vals), [MathUtil.sig(v) for v in vals])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,37 @@
+from cgp.gene import GeneBuilder, GeneBuilderConfig, OpsetKey
+from cgp.util import PrecisionUtil
+import unittest
+import numpy as np
+
+
+class TestPrecisionUtil(unittest.TestCase):
+
+    def test_max_deviation(self) -> None:
+        self.assertEqual(
+            PrecisionUtil.maxDeviation(
+                np.asarray([1.0, np.inf, np.nan]),
+                np.asarray([1.5, np.inf, np.nan])),
+            0.5)
+        self.assertEqual(
+            PrecisionUtil.maxDeviation(
+                np.asarray([1.0, 2.0]),
+                np.asarray([1.0, np.inf])),
+            float('inf'))
+
+    def test_float32_gene(self) -> None:
+        rng = np.random.default_rng(0)
+        input = rng.uniform(-1, 1, (100, 9))
+        for opset_key in OpsetKey:
+            builder = GeneBuilder(
+                GeneBuilderConfig(9, 50, 4, opset_key), rng)
+            g = builder.makeGene()
+            with np.errstate(all='ignore'):
+                output = g.evaluate(input, np.float32)
+                deviation = PrecisionUtil.compare(g.evaluate, input)
+            self.assertEqual(output.dtype, np.float32)
+            self.assertEqual(output.shape, (100, 4))
+            self.assertGreaterEqual(deviation, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()